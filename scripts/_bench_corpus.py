@@ -0,0 +1,58 @@
+"""Shared synthetic event corpus for the scripts/bench_*.py benchmarks.
+
+Shapes mirror what the interceptor captures from a typical OLTP service:
+mostly short UPDATE/INSERT/SELECT statements with a handful of params, plus a
+tail of wide INSERTs carrying larger text params.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import List
+
+from mysql_interceptor.events.models import SqlLogMessage
+
+_STATEMENTS = [
+    ("UPDATE orders SET status=%s, updated_at=%s WHERE id=%s", 3),
+    ("INSERT INTO order_items (order_id, sku, qty, price) VALUES (%s, %s, %s, %s)", 4),
+    ("SELECT id, status, total FROM orders WHERE customer_id=%s AND created_at > %s ORDER BY id DESC LIMIT 50", 2),
+    ("DELETE FROM cart_items WHERE cart_id=%s", 1),
+    ("INSERT INTO audit_log (actor, action, payload) VALUES (%s, %s, %s)", 3),
+]
+
+
+def make_event(i: int, *, rng: random.Random) -> SqlLogMessage:
+    sql, nparams = _STATEMENTS[i % len(_STATEMENTS)]
+    params = [str(rng.randint(1, 10_000_000)) for _ in range(nparams)]
+    if sql.startswith("INSERT INTO audit_log"):
+        params[-1] = "x" * rng.randint(200, 2048)
+    return SqlLogMessage(
+        timestamp=1_700_000_000_000 + i,
+        serverHost="mysql-primary.internal:3306",
+        serverVersion="8.0.36",
+        user="app_rw",
+        client="web-7f9c6d5b8-abcde",
+        dbName="shop",
+        stmtDbName="shop",
+        debug="checkout-service",
+        connectionId=1000 + (i % 64),
+        totalPoolCount=64,
+        executionCount=i,
+        serverFlags=2,
+        clientFlags=3842573,
+        iFlags=3,
+        defaultTZ="UTC",
+        serverTZ="SYSTEM",
+        isolationLvl=4,
+        durationNs=rng.randint(50_000, 5_000_000),
+        updateCount=rng.randint(0, 3),
+        sql=sql,
+        queryParams=params,
+        errorMessage=None,
+        serverInfo="Rows matched: 1  Changed: 1  Warnings: 0" if i % 2 else None,
+    )
+
+
+def make_corpus(n: int, *, seed: int = 42) -> List[SqlLogMessage]:
+    rng = random.Random(seed)
+    return [make_event(i, rng=rng) for i in range(n)]
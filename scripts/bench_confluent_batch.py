@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+ConfluentKafkaPublisher produce throughput by batch size, against a stub producer.
+
+The stub has librdkafka's surface (produce/poll/flush) and a bounded local
+queue that poll() drains, so the numbers are the Python-side cost of the
+publisher: serialization, key encoding, produce calls and polling. For each
+batch size we compare:
+
+  per-event   publish() once per event (one poll per event)
+  batch       publish_batch() (one poll per batch, retry on a full queue)
+
+Usage:
+  PYTHONPATH=src python scripts/bench_confluent_batch.py
+  PYTHONPATH=src python scripts/bench_confluent_batch.py --events 200000 --batch-sizes 1,50,500 --queue 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import Any, List
+
+from _bench_corpus import make_corpus
+
+from mysql_interceptor.kafka.confluent import ConfluentKafkaPublisher
+
+
+class _StubProducer:
+    """Accepts up to ``capacity`` queued messages; poll() delivers them all."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.queued = 0
+        self.delivered = 0
+        self.queue_full = 0
+
+    def produce(self, topic: str, key: Any = None, value: Any = None, on_delivery: Any = None) -> None:
+        if self.queued >= self.capacity:
+            self.queue_full += 1
+            raise BufferError("Local: Queue full")
+        self.queued += 1
+
+    def poll(self, timeout: float = 0) -> int:
+        n, self.queued = self.queued, 0
+        self.delivered += n
+        return n
+
+    def flush(self, timeout: Any = None) -> int:
+        self.poll()
+        return 0
+
+
+def _run(events: List[Any], batch_size: int, capacity: int, batched: bool) -> float:
+    producer = _StubProducer(capacity)
+    pub = ConfluentKafkaPublisher(bootstrap_servers="unused:9092", topic="bench", producer=producer)
+    t0 = time.perf_counter()
+    for i in range(0, len(events), batch_size):
+        batch = events[i : i + batch_size]
+        if batched:
+            pub.publish_batch(batch)
+        else:
+            for e in batch:
+                pub.publish(e)
+    pub.flush()
+    elapsed = time.perf_counter() - t0
+    assert producer.delivered == len(events) and pub.dropped == 0
+    return len(events) / elapsed
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=100_000)
+    ap.add_argument("--batch-sizes", default="1,10,100,500,2000")
+    ap.add_argument("--queue", type=int, default=100_000, help="stub producer queue capacity (messages)")
+    args = ap.parse_args(argv)
+
+    events = make_corpus(args.events)
+    print(f"{args.events} events, stub queue capacity {args.queue}")
+    print(f"{'batch':>7} {'per-event ev/s':>16} {'batch ev/s':>12} {'speedup':>8}")
+    for size in [int(b) for b in args.batch_sizes.split(",") if b]:
+        per_event = _run(events, size, args.queue, batched=False)
+        batched = _run(events, size, args.queue, batched=True)
+        print(f"{size:>7} {per_event:>16,.0f} {batched:>12,.0f} {batched / per_event:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main(sys.argv[1:]))
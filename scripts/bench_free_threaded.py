@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Interception throughput from 1 to 16 application threads.
+
+Each thread owns a wrapped connection (a stub DBAPI connection, no server)
+and runs `--statements` autocommit-style UPDATEs through the full capture
+path into a QueueingPublisher with a null sink. Compares the shared shard
+lock hand-off with `thread_staging` (per-thread staging deques).
+
+Only a free-threaded build (python3.13t and later, with PYTHON_GIL=0) can
+scale with threads; on a GIL build the aggregate rate stays flat or drops,
+and the numbers show the per-thread overhead of each mode instead.
+
+Usage:
+  PYTHONPATH=src python scripts/bench_free_threaded.py
+  PYTHONPATH=src python3.13t -X gil=0 scripts/bench_free_threaded.py --threads 1,2,4,8,16
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+import time
+from typing import Any, List
+
+from mysql_interceptor.config.settings import Settings
+from mysql_interceptor.dbapi.wrappers import ConnectionWrapper
+from mysql_interceptor.kafka.batching import QueueingPublisher
+
+
+class _NullPublisher:
+    def publish(self, event: Any) -> None:
+        pass
+
+    def publish_batch(self, events: List[Any]) -> None:
+        pass
+
+    def flush(self, timeout: Any = None) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _Cur:
+    rowcount = 1
+
+    def execute(self, sql: str, params: Any = None) -> int:
+        return 1
+
+    def fetchone(self) -> Any:
+        return (1,)
+
+    def close(self) -> None:
+        pass
+
+
+class _Conn:
+    server_status = 2
+
+    def cursor(self, *a: Any, **k: Any) -> _Cur:
+        return _Cur()
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def get_server_info(self) -> str:
+        return "8.0.36"
+
+
+def _gil_enabled() -> bool:
+    check = getattr(sys, "_is_gil_enabled", None)
+    return True if check is None else bool(check())
+
+
+def _run(settings: Settings, threads: int, statements: int) -> float:
+    """Aggregate statements per second across ``threads`` threads."""
+    pub = QueueingPublisher(inner=_NullPublisher(), settings=settings)
+    conns = [
+        ConnectionWrapper(conn=_Conn(), publisher=pub, settings=settings, driver_name="pymysql", database="shop")
+        for _ in range(threads)
+    ]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(conn: ConnectionWrapper) -> None:
+        cur = conn.cursor()
+        barrier.wait()
+        for i in range(statements):
+            cur.execute("UPDATE orders SET status=%s WHERE id=%s", ("paid", i))
+
+    ts = [threading.Thread(target=worker, args=(c,)) for c in conns]
+    for t in ts:
+        t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in ts:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    pub.close(timeout=30)
+    return threads * statements / elapsed
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", default="1,2,4,8,16")
+    ap.add_argument("--statements", type=int, default=20_000, help="per thread")
+    args = ap.parse_args(argv)
+
+    base = dict(buffer_until_commit=False, publish_queue_maxsize=1_000_000, publish_batch_size=500)
+    modes = {
+        "shard lock": Settings(**base),
+        "thread staging": Settings(**base, thread_staging=True),
+    }
+    print(f"python {sys.version.split()[0]}, GIL {'enabled' if _gil_enabled() else 'disabled'}")
+    print(f"{'threads':>8}" + "".join(f" {name + ' stmt/s':>22} {'scale':>6}" for name in modes))
+    first = {}
+    for threads in [int(t) for t in args.threads.split(",") if t]:
+        row = f"{threads:>8}"
+        for name, settings in modes.items():
+            rate = _run(settings, threads, args.statements)
+            first.setdefault(name, rate)
+            row += f" {rate:>22,.0f} {rate / first[name]:>5.1f}x"
+        print(row)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Events/s per JSON encoder backend, with the output checked against stdlib.
+
+Encodes the synthetic corpus with every installed backend from
+`mysql_interceptor.kafka.serializers` (orjson, msgspec, the specialized
+pure-Python encoder and the stdlib reference). It reports the best of
+`--repeat` runs in events/s and the speed-up over stdlib. Each backend's
+bytes are compared with the stdlib bytes, and the script exits with 1 on
+any difference.
+
+Usage:
+  PYTHONPATH=src python scripts/bench_json_serializers.py
+  PYTHONPATH=src python scripts/bench_json_serializers.py --events 200000 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import Any, Callable, List, Optional
+
+from _bench_corpus import make_corpus
+
+from mysql_interceptor.kafka.serializers import JSON_BACKENDS, _BUILDERS, stdlib_json
+
+
+def _best_rate(encode: Callable[[Any], bytes], events: List[Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for e in events:
+            encode(e)
+        best = min(best, time.perf_counter() - t0)
+    return len(events) / best
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--events", type=int, default=50_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    events = make_corpus(args.events)
+    reference = [stdlib_json(e) for e in events]
+    baseline: Optional[float] = None
+    status = 0
+    print(f"{'backend':<10} {'events/s':>12} {'vs stdlib':>10}  output")
+    for name in reversed(JSON_BACKENDS):  # stdlib first: it is the baseline
+        try:
+            encode = _BUILDERS[name]()
+        except ImportError:
+            print(f"{name:<10} {'-':>12} {'-':>10}  not installed")
+            continue
+        identical = [encode(e) for e in events] == reference
+        rate = _best_rate(encode, events, args.repeat)
+        if baseline is None:
+            baseline = rate
+        print(f"{name:<10} {rate:>12,.0f} {rate / baseline:>9.1f}x  {'identical' if identical else 'DIFFERS'}")
+        if not identical:
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Batch size and compression per producer profile, on the synthetic SQL corpus.
+
+librdkafka compresses each produce batch (MessageSet) as a whole, so what a
+profile buys depends on how many events land in one batch and how well the
+codec does on them. For each profile we form batches the way the producer
+would at `--rate` events/s on one partition (whatever arrives within
+linger.ms, capped by batch.size and batch.num.messages), compress them with
+the profile's codec and report:
+
+  ev/batch   average events per batch
+  ratio      uncompressed / compressed bytes
+  B/event    bytes per event on the wire
+  MB/s       codec throughput on uncompressed input (producer CPU cost)
+
+A second table runs every codec at each profile's batch shape. gzip ships
+with Python; lz4, zstd and snappy need `pip install lz4 zstandard
+python-snappy` and show as n/a otherwise.
+
+Usage:
+  PYTHONPATH=src python scripts/bench_kafka_profiles.py
+  PYTHONPATH=src python scripts/bench_kafka_profiles.py --events 50000 --rate 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import zlib
+from typing import Callable, Dict, List, Optional
+
+from _bench_corpus import make_corpus
+
+from mysql_interceptor.kafka.confluent import _json_serializer
+from mysql_interceptor.kafka.profiles import PROFILES
+
+_DEFAULT_BATCH_BYTES = 1_000_000  # librdkafka batch.size default
+_DEFAULT_BATCH_MESSAGES = 10_000  # librdkafka batch.num.messages default
+
+
+def _codec(name: str) -> Optional[Callable[[bytes], bytes]]:
+    if name == "none":
+        return lambda b: b
+    if name == "gzip":
+        return lambda b: zlib.compress(b, 6)
+    try:
+        if name == "lz4":
+            import lz4.frame  # type: ignore
+
+            return lz4.frame.compress
+        if name == "zstd":
+            import zstandard  # type: ignore
+
+            return zstandard.ZstdCompressor(level=3).compress
+        if name == "snappy":
+            import snappy  # type: ignore
+
+            return snappy.compress
+    except ImportError:
+        return None
+    return None
+
+
+def _batches(values: List[bytes], *, per_batch: int, max_bytes: int) -> List[bytes]:
+    out: List[bytes] = []
+    cur: List[bytes] = []
+    size = 0
+    for v in values:
+        if cur and (len(cur) >= per_batch or size + len(v) > max_bytes):
+            out.append(b"".join(cur))
+            cur, size = [], 0
+        cur.append(v)
+        size += len(v)
+    if cur:
+        out.append(b"".join(cur))
+    return out
+
+
+def _measure(batches: List[bytes], compress: Callable[[bytes], bytes]) -> Dict[str, float]:
+    raw = sum(len(b) for b in batches)
+    t0 = time.perf_counter()
+    packed = sum(len(compress(b)) for b in batches)
+    elapsed = max(time.perf_counter() - t0, 1e-9)
+    return {"ratio": raw / packed, "bytes": packed, "mbps": raw / elapsed / 1e6}
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=20_000)
+    ap.add_argument("--rate", type=int, default=20_000, help="events/s arriving at one partition")
+    args = ap.parse_args(argv)
+
+    values = [_json_serializer(e) for e in make_corpus(args.events)]
+    print(f"{args.events} events, {sum(map(len, values)) / len(values):.0f} B/event serialized, {args.rate} ev/s")
+
+    shapes = {}
+    print(f"\n{'profile':<16} {'codec':<6} {'ev/batch':>9} {'ratio':>6} {'B/event':>8} {'MB/s':>8}")
+    for name, props in PROFILES.items():
+        arriving = max(1, int(args.rate * props["linger.ms"] / 1000))
+        per_batch = min(arriving, int(props.get("batch.num.messages", _DEFAULT_BATCH_MESSAGES)))
+        batches = _batches(values, per_batch=per_batch, max_bytes=int(props.get("batch.size", _DEFAULT_BATCH_BYTES)))
+        shapes[name] = batches
+        codec = str(props.get("compression.type", "none"))
+        compress = _codec(codec)
+        ev = len(values) / len(batches)
+        if compress is None:
+            print(f"{name:<16} {codec:<6} {ev:>9.0f} {'n/a':>6} {'n/a':>8} {'n/a':>8}")
+            continue
+        m = _measure(batches, compress)
+        mbps = "-" if codec == "none" else f"{m['mbps']:.0f}"
+        print(f"{name:<16} {codec:<6} {ev:>9.0f} {m['ratio']:>6.1f} {m['bytes'] / len(values):>8.0f} {mbps:>8}")
+
+    codecs = ["gzip", "lz4", "zstd", "snappy"]
+    print("\nratio (MB/s) by codec at each profile's batch shape")
+    print(f"{'profile':<16}" + "".join(f" {c:>14}" for c in codecs))
+    for name, batches in shapes.items():
+        row = f"{name:<16}"
+        for c in codecs:
+            compress = _codec(c)
+            if compress is None:
+                row += f" {'n/a':>14}"
+            else:
+                m = _measure(batches, compress)
+                row += f" {m['ratio']:>6.1f} ({m['mbps']:>5.0f})"
+        print(row)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+In-thread vs process-pool serialization at a fixed capture rate.
+
+A feeder thread publishes `--rate` events/s through QueueingPublisher while an
+"application" thread runs a CPU-bound loop. We report the application's
+throughput (the GIL cost of capture) and the events actually serialized, for:
+
+  baseline      no capture running
+  in-thread     workers JSON-encode in this process (the default path)
+  process-pool  ProcessPoolSerializingPublisher with `--processes` serializers
+
+Usage:
+  PYTHONPATH=src python scripts/bench_process_pool.py
+  PYTHONPATH=src python scripts/bench_process_pool.py --rate 50000 --seconds 5 --processes 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+import time
+from typing import Any, List, Optional
+
+from _bench_corpus import make_corpus
+
+from mysql_interceptor.config.settings import Settings
+from mysql_interceptor.kafka.batching import QueueingPublisher
+from mysql_interceptor.kafka.confluent import _json_serializer
+from mysql_interceptor.kafka.process_pool import ProcessPoolSerializingPublisher
+
+
+class _StubSink:
+    """Stands in for the Kafka producer: serializes like ConfluentKafkaPublisher, counts bytes."""
+
+    def __init__(self) -> None:
+        self.events = 0
+        self.bytes = 0
+
+    def serialize(self, event: Any) -> bytes:
+        return _json_serializer(event)
+
+    def publish(self, event: Any) -> None:
+        self.publish_batch([event])
+
+    def publish_batch(self, events: List[Any]) -> None:
+        for e in events:
+            self.bytes += len(_json_serializer(e))
+        self.events += len(events)
+
+    def publish_serialized(self, values: List[Any], *, key: Optional[int] = None) -> None:
+        for v in values:
+            self.bytes += len(v)
+        self.events += len(values)
+
+    def flush(self, timeout: Any = None) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _app_loop(stop: threading.Event, out: List[int]) -> None:
+    ops = 0
+    while not stop.is_set():
+        sum(i * i for i in range(200))
+        ops += 1
+    out.append(ops)
+
+
+def _feeder(pub: Any, rate: int, seconds: float, corpus: List[Any]) -> None:
+    chunk = 50
+    interval = chunk / rate
+    deadline = time.monotonic() + seconds
+    next_at = time.monotonic()
+    i = 0
+    while time.monotonic() < deadline:
+        pub.publish_batch(corpus[i : i + chunk])
+        i = (i + chunk) % (len(corpus) - chunk)
+        next_at += interval
+        delay = next_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _run(mode: str, *, rate: int, seconds: float, processes: int, corpus: List[Any]) -> None:
+    sink = _StubSink()
+    pub: Any = None
+    if mode == "in-thread":
+        pub = QueueingPublisher(inner=sink, settings=Settings(publish_queue_maxsize=0))
+    elif mode == "process-pool":
+        pool = ProcessPoolSerializingPublisher(inner=sink, processes=processes)
+        pool.publish_batch(corpus[:10])  # start the processes outside the measured window
+        sink.events = sink.bytes = 0
+        pub = QueueingPublisher(inner=pool, settings=Settings(publish_queue_maxsize=0))
+
+    stop = threading.Event()
+    ops: List[int] = []
+    app = threading.Thread(target=_app_loop, args=(stop, ops))
+    t0 = time.monotonic()
+    app.start()
+    try:
+        if pub is not None:
+            _feeder(pub, rate, seconds, corpus)
+            pub.flush()
+        else:
+            time.sleep(seconds)
+        elapsed = time.monotonic() - t0
+    finally:
+        stop.set()  # never leave the app thread spinning
+        app.join()
+    if pub is not None:
+        pub.close()
+
+    print(f"{mode:>13} {ops[0] / elapsed:>12.0f} {sink.events / elapsed:>12.0f} {elapsed:>8.2f}")
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rate", type=int, default=50_000)
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--processes", type=int, default=2)
+    args = ap.parse_args(argv)
+
+    corpus = make_corpus(20_000)
+    print(f"{'mode':>13} {'app ops/s':>12} {'events/s':>12} {'wall s':>8}")
+    for mode in ("baseline", "in-thread", "process-pool"):
+        _run(mode, rate=args.rate, seconds=args.seconds, processes=args.processes, corpus=corpus)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Producer-side cost per event of QueueingPublisher hand-off.
+
+Compares the bulk deque hand-off against the previous design (one
+`queue.Queue.put()` per event) with 8/32/128 application threads each
+committing transactions of `--txn-size` events.
+
+Usage:
+  PYTHONPATH=src python scripts/bench_queueing_publisher.py
+  PYTHONPATH=src python scripts/bench_queueing_publisher.py --threads 8,32 --txn-size 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import queue
+import sys
+import threading
+import time
+from typing import Any, Callable, List
+
+from _bench_corpus import make_corpus
+
+from mysql_interceptor.config.settings import Settings
+from mysql_interceptor.kafka.batching import QueueingPublisher
+
+
+class _NullPublisher:
+    def publish(self, event: Any) -> None:
+        pass
+
+    def publish_batch(self, events: List[Any]) -> None:
+        pass
+
+    def flush(self, timeout: Any = None) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _PerEventQueue:
+    """The previous hand-off: queue.Queue with one put per event and one get per event."""
+
+    def __init__(self, maxsize: int) -> None:
+        self._q: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def publish_batch(self, events: List[Any]) -> None:
+        for e in events:
+            self._q.put(e)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._q.get(timeout=0.05)
+            except queue.Empty:
+                continue
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def _run_threads(publish_batch: Callable[[List[Any]], None], threads: int, txns: int, txn: List[Any]) -> float:
+    """Return producer-side nanoseconds per event (sum of thread time / events)."""
+    per_thread_ns: List[int] = []
+    barrier = threading.Barrier(threads)
+    lock = threading.Lock()
+
+    def worker() -> None:
+        barrier.wait()
+        t0 = time.perf_counter_ns()
+        for _ in range(txns):
+            publish_batch(txn)
+        dt = time.perf_counter_ns() - t0
+        with lock:
+            per_thread_ns.append(dt)
+
+    ts = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    return sum(per_thread_ns) / (threads * txns * len(txn))
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", default="8,32,128")
+    ap.add_argument("--events-per-thread", type=int, default=20_000)
+    ap.add_argument("--txn-size", type=int, default=20)
+    args = ap.parse_args(argv)
+
+    txn = make_corpus(args.txn_size)
+    txns = max(1, args.events_per_thread // args.txn_size)
+    maxsize = 100_000
+
+    print(f"{'threads':>8} {'queue.Queue ns/evt':>20} {'bulk deque ns/evt':>18} {'speedup':>8}")
+    for threads in [int(t) for t in args.threads.split(",") if t]:
+        legacy = _PerEventQueue(maxsize)
+        legacy_ns = _run_threads(legacy.publish_batch, threads, txns, txn)
+        legacy.close()
+
+        pub = QueueingPublisher(inner=_NullPublisher(), settings=Settings(publish_queue_maxsize=maxsize))
+        bulk_ns = _run_threads(pub.publish_batch, threads, txns, txn)
+        pub.close()
+
+        print(f"{threads:>8} {legacy_ns:>20.0f} {bulk_ns:>18.0f} {legacy_ns / bulk_ns:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Encode cost and bytes per event: JSON vs the binary wire format.
+
+Encodes the synthetic corpus with each serializer and reports the encode
+time per event, bytes per event, and bytes per event after zlib over
+batches of `--batch` events (the broker-side size with compression.type
+enabled). The binary records use a throwaway file schema registry.
+
+Usage:
+  PYTHONPATH=src python scripts/bench_wire_format.py
+  PYTHONPATH=src python scripts/bench_wire_format.py --events 200000 --batch 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+import zlib
+from typing import Any, Callable, List
+
+from _bench_corpus import make_corpus
+
+from mysql_interceptor.kafka.schema_registry import FileSchemaRegistry
+from mysql_interceptor.kafka.serializers import BinaryDecoder, BinarySerializer, JsonSerializer
+
+
+def _measure(name: str, encode: Callable[[Any], bytes], events: List[Any], batch: int) -> List[bytes]:
+    encode(events[0])  # registers the schema outside the timed loop
+    t0 = time.perf_counter()
+    values = [encode(e) for e in events]
+    elapsed = time.perf_counter() - t0
+    raw = sum(len(v) for v in values)
+    packed = sum(len(zlib.compress(b"".join(values[i : i + batch]), 6)) for i in range(0, len(values), batch))
+    n = len(events)
+    print(f"{name:<8} {elapsed / n * 1e6:>10.2f} {raw / n:>10.1f} {packed / n:>12.1f}")
+    return values
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=50_000)
+    ap.add_argument("--batch", type=int, default=1000, help="events per compressed batch")
+    args = ap.parse_args(argv)
+
+    events = make_corpus(args.events)
+    with tempfile.TemporaryDirectory() as registry_dir:
+        print(f"{args.events} events")
+        print(f"{'format':<8} {'us/event':>10} {'B/event':>10} {'zlib B/ev':>12}")
+        _measure("json", JsonSerializer(), events, args.batch)
+        binary = _measure("binary", BinarySerializer(FileSchemaRegistry(registry_dir)), events, args.batch)
+
+        decoder = BinaryDecoder(FileSchemaRegistry(registry_dir))
+        t0 = time.perf_counter()
+        for v in binary:
+            decoder.decode(v)
+        print(f"binary decode: {(time.perf_counter() - t0) / len(binary) * 1e6:.2f} us/event")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main(sys.argv[1:]))
@@ -13,7 +13,9 @@ Usage:
 
 Notes:
 - Requires `confluent-kafka` installed in the active environment.
-- Prints one JSON object per line (Kafka record value payload).
+- Prints one JSON object per line: one per event, also when the producer packs
+  several events per Kafka record (INTERCEPTOR_ENVELOPE_FORMAT).
+- Run with PYTHONPATH=src (or the package installed) for the envelope unpacker.
 """
 
 from __future__ import annotations
@@ -26,6 +28,10 @@ from typing import Any, Dict, Iterable, List, Optional
 
 from confluent_kafka import Consumer, KafkaException, admin
 
+from mysql_interceptor.kafka.envelope import iter_events
+from mysql_interceptor.kafka.schema_registry import FileSchemaRegistry
+from mysql_interceptor.kafka.serializers import BinaryDecoder
+
 
 DEFAULT_TOPIC = "MYSQL_EVENTS"
 
@@ -43,6 +49,7 @@ def iter_messages(
     pattern: Optional[str],
     timeout_s: float,
     max_messages: int,
+    decoder: Optional[BinaryDecoder] = None,
 ) -> Iterable[Dict[str, Any]]:
     cfg = {
         "bootstrap.servers": bootstrap,
@@ -68,11 +75,12 @@ def iter_messages(
             if msg.error():
                 continue
             try:
-                obj = json.loads(msg.value().decode("utf-8"))
+                events = list(iter_events(msg.value(), decoder))
             except Exception:
                 continue
-            yielded += 1
-            yield obj
+            for obj in events:
+                yielded += 1
+                yield obj
     finally:
         try:
             c.close()
@@ -89,6 +97,11 @@ def main(argv: List[str]) -> int:
     ap.add_argument("--max-messages", type=int, default=100000)
     ap.add_argument("--list-topics", action="store_true")
     ap.add_argument("--debug", default=None, help="Filter by message debug field (exact match).")
+    ap.add_argument(
+        "--schema-registry-dir",
+        default=None,
+        help="Decode binary records (INTERCEPTOR_WIRE_FORMAT=binary) with this file schema registry.",
+    )
     args = ap.parse_args(argv)
 
     if args.list_topics:
@@ -102,6 +115,7 @@ def main(argv: List[str]) -> int:
         pattern=args.pattern,
         timeout_s=args.timeout_s,
         max_messages=args.max_messages,
+        decoder=BinaryDecoder(FileSchemaRegistry(args.schema_registry_dir)) if args.schema_registry_dir else None,
     ):
         if args.debug is not None and obj.get("debug") != args.debug:
             continue
@@ -0,0 +1,167 @@
+"""Host-local aggregator: one Kafka producer for every interceptor process on the host.
+
+Processes configured with ``INTERCEPTOR_SIDECAR_SOCKET`` ship serialized
+events over that Unix domain socket (``kafka.sidecar.SidecarPublisher``); the
+aggregator hands them to a single sink built from the usual
+``INTERCEPTOR_KAFKA_*`` settings, so batches are large and the host keeps
+one set of broker connections.
+
+Usage:
+  mysql-interceptor-aggregator --socket /run/mysql-interceptor.sock
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from dataclasses import replace
+from typing import Any, List, Optional
+
+from .config.settings import Settings
+from .kafka.sidecar import Frame, FrameReader
+
+logger = logging.getLogger(__name__)
+
+
+class Aggregator:
+    """Accept sidecar connections on ``path`` and forward their frames to ``sink``.
+
+    ``sink`` needs ``publish_serialized(values, *, key=...)``, ``flush()`` and
+    ``close()`` (the confluent-kafka publisher, or any stand-in). One thread
+    per client connection; consecutive frames with the same key go to the
+    sink in one call, in arrival order.
+    """
+
+    def __init__(self, path: str, sink: Any, *, recv_bytes: int = 1 << 20) -> None:
+        self._path = path
+        self._sink = sink
+        self._recv_bytes = recv_bytes
+        self._server: Optional[socket.socket] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.frames = 0
+
+    def start(self) -> None:
+        """Bind the socket and accept clients in a background thread."""
+        if os.path.exists(self._path):
+            os.unlink(self._path)  # left over from a previous run
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self._path)
+        server.listen(128)
+        server.settimeout(0.5)
+        self._server = server
+        t = threading.Thread(target=self._accept_loop, name="mysql-interceptor-aggregator", daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def serve_forever(self) -> None:
+        self.start()
+        self._stop.wait()
+
+    def request_stop(self) -> None:
+        """Make ``serve_forever()`` return (safe from a signal handler)."""
+        self._stop.set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop accepting, wait for client threads, then flush and close the sink, within ``timeout`` in all."""
+        deadline = time.monotonic() + timeout
+        self._stop.set()
+        for t in list(self._threads):
+            t.join(max(0.0, deadline - time.monotonic()))
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            try:
+                os.unlink(self._path)
+            except OSError:
+                pass
+        if self._sink.flush(max(0.0, deadline - time.monotonic())) is False:
+            logger.warning("Aggregator sink did not deliver everything within %.1fs", timeout)
+        self._sink.close()
+
+    def _accept_loop(self) -> None:
+        assert self._server is not None
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                if not self._stop.is_set():
+                    logger.exception("Aggregator accept failed")
+                return
+            conn.settimeout(0.5)
+            t = threading.Thread(target=self._serve, args=(conn,), name="mysql-interceptor-aggregator-client", daemon=True)
+            with self._lock:
+                self.connections += 1
+                self._threads = [x for x in self._threads if x.is_alive()]
+                self._threads.append(t)
+            t.start()
+
+    def _serve(self, conn: socket.socket) -> None:
+        reader = FrameReader()
+        with conn:
+            while not self._stop.is_set():
+                try:
+                    data = conn.recv(self._recv_bytes)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    return
+                if not data:
+                    return
+                frames = reader.feed(data)
+                if frames:
+                    self._forward(frames)
+
+    def _forward(self, frames: List[Frame]) -> None:
+        start = 0
+        n = len(frames)
+        while start < n:
+            key = frames[start][0]
+            end = start + 1
+            while end < n and frames[end][0] == key:
+                end += 1
+            try:
+                self._sink.publish_serialized([v for _, v in frames[start:end]], key=key)
+            except Exception:
+                logger.exception("Aggregator sink failed")
+            start = end
+        with self._lock:
+            self.frames += n
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .connect import _build_kafka_sink, _with_envelopes
+
+    settings = Settings.from_env()
+    ap = argparse.ArgumentParser(prog="mysql-interceptor-aggregator", description=__doc__.split("\n\n")[0])
+    ap.add_argument("--socket", default=settings.sidecar_socket, help="Unix socket path (INTERCEPTOR_SIDECAR_SOCKET)")
+    args = ap.parse_args(argv)
+    if not args.socket:
+        ap.error("--socket or INTERCEPTOR_SIDECAR_SOCKET is required")
+    logging.basicConfig(level=logging.INFO)
+
+    # The aggregator is the one process that talks to Kafka itself.
+    sink = _with_envelopes(settings, _build_kafka_sink(replace(settings, sidecar_socket=None)))
+    agg = Aggregator(args.socket, sink)
+    signal.signal(signal.SIGTERM, lambda *_: agg.request_stop())
+    logger.info("Aggregating interceptor events from %s", args.socket)
+    try:
+        agg.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        agg.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
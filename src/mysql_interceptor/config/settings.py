@@ -37,6 +37,15 @@ def _env_float(name: str, default: float) -> float:
         return default
 
 
+def _env_prefixed(prefix: str) -> List[str]:
+    """``PREFIX_FOO_BAR=v`` env vars as sorted ``foo.bar=v`` entries."""
+    out = []
+    for name, v in os.environ.items():
+        if name.startswith(prefix) and len(name) > len(prefix) and v != "":
+            out.append(f"{name[len(prefix):].lower().replace('_', '.')}={v}")
+    return sorted(out)
+
+
 def _env_csv(name: str, default: List[str]) -> List[str]:
     v = _env(name)
     if v is None:
@@ -49,7 +58,7 @@ def _env_csv(name: str, default: List[str]) -> List[str]:
 class EnvSpec:
     env: str
     field: str
-    kind: str  # "opt_str" | "str" | "bool" | "int" | "float" | "csv"
+    kind: str  # "opt_str" | "str" | "bool" | "int" | "float" | "csv" | "prefix"
 
 
 def _coerce_env(spec: EnvSpec, *, default: object) -> object:
@@ -69,6 +78,8 @@ def _coerce_env(spec: EnvSpec, *, default: object) -> object:
         if not isinstance(default, list):
             return default
         return _env_csv(spec.env, default)
+    if spec.kind == "prefix":
+        return _env_prefixed(spec.env) or default
     return default
 
 
@@ -85,13 +96,44 @@ class Settings:
     kafka_batch_size: int = 16384
     kafka_buffer_memory: int = 33_554_432
     kafka_adaptive_partitioning_enabled: bool = True
+    kafka_profile: Optional[str] = None  # "low-latency" | "balanced" | "max-throughput" (confluent-kafka)
+    kafka_conf: List[str] = field(default_factory=list)  # "librdkafka.key=value" overrides, applied last
+    kafka_produce_timeout_s: float = 1.0  # how long a batch retries on a full producer queue before dropping
+    wire_format: str = "json"  # "json" | "binary" (varint records with a schema id header)
+    schema_registry_dir: Optional[str] = None  # file-based schema registry for the binary format
+    json_backend: Optional[str] = None  # "auto" | "orjson" | "msgspec" | "python" | "stdlib"; same bytes
+    envelope_format: Optional[str] = None  # "ndjson" | "length-prefixed": many events per Kafka record
+    envelope_max_bytes: int = 262_144
+    envelope_max_delay_s: float = 0.1
+    envelope_txn_boundaries: bool = False  # also close an envelope at every transaction end
+    session_records: bool = False  # "session" record per connection state + slim "stmt" records
+    session_refresh_s: float = 300.0  # repeat a connection's session record this often
+    kafka_async_bootstrap: bool = False  # build the producer and warm metadata on a background thread
+    bootstrap_max_pending: int = 10_000  # events held until the producer is ready
+    bootstrap_warmup_timeout_s: float = 10.0
+    spill_dir: Optional[str] = None  # spill to disk (and replay) when the producer is saturated or failing
+    spill_max_bytes: int = 1_073_741_824
+    sidecar_socket: Optional[str] = None  # ship to a host-local aggregator instead of Kafka
+    circuit_breaker: bool = False  # stop capturing while the sink keeps failing
+    circuit_failure_threshold: int = 5  # consecutive failures that open the breaker
+    circuit_reset_timeout_s: float = 5.0  # open -> half-open probe interval
 
     # Capture policy
     buffer_until_commit: bool = True
+    preserialize_txn_buffer: bool = False  # serialize at add() time into a per-transaction arena
+    txn_buffer_max_bytes: int = 0  # > 0: drop buffered events past this many (estimated) bytes per transaction
     capture_all: bool = True  # if false, logs USE and writes (+ optional ddl/callproc)
     capture_ddl: bool = True
     capture_callproc: bool = True
 
+    # Rate limiting: "service:schema:kind=rate[/burst]" token buckets, "*" wildcards
+    rate_limits: List[str] = field(default_factory=list)
+    rate_limit_summary_interval_s: float = 10.0  # how often suppressed counts are published
+
+    # Transaction summaries
+    emit_txn_summary: bool = False  # one "txnSummary" record per commit/rollback
+    txn_summary_only: bool = False  # emit summaries instead of per-statement records
+
     # Payload toggles
     include_sql: bool = True
     include_params: bool = True
@@ -104,9 +146,22 @@ class Settings:
     # Async publishing
     enable_queueing_publisher: bool = False
     publish_queue_maxsize: int = 10_000
+    publish_queue_max_bytes: int = 0  # > 0: also bound the queue by estimated payload bytes
+    priority_lanes: bool = False  # queue reads separately; writes/DDL/errors go first and are shed last
+    publish_read_queue_maxsize: int = 10_000  # read lane capacity when priority_lanes is on
+    degrade_under_load: bool = False  # shed payload, then reads, then writes as the queue fills
+    degrade_params_at: float = 0.5  # queue fill fractions for each step of the ladder
+    degrade_sql_at: float = 0.7
+    degrade_reads_at: float = 0.85
+    degrade_writes_at: float = 0.95
     publish_batch_size: int = 500
     publish_flush_interval_s: float = 0.5
+    publish_workers: int = 1  # worker threads; events are sharded by connectionId
+    thread_staging: bool = False  # per-thread lock-free staging queues merged by the workers
+    deferred_capture: bool = False  # request thread only enqueues raw references (needs queueing publisher)
+    serializer_processes: int = 0  # > 0: JSON-encode batches in this many worker processes
     backpressure: str = "block"  # "block" | "drop"
+    shutdown_flush_timeout_s: float = 5.0  # atexit: how long shared publishers may take to deliver
 
     # Java-compatible debug knobs
     statement_logging_allowed: bool = True  # DEBUGQUERYINTERCEPTOR_STATEMENTLOGGING
@@ -115,6 +170,14 @@ class Settings:
 
     service_name: str = "unknown-service"
 
+    def __post_init__(self) -> None:
+        ladder = (self.degrade_params_at, self.degrade_sql_at, self.degrade_reads_at, self.degrade_writes_at)
+        if self.degrade_under_load and any(a > b for a, b in zip(ladder, ladder[1:])):
+            raise ValueError(
+                "degrade_params_at <= degrade_sql_at <= degrade_reads_at <= degrade_writes_at is required, got %s"
+                % ", ".join(str(t) for t in ladder)
+            )
+
     @classmethod
     def from_env(cls) -> "Settings":
         base = cls()
@@ -134,13 +197,44 @@ ENV_SPECS: List[EnvSpec] = [
     EnvSpec("INTERCEPTOR_KAFKA_BATCH_SIZE", "kafka_batch_size", "int"),
     EnvSpec("INTERCEPTOR_KAFKA_BUFFER_MEMORY", "kafka_buffer_memory", "int"),
     EnvSpec("INTERCEPTOR_KAFKA_ADAPTIVE_PARTITIONING_ENABLED", "kafka_adaptive_partitioning_enabled", "bool"),
+    EnvSpec("INTERCEPTOR_KAFKA_PROFILE", "kafka_profile", "opt_str"),
+    EnvSpec("INTERCEPTOR_KAFKA_CONF_", "kafka_conf", "prefix"),
+    EnvSpec("INTERCEPTOR_KAFKA_PRODUCE_TIMEOUT_S", "kafka_produce_timeout_s", "float"),
+    EnvSpec("INTERCEPTOR_WIRE_FORMAT", "wire_format", "str"),
+    EnvSpec("INTERCEPTOR_SCHEMA_REGISTRY_DIR", "schema_registry_dir", "opt_str"),
+    EnvSpec("INTERCEPTOR_JSON_BACKEND", "json_backend", "opt_str"),
+    EnvSpec("INTERCEPTOR_ENVELOPE_FORMAT", "envelope_format", "opt_str"),
+    EnvSpec("INTERCEPTOR_ENVELOPE_MAX_BYTES", "envelope_max_bytes", "int"),
+    EnvSpec("INTERCEPTOR_ENVELOPE_MAX_DELAY_S", "envelope_max_delay_s", "float"),
+    EnvSpec("INTERCEPTOR_ENVELOPE_TXN_BOUNDARIES", "envelope_txn_boundaries", "bool"),
+    EnvSpec("INTERCEPTOR_SESSION_RECORDS", "session_records", "bool"),
+    EnvSpec("INTERCEPTOR_SESSION_REFRESH_S", "session_refresh_s", "float"),
+    EnvSpec("INTERCEPTOR_KAFKA_ASYNC_BOOTSTRAP", "kafka_async_bootstrap", "bool"),
+    EnvSpec("INTERCEPTOR_BOOTSTRAP_MAX_PENDING", "bootstrap_max_pending", "int"),
+    EnvSpec("INTERCEPTOR_BOOTSTRAP_WARMUP_TIMEOUT_S", "bootstrap_warmup_timeout_s", "float"),
+    EnvSpec("INTERCEPTOR_SPILL_DIR", "spill_dir", "opt_str"),
+    EnvSpec("INTERCEPTOR_SPILL_MAX_BYTES", "spill_max_bytes", "int"),
+    EnvSpec("INTERCEPTOR_SIDECAR_SOCKET", "sidecar_socket", "opt_str"),
+    EnvSpec("INTERCEPTOR_CIRCUIT_BREAKER", "circuit_breaker", "bool"),
+    EnvSpec("INTERCEPTOR_CIRCUIT_FAILURE_THRESHOLD", "circuit_failure_threshold", "int"),
+    EnvSpec("INTERCEPTOR_CIRCUIT_RESET_TIMEOUT_S", "circuit_reset_timeout_s", "float"),
 
     # Capture policy
     EnvSpec("INTERCEPTOR_BUFFER_UNTIL_COMMIT", "buffer_until_commit", "bool"),
+    EnvSpec("INTERCEPTOR_PRESERIALIZE_TXN_BUFFER", "preserialize_txn_buffer", "bool"),
+    EnvSpec("INTERCEPTOR_TXN_BUFFER_MAX_BYTES", "txn_buffer_max_bytes", "int"),
     EnvSpec("INTERCEPTOR_CAPTURE_ALL", "capture_all", "bool"),
     EnvSpec("INTERCEPTOR_CAPTURE_DDL", "capture_ddl", "bool"),
     EnvSpec("INTERCEPTOR_CAPTURE_CALLPROC", "capture_callproc", "bool"),
 
+    # Rate limiting
+    EnvSpec("INTERCEPTOR_RATE_LIMITS", "rate_limits", "csv"),
+    EnvSpec("INTERCEPTOR_RATE_LIMIT_SUMMARY_INTERVAL_S", "rate_limit_summary_interval_s", "float"),
+
+    # Transaction summaries
+    EnvSpec("INTERCEPTOR_EMIT_TXN_SUMMARY", "emit_txn_summary", "bool"),
+    EnvSpec("INTERCEPTOR_TXN_SUMMARY_ONLY", "txn_summary_only", "bool"),
+
     # Payload toggles
     EnvSpec("INTERCEPTOR_INCLUDE_SQL", "include_sql", "bool"),
     EnvSpec("INTERCEPTOR_INCLUDE_PARAMS", "include_params", "bool"),
@@ -153,9 +247,22 @@ ENV_SPECS: List[EnvSpec] = [
     # Async publishing
     EnvSpec("INTERCEPTOR_ENABLE_QUEUEING_PUBLISHER", "enable_queueing_publisher", "bool"),
     EnvSpec("INTERCEPTOR_PUBLISH_QUEUE_MAXSIZE", "publish_queue_maxsize", "int"),
+    EnvSpec("INTERCEPTOR_PUBLISH_QUEUE_MAX_BYTES", "publish_queue_max_bytes", "int"),
+    EnvSpec("INTERCEPTOR_PRIORITY_LANES", "priority_lanes", "bool"),
+    EnvSpec("INTERCEPTOR_PUBLISH_READ_QUEUE_MAXSIZE", "publish_read_queue_maxsize", "int"),
+    EnvSpec("INTERCEPTOR_DEGRADE_UNDER_LOAD", "degrade_under_load", "bool"),
+    EnvSpec("INTERCEPTOR_DEGRADE_PARAMS_AT", "degrade_params_at", "float"),
+    EnvSpec("INTERCEPTOR_DEGRADE_SQL_AT", "degrade_sql_at", "float"),
+    EnvSpec("INTERCEPTOR_DEGRADE_READS_AT", "degrade_reads_at", "float"),
+    EnvSpec("INTERCEPTOR_DEGRADE_WRITES_AT", "degrade_writes_at", "float"),
     EnvSpec("INTERCEPTOR_PUBLISH_BATCH_SIZE", "publish_batch_size", "int"),
     EnvSpec("INTERCEPTOR_PUBLISH_FLUSH_INTERVAL_S", "publish_flush_interval_s", "float"),
+    EnvSpec("INTERCEPTOR_PUBLISH_WORKERS", "publish_workers", "int"),
+    EnvSpec("INTERCEPTOR_THREAD_STAGING", "thread_staging", "bool"),
+    EnvSpec("INTERCEPTOR_DEFERRED_CAPTURE", "deferred_capture", "bool"),
+    EnvSpec("INTERCEPTOR_SERIALIZER_PROCESSES", "serializer_processes", "int"),
     EnvSpec("INTERCEPTOR_BACKPRESSURE", "backpressure", "str"),
+    EnvSpec("INTERCEPTOR_SHUTDOWN_FLUSH_TIMEOUT_S", "shutdown_flush_timeout_s", "float"),
 
     # Java-compatible debug knobs
     EnvSpec("DEBUGQUERYINTERCEPTOR_STATEMENTLOGGING", "statement_logging_allowed", "bool"),
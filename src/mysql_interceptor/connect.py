@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional
 
 from .config.settings import Settings
 from .dbapi.wrappers import ConnectionWrapper
 from .adapters.registry import get_adapter_with_defaults
 from .kafka.batching import QueueingPublisher
+from .kafka.circuit import CircuitBreaker
 from .kafka.publisher import Publisher, StdoutPublisher
+from .kafka.registry import SHARED_PUBLISHERS
+from .kafka.serializers import JsonSerializer, Serializer, build_serializer
 
 logger = logging.getLogger(__name__)
 
@@ -19,12 +22,111 @@ def _get_adapter(driver: str):
 
 
 def _build_default_kafka_publisher(settings: Settings) -> Publisher:
+    circuit = _build_circuit(settings)
+    serializer = _build_serializer(settings)
+    if settings.kafka_async_bootstrap:
+        from .kafka.bootstrap import BootstrappingPublisher
+        return BootstrappingPublisher(
+            lambda decisions: _build_sink_stage(settings, circuit, decisions, serializer=serializer),
+            max_pending=settings.bootstrap_max_pending,
+            warmup_timeout_s=settings.bootstrap_warmup_timeout_s,
+            circuit=circuit,
+            serializer=serializer,
+        )
+    return _build_sink_stage(settings, circuit, None, serializer=serializer)
+
+
+def _build_sink_stage(
+    settings: Settings,
+    circuit: Optional[CircuitBreaker],
+    decisions: Optional[List[Dict[str, str]]],
+    *,
+    serializer: Optional[Serializer] = None,
+) -> Publisher:
+    if serializer is None:
+        serializer = _build_serializer(settings)
+    publisher = _build_kafka_sink(settings, circuit=circuit, decisions=decisions, serializer=serializer)
+    if not settings.sidecar_socket:
+        publisher = _with_envelopes(settings, publisher, serializer)  # else the aggregator packs them
+    if settings.serializer_processes > 0 and not isinstance(serializer, JsonSerializer):
+        logger.warning("Serializer processes only produce JSON; ignoring them for the %s wire format", serializer.name)
+    elif settings.serializer_processes > 0 and callable(getattr(publisher, "publish_serialized", None)):
+        from .kafka.process_pool import ProcessPoolSerializingPublisher
+        publisher = ProcessPoolSerializingPublisher(
+            inner=publisher, processes=settings.serializer_processes, json_backend=getattr(serializer, "backend", None)
+        )
+    if settings.session_records:
+        from .kafka.sessions import SessionRecordPublisher
+        publisher = SessionRecordPublisher(inner=publisher, refresh_s=settings.session_refresh_s)
+    return publisher
+
+
+def _build_serializer(settings: Settings) -> Serializer:
+    try:
+        return build_serializer(settings.wire_format, settings.schema_registry_dir, settings.json_backend)
+    except Exception as e:
+        logger.warning("Falling back to the JSON wire format: %s", e)
+        return JsonSerializer()
+
+
+def _with_envelopes(settings: Settings, publisher: Publisher, serializer: Optional[Serializer] = None) -> Publisher:
+    if not settings.envelope_format:
+        return publisher
+    from .kafka.envelope import LENGTH_PREFIXED, NDJSON, EnvelopePublisher
+    fmt = settings.envelope_format.strip().lower()
+    if serializer is None:
+        serializer = _build_serializer(settings)
+    if fmt == NDJSON and not isinstance(serializer, JsonSerializer):
+        logger.warning("NDJSON envelopes need the JSON wire format; using length-prefixed envelopes")
+        fmt = LENGTH_PREFIXED
+    try:
+        return EnvelopePublisher(
+            inner=publisher,
+            fmt=fmt,
+            max_bytes=settings.envelope_max_bytes,
+            max_delay_s=settings.envelope_max_delay_s,
+            txn_boundaries=settings.envelope_txn_boundaries,
+            serializer=serializer,
+        )
+    except Exception as e:
+        logger.warning("Envelope packing disabled: %s", e)
+        return publisher
+
+
+def _build_circuit(settings: Settings) -> Optional[CircuitBreaker]:
+    if not settings.circuit_breaker:
+        return None
+    return CircuitBreaker(
+        failure_threshold=settings.circuit_failure_threshold,
+        reset_timeout_s=settings.circuit_reset_timeout_s,
+        service=settings.service_name,
+    )
+
+
+def _build_kafka_sink(
+    settings: Settings,
+    *,
+    circuit: Optional[CircuitBreaker] = None,
+    decisions: Optional[List[Dict[str, str]]] = None,
+    serializer: Optional[Serializer] = None,
+) -> Publisher:
+    """First sink that can be built; every candidate tried is recorded in ``decisions``."""
+    if decisions is None:
+        decisions = []
+    if serializer is None:
+        serializer = _build_serializer(settings)
+    if settings.sidecar_socket:
+        from .kafka.sidecar import SidecarPublisher
+        decisions.append({"sink": "sidecar", "outcome": "ok"})
+        return SidecarPublisher(settings.sidecar_socket, serializer=serializer)
+
     if not settings.kafka_bootstrap_servers:
-        return StdoutPublisher()
+        decisions.append({"sink": "stdout", "outcome": "ok: no bootstrap servers configured"})
+        return _stdout_publisher(serializer)
 
     try:
         from .kafka.confluent import ConfluentKafkaPublisher
-        return ConfluentKafkaPublisher(
+        publisher: Publisher = ConfluentKafkaPublisher(
             bootstrap_servers=settings.kafka_bootstrap_servers,
             topic=settings.kafka_topic,
             acks=settings.kafka_acks,
@@ -33,14 +135,24 @@ def _build_default_kafka_publisher(settings: Settings) -> Publisher:
             batch_size=settings.kafka_batch_size,
             buffer_memory=settings.kafka_buffer_memory,
             adaptive_partitioning_enabled=settings.kafka_adaptive_partitioning_enabled,
+            profile=settings.kafka_profile,
+            extra_conf=settings.kafka_conf,
+            spill_dir=settings.spill_dir,
+            spill_max_bytes=settings.spill_max_bytes,
+            circuit=circuit,
+            produce_timeout_s=settings.kafka_produce_timeout_s,
+            serializer=serializer,
+            close_timeout_s=settings.shutdown_flush_timeout_s,
         )
-    except Exception:
-        logger.debug("Failed to initialize ConfluentKafkaPublisher", exc_info=True)
-        pass
+        decisions.append({"sink": "confluent-kafka", "outcome": "ok"})
+        return publisher
+    except Exception as e:
+        logger.warning("Failed to initialize ConfluentKafkaPublisher: %r", e, exc_info=True)
+        decisions.append({"sink": "confluent-kafka", "outcome": f"error: {e!r}"})
 
     try:
         from .kafka.kafka_python import KafkaPythonPublisher
-        return KafkaPythonPublisher(
+        publisher = KafkaPythonPublisher(
             bootstrap_servers=settings.kafka_bootstrap_servers,
             topic=settings.kafka_topic,
             acks=settings.kafka_acks,
@@ -48,13 +160,34 @@ def _build_default_kafka_publisher(settings: Settings) -> Publisher:
             linger_ms=settings.kafka_linger_ms,
             batch_size=settings.kafka_batch_size,
             buffer_memory=settings.kafka_buffer_memory,
+            serializer=serializer,
         )
-    except Exception:
-        logger.debug("Failed to initialize KafkaPythonPublisher", exc_info=True)
-        pass
+        decisions.append({"sink": "kafka-python", "outcome": "ok"})
+        return publisher
+    except Exception as e:
+        logger.warning("Failed to initialize KafkaPythonPublisher: %r", e, exc_info=True)
+        decisions.append({"sink": "kafka-python", "outcome": f"error: {e!r}"})
 
     logger.warning("No Kafka publisher available, falling back to StdoutPublisher")
-    return StdoutPublisher()
+    decisions.append({"sink": "stdout", "outcome": "ok: fallback"})
+    return _stdout_publisher(serializer)
+
+
+def _stdout_publisher(serializer: Serializer) -> Publisher:
+    # Stdout prints text: keep the JSON backend choice, but never print binary records.
+    return StdoutPublisher(serializer=serializer if isinstance(serializer, JsonSerializer) else None)
+
+
+def _build_publisher_stack(settings: Settings) -> Publisher:
+    publisher = _build_default_kafka_publisher(settings)
+    if settings.enable_queueing_publisher:
+        publisher = QueueingPublisher(inner=publisher, settings=settings)
+    return publisher
+
+
+def get_shared_publisher(settings: Settings) -> Publisher:
+    """The process-wide publisher stack for these settings; it lives as long as the process."""
+    return SHARED_PUBLISHERS.get(settings, _build_publisher_stack)
 
 
 def connect(
@@ -69,10 +202,16 @@ def connect(
     conn = adapter.connect(**connect_kwargs)
 
     if publisher is None:
-        publisher = _build_default_kafka_publisher(settings)
-
-    if settings.enable_queueing_publisher:
+        # One producer (and queue) per distinct publisher settings for the whole process, not per connection.
+        publisher = get_shared_publisher(settings)
+    elif settings.enable_queueing_publisher:
         publisher = QueueingPublisher(inner=publisher, settings=settings)
 
     db_name = adapter.database_name(conn, connect_kwargs)
-    return ConnectionWrapper(conn=conn, publisher=publisher, settings=settings, driver_name=driver, database=db_name)
+    return ConnectionWrapper(
+        conn=conn,
+        publisher=publisher,
+        settings=settings,
+        driver_name=driver,
+        database=db_name,
+    )
@@ -1,14 +1,19 @@
 from __future__ import annotations
 
+import hashlib
 import re
+from functools import lru_cache
 from typing import Optional
 
 _WRITE = {"insert", "update", "delete", "replace"}
 _DDL = {"create", "alter", "drop", "truncate", "rename"}
 _CALL = {"call"}
+_READ = {"select", "show", "describe", "desc", "explain"}
 
 _LEADING_COMMENTS = re.compile(r"^\s*(?:--[^\n]*\n|#[^\n]*\n|/\*.*?\*/\s*)*", re.DOTALL)
 _FIRST_WORD = re.compile(r"^\s*([a-zA-Z]+)\b")
+_LITERALS = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|\b\d+(?:\.\d+)?\b|%\(\w+\)s|%s")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
 
 
 def _strip_leading_comments(sql: str) -> str:
@@ -35,6 +40,10 @@ def is_call(sql: str) -> bool:
     return statement_kind(sql) in _CALL
 
 
+def is_read(sql: str) -> bool:
+    return statement_kind(sql) in _READ
+
+
 def is_use(sql: str) -> bool:
     return statement_kind(sql) == "use"
 
@@ -52,3 +61,16 @@ def parse_use_db(sql: str) -> Optional[str]:
         return m.group(2) or m.group(3)
     except Exception:
         return None
+
+
+def normalize_sql(sql: str) -> str:
+    """Statement shape: literals and placeholders become ``?``, lists collapse, whitespace/case fold."""
+    s = _LITERALS.sub("?", _strip_leading_comments(sql))
+    s = _IN_LIST.sub("(?+)", s)
+    return " ".join(s.split()).lower()
+
+
+@lru_cache(maxsize=4096)
+def sql_fingerprint(sql: str) -> str:
+    """Short stable hash of ``normalize_sql(sql)``; equal for statements that differ only in values."""
+    return hashlib.blake2b(normalize_sql(sql).encode("utf-8"), digest_size=8).hexdigest()
@@ -16,3 +16,14 @@ PY_ERROR_SERVER_FLAGS = 1 << 28
 PY_ERROR_SERVER_VERSION = 1 << 29
 PY_ERROR_SERVER_HOST = 1 << 30
 PY_ERROR_SERVER_INFO = 1 << 31
+
+# Load-shedding markers (above the 32-bit Java range)
+PY_DEGRADED_PARAMS = 1 << 32
+PY_DEGRADED_SQL = 1 << 33
+
+# MySQL server status bits (serverFlags)
+SERVER_STATUS_IN_TRANS = 0x0001
+SERVER_STATUS_AUTOCOMMIT = 0x0002
+
+# Prefix of the `sql` value when the text was replaced by its fingerprint (PY_DEGRADED_SQL)
+FINGERPRINT_PREFIX = "fp:"
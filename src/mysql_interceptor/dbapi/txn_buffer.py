@@ -1,22 +1,116 @@
 from __future__ import annotations
 
+import logging
 from dataclasses import dataclass, field
-from typing import List
+from typing import Any, Callable, List, Optional
 
+from ..config.settings import Settings
 from ..events.models import SqlLogMessage
+from ..events.sizing import estimate_size
+
+logger = logging.getLogger(__name__)
+
+Serializer = Callable[[SqlLogMessage], bytes]
 
 
 @dataclass
 class TransactionBuffer:
+    """Events captured inside a transaction, held until commit/rollback.
+
+    With a ``serializer`` the buffer works as an arena: every event is
+    serialized at ``add()`` time and appended to one contiguous ``bytearray``
+    with an end-offset index. ``drain_serialized()`` hands out read-only
+    memoryviews over the arena (no copies), so commit only pays for produce
+    calls. Rollback just truncates the arena.
+
+    ``nbytes`` tracks the buffered payload size (the arena length, or the
+    estimated size of the held events; only estimated with ``max_bytes > 0``).
+    With ``max_bytes > 0`` events that would push the buffer past it are
+    dropped and counted in ``dropped``; the first drop of each transaction
+    logs a warning.
+    """
+
     events: List[SqlLogMessage] = field(default_factory=list)
+    serializer: Optional[Serializer] = None
+    max_bytes: int = 0
+    nbytes: int = 0
+    dropped: int = 0
+    _truncated: bool = field(default=False, repr=False)  # this transaction already dropped an event
+    _arena: bytearray = field(default_factory=bytearray, repr=False)
+    _offsets: List[int] = field(default_factory=list, repr=False)
+
+    @property
+    def preserialized(self) -> bool:
+        return self.serializer is not None
+
+    def __len__(self) -> int:
+        return len(self._offsets) if self.serializer is not None else len(self.events)
 
     def add(self, event: SqlLogMessage) -> None:
-        self.events.append(event)
+        if self.serializer is None:
+            if self.max_bytes > 0:
+                size = estimate_size(event)
+                if self.nbytes + size > self.max_bytes:
+                    self._drop(event)
+                    return
+                self.nbytes += size
+            self.events.append(event)
+            return
+        data = self.serializer(event)
+        if self.max_bytes > 0 and len(self._arena) + len(data) > self.max_bytes:
+            self._drop(event)
+            return
+        self._arena += data
+        self._offsets.append(len(self._arena))
+        self.nbytes = len(self._arena)
+
+    def _drop(self, event: SqlLogMessage) -> None:
+        self.dropped += 1
+        if not self._truncated:
+            self._truncated = True
+            logger.warning(
+                "Transaction buffer on connection %s reached %d bytes; dropping the rest of this transaction "
+                "(%d event(s) dropped so far)", getattr(event, "connectionId", None), self.max_bytes, self.dropped,
+            )
 
     def clear(self) -> None:
         self.events.clear()
+        self.nbytes = 0
+        self._truncated = False
+        # drain_serialized() swaps the arena out, so no views into the current
+        # one can exist and it is safe to truncate in place.
+        del self._arena[:]
+        self._offsets.clear()
 
     def drain(self) -> List[SqlLogMessage]:
         ev = list(self.events)
         self.events.clear()
+        self.nbytes = 0
+        self._truncated = False
         return ev
+
+    def drain_serialized(self) -> List[memoryview]:
+        arena, offsets = self._arena, self._offsets
+        self._arena = bytearray()
+        self._offsets = []
+        self.nbytes = 0
+        self._truncated = False
+        if not offsets:
+            return []
+        view = memoryview(arena).toreadonly()
+        out: List[memoryview] = []
+        start = 0
+        for end in offsets:
+            out.append(view[start:end])
+            start = end
+        return out
+
+
+def make_transaction_buffer(publisher: Any, settings: Settings) -> TransactionBuffer:
+    """Build a buffer, pre-serializing when enabled and the publisher supports it."""
+    serializer: Optional[Serializer] = None
+    # Session-record mode rewrites statements at publish time, so they cannot be serialized up front.
+    preserialize = settings.preserialize_txn_buffer and not settings.session_records
+    if preserialize and callable(getattr(publisher, "publish_serialized", None)):
+        serializer = getattr(publisher, "serialize", None)
+    return TransactionBuffer(serializer=serializer, max_bytes=settings.txn_buffer_max_bytes)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+from .constants import SERVER_STATUS_AUTOCOMMIT, SERVER_STATUS_IN_TRANS
+
+
+@dataclass
+class TransactionSpan:
+    """Running totals for the current transaction on one connection.
+
+    Fed by every executed statement (regardless of capture policy) and reset
+    on commit/rollback, when the owner turns it into a TxnSummaryMessage.
+    """
+
+    begin_ms: Optional[int] = None
+    first_write_ms: Optional[int] = None
+    statements: int = 0
+    writes: int = 0
+    errors: int = 0
+    db_time_ns: int = 0
+    rows_affected: int = 0
+
+    def begin(self, timestamp_ms: int) -> None:
+        if self.begin_ms is None:
+            self.begin_ms = timestamp_ms
+
+    def record(
+        self,
+        *,
+        timestamp_ms: int,
+        duration_ns: Optional[int],
+        write: bool,
+        update_count: Optional[int],
+        error: bool,
+        statements: int = 1,
+    ) -> None:
+        self.begin(timestamp_ms)
+        self.statements += statements
+        if duration_ns:
+            self.db_time_ns += duration_ns
+        if error:
+            self.errors += statements
+            return
+        if write:
+            self.writes += statements
+            if self.first_write_ms is None:
+                self.first_write_ms = timestamp_ms
+            if update_count is not None and update_count > 0:
+                self.rows_affected += update_count
+
+    def reset(self) -> None:
+        self.begin_ms = None
+        self.first_write_ms = None
+        self.statements = 0
+        self.writes = 0
+        self.errors = 0
+        self.db_time_ns = 0
+        self.rows_affected = 0
+
+
+def autocommitted(server_status: Optional[int]) -> bool:
+    """True when the status word after a statement shows it committed on its own (autocommit, no open transaction)."""
+    if server_status is None:
+        return False
+    return server_status & (SERVER_STATUS_AUTOCOMMIT | SERVER_STATUS_IN_TRANS) == SERVER_STATUS_AUTOCOMMIT
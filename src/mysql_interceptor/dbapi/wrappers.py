@@ -6,9 +6,11 @@ from typing import Any, List, Optional, Protocol, TypeVar, runtime_checkable
 
 from ..config.redaction import params_to_query_params
 from ..config.settings import Settings
-from ..dbapi.classify import is_call, is_ddl, is_use, is_write, parse_use_db
-from ..dbapi.txn_buffer import TransactionBuffer
-from ..events.models import SqlLogMessage
+from ..dbapi.classify import is_call, is_ddl, is_use, is_write, parse_use_db, statement_kind
+from ..dbapi.txn_buffer import make_transaction_buffer
+from ..dbapi.txn_span import TransactionSpan, autocommitted
+from ..events.deferred import RawStatement, SessionContext, capture_params
+from ..events.models import SqlLogMessage, TxnSummaryMessage
 from ..kafka.publisher import Publisher
 from ..utils import (
     _default_tz,
@@ -19,6 +21,7 @@ from ..utils import (
     hostname,
 )
 from ..pool_counter import GLOBAL_POOL_COUNTER
+from ..ratelimit import get_rate_limiter
 from .constants import (
     IVER8,
     PY_DRIVER_PYMYSQL,
@@ -58,15 +61,20 @@ TConn = TypeVar("TConn", bound=DBAPIConnection)
 
 
 class _RecordingParamsIterable:
-    def __init__(self, seq: Any, settings: Settings) -> None:
+    def __init__(self, seq: Any, settings: Settings, *, raw: bool = False) -> None:
         self._seq = seq
         self._settings = settings
-        self.recorded: List[Optional[List[str]]] = []
+        self._raw = raw  # deferred capture: keep the param sets, format them later
+        self.recorded: List[Any] = []
         self.iflags: int = 0
 
     def __iter__(self):
         try:
             for item in self._seq:
+                if self._raw:
+                    self.recorded.append(item)
+                    yield item
+                    continue
                 try:
                     self.recorded.append(params_to_query_params(item, self._settings))
                 except Exception:
@@ -116,7 +124,7 @@ class CursorWrapper:
 
     def executemany(self, operation: str, seq_of_params: Any) -> Any:
         operation = self._parent._maybe_apply_inline_debug(operation)
-        recorder = _RecordingParamsIterable(seq_of_params, self._parent._settings)
+        recorder = _RecordingParamsIterable(seq_of_params, self._parent._settings, raw=self._parent._deferred)
         t0 = time.perf_counter_ns()
         err: Optional[BaseException] = None
         try:
@@ -198,8 +206,15 @@ class ConnectionWrapper:
         self._db_name = database
         self._stmt_db_name = database
 
-        self._buffer = TransactionBuffer()
+        self._buffer = make_transaction_buffer(publisher, settings)
+        self._limiter = get_rate_limiter(settings)
+        if self._limiter is not None:
+            self._limiter.attach(publisher)
+        self._circuit = getattr(publisher, "circuit", None)
         self._execution_count = 0
+        self._span: Optional[TransactionSpan] = (
+            TransactionSpan() if (settings.emit_txn_summary or settings.txn_summary_only) else None
+        )
 
         self._client = hostname()
         self._user = _safe_str(getattr(conn, "user", None)) or _safe_str(getattr(conn, "_user", None))
@@ -215,6 +230,34 @@ class ConnectionWrapper:
 
         self._cached_server_flags: Optional[int] = None
 
+        # Deferred capture: the request thread only enqueues RawStatements and the
+        # queueing publisher's workers build the messages.
+        self._deferred = settings.deferred_capture and bool(getattr(publisher, "accepts_deferred", False))
+        self._session = SessionContext(
+            settings=settings,
+            serverHost=self._server_host,
+            serverVersion=self._server_version,
+            user=self._user,
+            client=self._client,
+            dbName=self._db_name,
+            connectionId=self._connection_id,
+            defaultTZ=self._default_tz,
+            serverTZ=self._server_tz,
+            isolationLvl=self._isolation_lvl,
+            clientFlags=self._client_flags,
+            base_iflags=(
+                IVER8
+                | PY_DRIVER_PYMYSQL
+                | self._server_host_iflags
+                | self._server_version_iflags
+                | self._default_tz_iflags
+                | self._server_tz_iflags
+                | self._isolation_iflags
+                | self._client_flags_iflags
+                | self._connid_iflags
+            ),
+        )
+
     def __getattr__(self, name: str) -> Any:
         return getattr(self._conn, name)
 
@@ -224,19 +267,24 @@ class ConnectionWrapper:
     def commit(self) -> Any:
         out = self._conn.commit()
         self._flush_on_commit()
+        self._emit_txn_summary("commit")
         return out
 
     def rollback(self) -> Any:
         out = self._conn.rollback()
         self._drop_on_rollback()
+        self._emit_txn_summary("rollback")
         return out
 
     def close(self) -> Any:
         if not self._settings.buffer_until_commit:
-            try:
-                self._publisher.flush()
-            except Exception:
-                pass
+            # Hand delivery to the publisher's background threads; never wait on Kafka here.
+            request_flush = getattr(self._publisher, "request_flush", None)
+            if request_flush is not None:
+                try:
+                    request_flush()
+                except Exception:
+                    pass
         try:
             GLOBAL_POOL_COUNTER.dec()
         except Exception:
@@ -280,6 +328,14 @@ class ConnectionWrapper:
             or force_call
         )
 
+    def _rate_limited(self, sql: str, n: int) -> bool:
+        limiter = self._limiter
+        assert limiter is not None
+        allowed = limiter.allow(self._stmt_db_name or self._db_name, statement_kind(sql), n)
+        for summary in limiter.pop_summaries():
+            self._publish_best_effort(summary)  # type: ignore[arg-type]
+        return not allowed
+
     def _track_stmt_db_name(self, sql: str) -> None:
         if not is_use(sql):
             return
@@ -303,8 +359,46 @@ class ConnectionWrapper:
         self._execution_count += 1
 
         self._track_stmt_db_name(sql)
+        if self._span is not None:
+            self._span.record(
+                timestamp_ms=timestamp_ms,
+                duration_ns=duration_ns,
+                write=is_write(sql),
+                update_count=update_count,
+                error=error is not None,
+            )
+            if self._settings.txn_summary_only:
+                self._summarize_if_autocommitted()
+                return
         if not self._should_capture(sql, force_call=force_call):
             return
+        if self._circuit is not None and not self._circuit.allow_capture():
+            return
+        if self._limiter is not None and self._rate_limited(sql, 1):
+            return
+
+        if self._deferred:
+            server_status, sf_if = self._read_server_status()
+            raw = RawStatement(
+                self._session,
+                timestamp_ms,
+                self._stmt_db_name or self._db_name,
+                GLOBAL_POOL_COUNTER.get(),
+                self._execution_count,
+                server_status,
+                self._session.base_iflags | sf_if | extra_iflags,
+                duration_ns,
+                update_count,
+                sql,
+                capture_params(params),
+                _safe_str(error),
+                server_info,
+            )
+            if error is None and self._settings.buffer_until_commit:
+                self._buffer_best_effort(raw)  # type: ignore[arg-type]
+            else:
+                self._publish_best_effort(raw)  # type: ignore[arg-type]
+            return
 
         iflags = self._base_iflags() | extra_iflags
 
@@ -345,7 +439,7 @@ class ConnectionWrapper:
             return
 
         if self._settings.buffer_until_commit:
-            self._buffer.add(msg)
+            self._buffer_best_effort(msg)
         else:
             self._publish_best_effort(msg)
 
@@ -353,7 +447,7 @@ class ConnectionWrapper:
         self,
         *,
         sql: str,
-        recorded_query_params: List[Optional[List[str]]],
+        recorded_query_params: List[Any],
         timestamp_ms: int,
         duration_ns: int,
         total_update_count: Optional[int],
@@ -364,10 +458,56 @@ class ConnectionWrapper:
         self._track_stmt_db_name(sql)
 
         n = len(recorded_query_params)
-        if not self._should_capture(sql):
+        if self._span is not None:
+            self._span.record(
+                timestamp_ms=timestamp_ms,
+                duration_ns=duration_ns,
+                write=is_write(sql),
+                update_count=total_update_count,
+                error=error is not None,
+                statements=max(1, n),
+            )
+            if self._settings.txn_summary_only:
+                self._summarize_if_autocommitted()
+                self._execution_count += n
+                return
+        if (
+            not self._should_capture(sql)
+            or (self._circuit is not None and not self._circuit.allow_capture(n))
+            or (self._limiter is not None and self._rate_limited(sql, n))
+        ):
             self._execution_count += n
             return
 
+        if self._deferred:
+            server_status, sf_if = self._read_server_status()
+            raw_iflags = self._session.base_iflags | sf_if | extra_iflags
+            error_str = _safe_str(error)
+            stmt_db_name = self._stmt_db_name or self._db_name
+            for i in range(n):
+                self._execution_count += 1
+                is_last = i == (n - 1)
+                raw = RawStatement(
+                    self._session,
+                    timestamp_ms,
+                    stmt_db_name,
+                    GLOBAL_POOL_COUNTER.get(),
+                    self._execution_count,
+                    server_status,
+                    raw_iflags,
+                    (duration_ns if is_last else None),
+                    (total_update_count if is_last else None),
+                    sql,
+                    capture_params(recorded_query_params[i]),
+                    error_str,
+                    (server_info if is_last else None),
+                )
+                if error is None and self._settings.buffer_until_commit:
+                    self._buffer_best_effort(raw)  # type: ignore[arg-type]
+                else:
+                    self._publish_best_effort(raw)  # type: ignore[arg-type]
+            return
+
         base_iflags = self._base_iflags() | extra_iflags
 
         for i in range(n):
@@ -403,7 +543,7 @@ class ConnectionWrapper:
             if error is not None:
                 self._publish_best_effort(msg)
             elif self._settings.buffer_until_commit:
-                self._buffer.add(msg)
+                self._buffer_best_effort(msg)
             else:
                 self._publish_best_effort(msg)
 
@@ -413,7 +553,21 @@ class ConnectionWrapper:
         except Exception:
             return
 
+    def _buffer_best_effort(self, msg: SqlLogMessage) -> None:
+        try:
+            self._buffer.add(msg)
+        except Exception:
+            return
+
     def _flush_on_commit(self) -> None:
+        if self._buffer.preserialized:
+            values = self._buffer.drain_serialized()
+            if values:
+                try:
+                    self._publisher.publish_serialized(values, key=self._connection_id)  # type: ignore[attr-defined]
+                except Exception:
+                    pass
+            return
         events = self._buffer.drain()
         if not events:
             return
@@ -426,6 +580,43 @@ class ConnectionWrapper:
     def _drop_on_rollback(self) -> None:
         self._buffer.clear()
 
+    def _summarize_if_autocommitted(self) -> None:
+        # Summary-only mode: without this, statements on an autocommit connection would never be reported.
+        if autocommitted(self._compute_server_flags()[0]):
+            self._emit_txn_summary("commit")
+
+    def _emit_txn_summary(self, outcome: str) -> None:
+        span = self._span
+        if span is None:
+            return
+        if not span.statements or span.begin_ms is None:
+            span.reset()
+            return
+        end_ms = time.time_ns() // 1_000_000
+        msg = TxnSummaryMessage(
+            recordType="txnSummary",
+            timestamp=span.begin_ms,
+            serverHost=self._server_host,
+            user=self._user,
+            client=self._client,
+            dbName=self._db_name,
+            stmtDbName=self._stmt_db_name or self._db_name,
+            debug=self._settings.inline_debug_value,
+            connectionId=self._connection_id,
+            outcome=outcome,
+            firstWriteTs=span.first_write_ms,
+            endTs=end_ms,
+            durationMs=max(0, end_ms - span.begin_ms),
+            statementCount=span.statements,
+            writeCount=span.writes,
+            errorCount=span.errors,
+            dbTimeNs=span.db_time_ns,
+            rowsAffected=span.rows_affected,
+            iFlags=IVER8 | PY_DRIVER_PYMYSQL,
+        )
+        span.reset()
+        self._publish_best_effort(msg)  # type: ignore[arg-type]
+
     def _compute_server_host(self) -> tuple[Optional[str], int]:
         try:
             host = getattr(self._conn, "host", None) or getattr(self._conn, "_host", None)
@@ -517,8 +708,12 @@ class ConnectionWrapper:
             return None, PY_ERROR_CLIENT_FLAGS
 
     def _compute_server_flags(self) -> tuple[Optional[int], int]:
+        v, iflags = self._read_server_status()
+        return _safe_int(v), iflags
+
+    def _read_server_status(self) -> tuple[Any, int]:
+        # The raw status word; deferred capture converts it on the publisher workers.
         try:
-            v = getattr(self._conn, "server_status", None) or getattr(self._conn, "_server_status", None)
-            return _safe_int(v), 0
+            return getattr(self._conn, "server_status", None) or getattr(self._conn, "_server_status", None), 0
         except Exception:
             return None, PY_ERROR_SERVER_FLAGS
@@ -1,2 +1,16 @@
-from .models import SqlLogMessage
-__all__ = ["SqlLogMessage"]
+from .models import (
+    OutageSummaryMessage,
+    SessionMessage,
+    SlimSqlLogMessage,
+    SqlLogMessage,
+    SuppressedEventsMessage,
+    TxnSummaryMessage,
+)
+__all__ = [
+    "OutageSummaryMessage",
+    "SessionMessage",
+    "SlimSqlLogMessage",
+    "SqlLogMessage",
+    "SuppressedEventsMessage",
+    "TxnSummaryMessage",
+]
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, List, Mapping, NamedTuple, Optional, Sequence
+
+from ..config.redaction import params_to_query_params
+from ..config.settings import Settings
+from ..dbapi.classify import sql_fingerprint
+from ..dbapi.constants import (
+    FINGERPRINT_PREFIX,
+    PY_DEGRADED_PARAMS,
+    PY_DEGRADED_SQL,
+    PY_ERROR_POSTPROCESS_BATCHED_ARGS,
+)
+from ..utils import _safe_int
+from .models import SqlLogMessage
+
+
+@dataclass(frozen=True)
+class SessionContext:
+    """Connection-static event fields, captured once per connection."""
+
+    settings: Settings
+    serverHost: Optional[str]
+    serverVersion: Optional[str]
+    user: Optional[str]
+    client: Optional[str]
+    dbName: Optional[str]
+    connectionId: Optional[int]
+    defaultTZ: Optional[str]
+    serverTZ: Optional[str]
+    isolationLvl: Optional[int]
+    clientFlags: Optional[int]
+    base_iflags: int
+
+
+def capture_params(params: Any) -> Any:
+    """Shallow copy of a params sequence or mapping, so the caller may reuse it after ``execute()``."""
+    if isinstance(params, Mapping):
+        return dict(params)
+    if isinstance(params, list):
+        return tuple(params)
+    return params  # None, tuples and scalars are immutable at the top level
+
+
+class RawStatement(NamedTuple):
+    """What the request thread captures in deferred mode: references only.
+
+    Redaction, param formatting and SqlLogMessage assembly happen in
+    ``build()``, which the background publisher stage calls. ``params`` is a
+    shallow copy (``capture_params()``), and ``server_flags`` the connection's
+    status word as read after the statement, converted in ``build()``.
+    ``degrade`` is the load-shedding level set by the queue (see
+    ``events.degrade``); level 1+ skips params, level 2+ replaces the SQL by
+    its fingerprint.
+    """
+
+    session: SessionContext
+    timestamp: int
+    stmt_db_name: Optional[str]
+    pool_count: Optional[int]
+    execution_count: int
+    server_flags: Any
+    iflags: int
+    duration_ns: Optional[int]
+    update_count: Optional[int]
+    sql: str
+    params: Any
+    error: Optional[str]
+    server_info: Optional[str]
+    degrade: int = 0
+
+    @property
+    def connectionId(self) -> Optional[int]:
+        return self.session.connectionId
+
+    def build(self) -> SqlLogMessage:
+        s = self.session
+        settings = s.settings
+        iflags = self.iflags
+        query_params: Optional[List[str]] = None
+        if settings.include_params:
+            if self.degrade >= 1:
+                if self.params is not None:
+                    iflags |= PY_DEGRADED_PARAMS
+            else:
+                try:
+                    query_params = params_to_query_params(self.params, settings)
+                except Exception:
+                    iflags |= PY_ERROR_POSTPROCESS_BATCHED_ARGS
+        sql = self.sql if settings.include_sql else None
+        if sql is not None and self.degrade >= 2:
+            sql = FINGERPRINT_PREFIX + sql_fingerprint(sql)
+            iflags |= PY_DEGRADED_SQL
+        return SqlLogMessage(
+            timestamp=self.timestamp,
+            serverHost=s.serverHost,
+            serverVersion=s.serverVersion,
+            user=s.user,
+            client=s.client,
+            dbName=s.dbName,
+            stmtDbName=self.stmt_db_name,
+            debug=settings.inline_debug_value,
+            connectionId=s.connectionId,
+            totalPoolCount=self.pool_count,
+            executionCount=self.execution_count,
+            serverFlags=_safe_int(self.server_flags),
+            clientFlags=s.clientFlags,
+            iFlags=iflags,
+            defaultTZ=s.defaultTZ,
+            serverTZ=s.serverTZ,
+            isolationLvl=s.isolationLvl,
+            durationNs=self.duration_ns,
+            updateCount=self.update_count,
+            sql=sql,
+            queryParams=query_params,
+            errorMessage=self.error,
+            serverInfo=self.server_info,
+        )
+
+
+def materialize(events: Sequence[Any]) -> List[Any]:
+    """Turn RawStatements into SqlLogMessages; other records pass through unchanged."""
+    out: List[Any] = []
+    for e in events:
+        if isinstance(e, RawStatement):
+            try:
+                out.append(e.build())
+            except Exception:
+                continue
+        else:
+            out.append(e)
+    return out
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import Any, List, Sequence
+
+from ..dbapi.classify import sql_fingerprint
+from ..dbapi.constants import FINGERPRINT_PREFIX, PY_DEGRADED_PARAMS, PY_DEGRADED_SQL
+from .deferred import RawStatement
+from .models import SqlLogMessage
+
+# Ladder levels, in the order they kick in as the publish queue fills up.
+DROP_PARAMS = 1
+FINGERPRINT_SQL = 2
+SHED_READS = 3
+SHED_WRITES = 4
+
+
+def degrade_message(msg: SqlLogMessage, level: int) -> SqlLogMessage:
+    """Apply the payload levels (params, then SQL text) to one message, flagging what was removed."""
+    changes: dict = {}
+    iflags = msg.iFlags
+    if level >= DROP_PARAMS and msg.queryParams is not None:
+        changes["queryParams"] = None
+        iflags |= PY_DEGRADED_PARAMS
+    if level >= FINGERPRINT_SQL and msg.sql is not None and not iflags & PY_DEGRADED_SQL:
+        changes["sql"] = FINGERPRINT_PREFIX + sql_fingerprint(msg.sql)
+        iflags |= PY_DEGRADED_SQL
+    if not changes:
+        return msg
+    return replace(msg, iFlags=iflags, **changes)
+
+
+def degrade(events: Sequence[Any], level: int) -> List[Any]:
+    """Degrade a batch: messages are rewritten, RawStatements carry the level into build()."""
+    out: List[Any] = []
+    for e in events:
+        if type(e) is SqlLogMessage:
+            out.append(degrade_message(e, level))
+        elif type(e) is RawStatement and e.degrade < level:
+            out.append(e._replace(degrade=level))
+        else:
+            out.append(e)
+    return out
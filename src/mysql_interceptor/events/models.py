@@ -32,3 +32,132 @@ class SqlLogMessage:
 
     def to_dict(self) -> Dict[str, object]:
         return asdict(self)
+
+@dataclass(frozen=True)
+class TxnSummaryMessage:
+    """One compact record per transaction (emitted on commit/rollback).
+
+    `timestamp` is the transaction begin (epoch millis): the SQLAlchemy "begin" event,
+    or the start of the first statement for plain DBAPI connections.
+    """
+
+    recordType: str  # always "txnSummary"
+    timestamp: int
+    serverHost: Optional[str]
+    user: Optional[str]
+    client: Optional[str]
+    dbName: Optional[str]
+    stmtDbName: Optional[str]
+    debug: Optional[str]
+    connectionId: Optional[int]
+    outcome: str  # "commit" | "rollback"
+    firstWriteTs: Optional[int]
+    endTs: int
+    durationMs: int  # endTs - timestamp: how long the transaction was held open
+    statementCount: int
+    writeCount: int
+    errorCount: int
+    dbTimeNs: int
+    rowsAffected: int
+    iFlags: int
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class SuppressedEventsMessage:
+    """Periodic summary of statements held back by the rate limiter, one per (schema, kind).
+
+    Covers ``timestamp`` .. ``endTs`` (epoch millis); see ``ratelimit.RateLimiter``.
+    """
+
+    recordType: str  # always "suppressed"
+    timestamp: int
+    endTs: int
+    service: str
+    client: Optional[str]
+    stmtDbName: Optional[str]
+    statementKind: Optional[str]
+    suppressedCount: int
+    iFlags: int
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class OutageSummaryMessage:
+    """Published once the sink recovers: what the circuit breaker skipped while open.
+
+    Covers ``timestamp`` (breaker opened) .. ``endTs`` (closed), epoch millis;
+    see ``kafka.circuit.CircuitBreaker``.
+    """
+
+    recordType: str  # always "outage"
+    timestamp: int
+    endTs: int
+    service: str
+    client: Optional[str]
+    failures: int  # failed produce calls and deliveries while open
+    skippedCount: int  # statements not captured while open
+    iFlags: int
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class SessionMessage:
+    """Connection-static fields of a SqlLogMessage, published once per session state.
+
+    Emitted in session-record mode (``kafka.sessions``) before the first
+    statement of a connection, again whenever one of these fields changes
+    (under a new ``sessionId``) and periodically so late consumers catch up.
+    ``timestamp`` is when the record was emitted (epoch millis).
+    """
+
+    recordType: str  # always "session"
+    sessionId: str
+    timestamp: int
+    connectionId: Optional[int]
+    serverHost: Optional[str]
+    serverVersion: Optional[str]
+    user: Optional[str]
+    client: Optional[str]
+    dbName: Optional[str]
+    debug: Optional[str]
+    clientFlags: Optional[int]
+    defaultTZ: Optional[str]
+    serverTZ: Optional[str]
+    isolationLvl: Optional[int]
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class SlimSqlLogMessage:
+    """The per-statement fields of a SqlLogMessage plus the ``sessionId`` holding the rest.
+
+    ``events.sessions.SessionJoiner`` rebuilds the full SqlLogMessage shape.
+    """
+
+    recordType: str  # always "stmt"
+    sessionId: str
+    timestamp: int
+    stmtDbName: Optional[str]
+    connectionId: Optional[int]
+    totalPoolCount: Optional[int]
+    executionCount: Optional[int]
+    serverFlags: Optional[int]
+    iFlags: int
+    durationNs: Optional[int]
+    updateCount: Optional[int]
+    sql: Optional[str]
+    queryParams: Optional[List[str]]
+    errorMessage: Optional[str]
+    serverInfo: Optional[str]
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
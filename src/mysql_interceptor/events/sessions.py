@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import operator
+from collections import OrderedDict
+from dataclasses import fields
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from .models import SessionMessage, SlimSqlLogMessage, SqlLogMessage
+
+# SqlLogMessage fields that stay the same for a connection; they move to the session record.
+SESSION_FIELDS: Tuple[str, ...] = tuple(
+    f.name for f in fields(SessionMessage) if f.name not in ("recordType", "sessionId", "timestamp", "connectionId")
+)
+STATEMENT_FIELDS: Tuple[str, ...] = tuple(
+    f.name for f in fields(SlimSqlLogMessage) if f.name not in ("recordType", "sessionId")
+)
+_FULL_FIELDS: Tuple[str, ...] = tuple(f.name for f in fields(SqlLogMessage))
+
+session_state = operator.attrgetter(*SESSION_FIELDS)
+_statement_state = operator.attrgetter(*STATEMENT_FIELDS)
+
+
+def session_message(msg: SqlLogMessage, session_id: str, timestamp: int) -> SessionMessage:
+    return SessionMessage("session", session_id, timestamp, msg.connectionId, *session_state(msg))
+
+
+def slim_message(msg: SqlLogMessage, session_id: str) -> SlimSqlLogMessage:
+    return SlimSqlLogMessage("stmt", session_id, *_statement_state(msg))
+
+
+class SessionJoiner:
+    """Consumer side of session-record mode: rebuild full SqlLogMessage dicts.
+
+    Feed every decoded record in topic order (per partition). Session
+    records are remembered (the ``max_sessions`` most recently used) and
+    yield nothing; ``stmt`` records come back in the Java-compatible
+    SqlLogMessage shape, field order included; every other record passes
+    through unchanged. A statement whose session was never seen (the
+    consumer started after it, or it was evicted) keeps None for the
+    session fields and is counted in ``unresolved`` until the producer
+    re-emits that session record.
+    """
+
+    def __init__(self, *, max_sessions: int = 100_000) -> None:
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._max_sessions = max(1, max_sessions)
+        self.unresolved = 0
+
+    def feed(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        kind = record.get("recordType")
+        if kind == "session":
+            sid = record.get("sessionId")
+            self._sessions[sid] = {name: record.get(name) for name in SESSION_FIELDS}
+            self._sessions.move_to_end(sid)
+            if len(self._sessions) > self._max_sessions:
+                self._sessions.popitem(last=False)
+            return None
+        if kind != "stmt":
+            return record
+        session = self._sessions.get(record.get("sessionId"))
+        if session is None:
+            self.unresolved += 1
+            session = {}
+        else:
+            self._sessions.move_to_end(record["sessionId"])
+        return {name: (session.get(name) if name in SESSION_FIELDS else record.get(name)) for name in _FULL_FIELDS}
+
+    def feed_all(self, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for record in records:
+            out = self.feed(record)
+            if out is not None:
+                yield out
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing import Any, Mapping
+
+from .deferred import RawStatement
+from .models import SqlLogMessage
+
+# JSON keys plus the connection-static fields of a typical SqlLogMessage
+# (host, version, user, client, TZs, flags, counters) come to ~400-450 bytes.
+EVENT_OVERHEAD_BYTES = 420
+
+
+def _value_size(v: Any) -> int:
+    if v is None:
+        return 0
+    if isinstance(v, (str, bytes, bytearray, memoryview)):
+        return len(v)
+    if isinstance(v, Mapping):
+        return sum(len(str(k)) + _value_size(x) + 4 for k, x in v.items())
+    if isinstance(v, (list, tuple)):
+        return sum(_value_size(x) + 3 for x in v)
+    return 8
+
+
+def estimate_size(event: Any) -> int:
+    """Cheap estimate of an event's serialized payload size, in bytes.
+
+    Only the variable-length parts are measured (sql, params, error and
+    server info); everything else is covered by a fixed overhead. Works for
+    SqlLogMessage, RawStatement (raw params) and the compact summary records.
+    """
+    size = EVENT_OVERHEAD_BYTES
+    if type(event) is SqlLogMessage:
+        sql, error, info = event.sql, event.errorMessage, event.serverInfo
+        params = event.queryParams
+        if params:
+            size += sum(map(len, params)) + 3 * len(params)  # already formatted strings
+    else:
+        if type(event) is RawStatement:
+            sql, params, error, info = event.sql, event.params, event.error, event.server_info
+        else:
+            sql = getattr(event, "sql", None)
+            params = getattr(event, "queryParams", None)
+            error = getattr(event, "errorMessage", None)
+            info = getattr(event, "serverInfo", None)
+        if params:
+            size += _value_size(params)
+    if sql:
+        size += len(sql)
+    if error:
+        size += len(error)
+    if info:
+        size += len(info)
+    return size
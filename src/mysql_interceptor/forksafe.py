@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import weakref
+from typing import Any, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Registration number -> (weak reference, method name); entries leave when their object is collected.
+_HOOKS: Dict[int, Tuple["weakref.ref[Any]", str]] = {}
+_SEQ = itertools.count()
+
+
+def reinit_after_fork(obj: Any, method: str = "_after_fork_in_child") -> None:
+    """Call ``obj.<method>()`` in the child of every later ``os.fork()`` while ``obj`` is alive.
+
+    Threads do not survive a fork and locks may have been held by one of them,
+    so objects owning either rebuild them in the child (pre-fork servers such
+    as gunicorn or uwsgi with ``preload_app``). One process-wide fork hook
+    walks the live objects in registration order; no-op where
+    ``os.register_at_fork`` is unavailable.
+    """
+    if _register is None:
+        return
+    key = next(_SEQ)
+    _HOOKS[key] = (weakref.ref(obj, lambda _, key=key: _HOOKS.pop(key, None)), method)
+
+
+def _after_fork_in_child() -> None:
+    for ref, method in list(_HOOKS.values()):
+        target = ref()
+        if target is None:
+            continue
+        try:
+            getattr(target, method)()
+        except Exception:
+            logger.warning("Failed to reinitialize %r after fork", target, exc_info=True)
+
+
+_register = getattr(os, "register_at_fork", None)
+if _register is not None:
+    _register(after_in_child=_after_fork_in_child)
@@ -1,84 +1,628 @@
 from __future__ import annotations
 
+import heapq
+import itertools
 import logging
-import queue
 import threading
 import time
-from typing import List
+from collections import deque
+from operator import itemgetter
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from ..config.settings import Settings
+from ..dbapi.classify import is_read
+from ..events.degrade import DROP_PARAMS, FINGERPRINT_SQL, SHED_READS, SHED_WRITES, degrade
+from ..events.deferred import RawStatement, materialize
 from ..events.models import SqlLogMessage
+from ..events.sizing import estimate_size
+from ..forksafe import reinit_after_fork
 from .publisher import Publisher
 
 logger = logging.getLogger(__name__)
 
 
-class QueueingPublisher:
-    def __init__(self, *, inner: Publisher, settings: Settings) -> None:
+HIGH = 0  # writes, DDL, CALL, USE, errors and non-statement records
+READ = 1  # SELECT / SHOW / DESCRIBE / EXPLAIN
+
+
+def lane_of(event: object) -> int:
+    """Priority lane of an event; anything not recognisably a successful read is HIGH."""
+    if type(event) is SqlLogMessage:
+        error, sql = event.errorMessage, event.sql
+    elif type(event) is RawStatement:
+        error, sql = event.error, event.sql
+    else:
+        error, sql = getattr(event, "errorMessage", None), getattr(event, "sql", None)
+    if not error and isinstance(sql, str) and is_read(sql):
+        return READ
+    return HIGH
+
+
+_SEQ = itemgetter(0)
+
+
+class _Stage:
+    """One application thread's staging deque (``thread_staging``); only the owner thread writes it.
+
+    Entries are ``(sequence number, event)``: the worker merges stages on the
+    shard-wide sequence, so a pooled connection handed from one thread to
+    another keeps its order.
+    """
+
+    __slots__ = ("q", "staged", "dropped", "thread")
+
+    def __init__(self) -> None:
+        self.q: Deque[Tuple[int, SqlLogMessage]] = deque()
+        self.staged = 0
+        self.dropped = 0
+        self.thread = threading.current_thread()
+
+
+class _Shard:
+    """Two lane queues + one worker thread. Events of a connection always land on the same shard."""
+
+    def __init__(
+        self,
+        *,
+        index: int,
+        inner: Publisher,
+        settings: Settings,
+        maxsize: int,
+        read_maxsize: int,
+        max_bytes: int,
+        name: str,
+    ) -> None:
+        self.index = index
         self._inner = inner
         self._settings = settings
-        self._q: "queue.Queue[SqlLogMessage]" = queue.Queue(maxsize=settings.publish_queue_maxsize)
+        self._lanes = settings.priority_lanes
+        self._maxsize = (maxsize, read_maxsize)  # per lane; <= 0 means unbounded
+        self._max_bytes = max_bytes  # <= 0 means unbounded
+        # (threshold, level) steps; Settings guarantees the thresholds ascend.
+        self._ladder: Tuple[Tuple[float, int], ...] = (
+            (
+                (settings.degrade_params_at, DROP_PARAMS),
+                (settings.degrade_sql_at, FINGERPRINT_SQL),
+                (settings.degrade_reads_at, SHED_READS),
+                (settings.degrade_writes_at, SHED_WRITES),
+            )
+            if settings.degrade_under_load
+            else ()
+        )
+        self._batch_size = max(1, settings.publish_batch_size)
+        self._wake_at = min(self._batch_size, maxsize) if maxsize > 0 else self._batch_size
+        self._name = name
+        self._inner_request_flush = getattr(inner, "request_flush", None)
+        self._staging = settings.thread_staging and not (self._lanes or max_bytes > 0 or self._ladder)
+        if settings.thread_staging and not self._staging:
+            logger.warning("thread_staging is ignored with priority lanes, a byte budget or degradation")
+        self._reset()
+
+    def _reset(self) -> None:
+        self._q: List[Deque[SqlLogMessage]] = [deque(), deque()]
+        self._sizes: List[Deque[int]] = [deque(), deque()]  # estimated payload bytes, parallel to _q
+        self._bytes = 0  # queued + taken by the worker but not yet published
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._drained = threading.Condition(self._lock)
+        self._enqueued = 0  # events accepted so far (sequence number of the last one)
+        self._published = 0  # events handed to the inner publisher so far
+        self._evicted = 0  # accepted reads shed later to make room for HIGH events
+        self._flush_waiters = 0
+        self._drain_requested = False  # request_flush(): publish the partial batch now
         self._stop = threading.Event()
-        self._thread = threading.Thread(target=self._run, name="mysql-interceptor-publisher", daemon=True)
-        self._thread.start()
 
-    def publish(self, event: SqlLogMessage) -> None:
-        if self._settings.backpressure == "drop":
-            try:
-                self._q.put_nowait(event)
-            except queue.Full:
+        self._dropped = [0, 0]  # per lane, including evictions and ladder shedding
+        self._shed = 0
+        self._degraded = 0
+        self._batches = 0
+        self._max_depth = 0
+        self._max_bytes_seen = 0
+
+        # thread_staging: per-thread deques, registered once per thread and merged by the worker.
+        self._local = threading.local()
+        self._stages: List[_Stage] = []
+        self._seq = itertools.count()
+
+        # Started on the first enqueue, so a pre-fork master that never publishes has no thread.
+        self._thread: Optional[threading.Thread] = None
+
+    def after_fork_in_child(self) -> None:
+        """Forget the parent's queue and worker: the parent publishes what it had queued."""
+        self._reset()
+
+    def enqueue(self, events: Sequence[SqlLogMessage]) -> None:
+        if self._staging:
+            self._stage(events)
+            return
+        drop = self._settings.backpressure == "drop"
+        if self._ladder:
+            level = self.level()
+            if level >= SHED_READS:
+                events = self._shed_events(events, level)
+                if not events:
+                    return
+        # Sizing costs a few hundred ns per event; only pay it when a byte budget is set.
+        sizes = [estimate_size(e) for e in events] if self._max_bytes > 0 else [0] * len(events)
+        if self._lanes:
+            lanes = [lane_of(e) for e in events]
+            if READ in lanes:
+                high = [i for i, lane in enumerate(lanes) if lane == HIGH]
+                reads = [i for i, lane in enumerate(lanes) if lane == READ]
+                with self._lock:
+                    if high:
+                        self._put(HIGH, [events[i] for i in high], [sizes[i] for i in high], drop)
+                    self._put(READ, [events[i] for i in reads], [sizes[i] for i in reads], drop)
+                return
+        with self._lock:
+            self._put(HIGH, events, sizes, drop)
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+
+    def _stage(self, events: Sequence[SqlLogMessage]) -> None:
+        """Lock-free enqueue into the calling thread's stage; the lock is only taken to wake the worker."""
+        try:
+            stage = self._local.stage
+        except AttributeError:
+            stage = self._local.stage = _Stage()
+            with self._lock:
+                self._stages.append(stage)
+                self._ensure_worker()
+        q = stage.q
+        n = len(events)
+        cap = self._maxsize[HIGH]
+        if cap > 0 and len(q) + n > cap:  # the bound applies per thread
+            if self._settings.backpressure == "drop":
+                stage.dropped += n
+                return
+            with self._lock:  # the worker drains stages under the lock and then notifies _not_full
+                while q and len(q) + n > cap and not self._stop.is_set():
+                    self._not_empty.notify()
+                    self._not_full.wait()
+        before = len(q)
+        seq = next(self._seq)
+        q.extend([(seq, e) for e in events])
+        stage.staged += n
+        if before < self._wake_at <= before + n:
+            with self._lock:
+                self._not_empty.notify()
+
+    def _put(self, lane: int, events: Sequence[SqlLogMessage], sizes: List[int], drop: bool) -> None:
+        self._ensure_worker()
+        n = len(events)
+        i = 0
+        while i < n:
+            if self._stop.is_set():
                 return
+            take = self._room(lane, sizes, i)
+            if take <= 0:
+                if drop:
+                    self._dropped[lane] += n - i
+                    return
+                self._not_empty.notify()
+                self._not_full.wait()
+                continue
+            before = self._depth()
+            if i == 0 and take == n:
+                self._q[lane].extend(events)
+                self._sizes[lane].extend(sizes)
+                added = sum(sizes)
+            else:
+                self._q[lane].extend(events[i : i + take])
+                self._sizes[lane].extend(sizes[i : i + take])
+                added = sum(sizes[i : i + take])
+            i += take
+            self._enqueued += take
+            self._bytes += added
+            depth = before + take
+            if depth > self._max_depth:
+                self._max_depth = depth
+            if self._bytes > self._max_bytes_seen:
+                self._max_bytes_seen = self._bytes
+            if before < self._wake_at <= depth:
+                self._not_empty.notify()
+
+    def level(self, in_flight: int = 0) -> int:
+        """Degradation level for the current fill (0 = none); lock-free, approximate."""
+        fill = 0.0
+        high_cap, read_cap = self._maxsize
+        if high_cap > 0:
+            depth = len(self._q[HIGH]) + in_flight
+            if not self._lanes:
+                fill = depth / high_cap
+            elif read_cap > 0:
+                fill = (depth + len(self._q[READ])) / (high_cap + read_cap)
+            else:
+                fill = depth / high_cap
+        if self._max_bytes > 0:
+            fill = max(fill, self._bytes / self._max_bytes)
+        level = 0
+        for threshold, step in self._ladder:
+            if fill < threshold:
+                break
+            level = step
+        return level
+
+    def _shed_events(self, events: Sequence[SqlLogMessage], level: int) -> List[SqlLogMessage]:
+        lanes = [lane_of(e) for e in events]
+        if level >= SHED_WRITES:
+            kept: List[SqlLogMessage] = []
         else:
-            self._q.put(event)
+            kept = [e for e, lane in zip(events, lanes) if lane == HIGH]
+        shed = len(events) - len(kept)
+        if shed:
+            reads = lanes.count(READ)
+            with self._lock:
+                self._shed += shed
+                self._dropped[READ] += reads
+                self._dropped[HIGH] += shed - reads
+        return kept
 
-    def publish_batch(self, events: List[SqlLogMessage]) -> None:
-        for e in events:
-            self.publish(e)
+    def _depth(self) -> int:
+        depth = len(self._q[HIGH]) + len(self._q[READ])
+        if self._stages:
+            depth += sum(len(stage.q) for stage in self._stages)
+        return depth
 
-    def flush(self) -> None:
-        while not self._q.empty():
-            time.sleep(0.05)
-        self._inner.flush()
+    def _accepted(self) -> int:
+        if not self._stages:
+            return self._enqueued
+        return self._enqueued + sum(stage.staged for stage in self._stages)
 
-    def close(self) -> None:
-        self._stop.set()
-        self._thread.join(timeout=2.0)
-        self.flush()
-        self._inner.close()
+    def _room(self, lane: int, sizes: List[int], start: int) -> int:
+        """How many of sizes[start:] fit the lane's count and the shard's byte budget (lock held).
 
-    def _run(self) -> None:
-        batch: List[SqlLogMessage] = []
-        last_flush = time.time()
+        HIGH events may evict queued reads to make byte room.
+        """
+        n = len(sizes) - start
+        cap = self._maxsize[lane]
+        if cap > 0:
+            n = min(n, cap - len(self._q[lane]))
+        if self._max_bytes <= 0 or n <= 0:
+            return n
+        take = 0
+        taken_bytes = 0
+        while take < n:
+            size = sizes[start + take]
+            if self._bytes + taken_bytes + size > self._max_bytes:
+                if lane == HIGH and self._evict_read():
+                    continue
+                break
+            taken_bytes += size
+            take += 1
+        if take == 0 and self._bytes == 0:
+            return 1  # an event larger than the whole budget still goes through alone
+        return take
+
+    def _evict_read(self) -> bool:
+        if not self._q[READ]:
+            return False
+        self._q[READ].popleft()
+        self._bytes -= self._sizes[READ].popleft()
+        self._evicted += 1
+        self._dropped[READ] += 1
+        self._drained.notify_all()
+        return True
 
-        while not self._stop.is_set():
-            timeout = max(0.0, self._settings.publish_flush_interval_s - (time.time() - last_flush))
+    def wait_published(self, deadline: Optional[float]) -> bool:
+        with self._lock:
+            target = self._accepted()
+            if self._published + self._evicted >= target:
+                return True
+            self._flush_waiters += 1
+            self._not_empty.notify()
             try:
-                evt = self._q.get(timeout=timeout)
-                batch.append(evt)
-                if len(batch) >= self._settings.publish_batch_size:
-                    try:
-                        self._inner.publish_batch(batch)
-                    except Exception:
-                        logger.exception("Error in background publisher thread")
-                    batch.clear()
-                    last_flush = time.time()
-            except queue.Empty:
-                if batch:
-                    try:
-                        self._inner.publish_batch(batch)
-                    except Exception:
-                        logger.exception("Error in background publisher thread during flush")
-                    batch.clear()
-                last_flush = time.time()
+                while self._published + self._evicted < target:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._drained.wait(remaining)
+            finally:
+                self._flush_waiters -= 1
+        return True
+
+    def request_drain(self) -> None:
+        with self._lock:
+            if self._depth():
+                self._drain_requested = True
+                self._not_empty.notify()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stop.set()
+            self._not_empty.notify()
+            self._not_full.notify_all()
+
+    def join(self, timeout: Optional[float]) -> bool:
+        thread = self._thread
+        if thread is None:
+            return True
+        thread.join(timeout=timeout)
+        return not thread.is_alive()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            staged_dropped = sum(stage.dropped for stage in self._stages)
+            return {
+                "shard": self.index,
+                "enqueued": self._accepted(),
+                "published": self._published,
+                "dropped": self._dropped[HIGH] + self._dropped[READ] + staged_dropped,
+                "dropped_high": self._dropped[HIGH] + staged_dropped,
+                "dropped_read": self._dropped[READ],
+                "shed": self._shed,
+                "degraded": self._degraded,
+                "degrade_level": self.level() if self._ladder else 0,
+                "batches": self._batches,
+                "queue_depth": self._depth(),
+                "read_queue_depth": len(self._q[READ]),
+                "max_queue_depth": self._max_depth,
+                "queued_bytes": self._bytes,
+                "max_queued_bytes": self._max_bytes_seen,
+            }
+
+    def queued_bytes(self) -> int:
+        with self._lock:
+            return self._bytes
+
+    def _run(self) -> None:
+        interval = self._settings.publish_flush_interval_s
+        pending: List[SqlLogMessage] = []
+        pending_sizes: List[int] = []
+        last_flush = time.monotonic()
 
         while True:
-            try:
-                evt = self._q.get_nowait()
-                batch.append(evt)
-                if len(batch) >= self._settings.publish_batch_size:
-                    self._inner.publish_batch(batch)
-                    batch.clear()
-            except queue.Empty:
+            with self._lock:
+                if (
+                    self._depth() < self._wake_at
+                    and not self._stop.is_set()
+                    and not self._flush_waiters
+                    and not self._drain_requested
+                ):
+                    timeout = interval - (time.monotonic() - last_flush)
+                    if timeout > 0:
+                        self._not_empty.wait(timeout)
+                # HIGH lane first, then reads.
+                taken = False
+                for lane in (HIGH, READ):
+                    if self._q[lane]:
+                        pending.extend(self._q[lane])
+                        pending_sizes.extend(self._sizes[lane])
+                        self._q[lane] = deque()
+                        self._sizes[lane] = deque()
+                        taken = True
+                if self._stages:
+                    staged = self._drain_stages()
+                    if staged:
+                        pending.extend(staged)
+                        pending_sizes.extend([0] * len(staged))
+                        taken = True
+                if taken:
+                    self._not_full.notify_all()
+                stopping = self._stop.is_set()
+                flushing = self._flush_waiters > 0 or self._drain_requested
+                draining = self._drain_requested
+                self._drain_requested = False
+
+            full = len(pending) - len(pending) % self._batch_size
+            for start in range(0, full, self._batch_size):
+                end = start + self._batch_size
+                self._publish_chunk(pending[start:end], sum(pending_sizes[start:end]), len(pending) - start)
+            if full:
+                del pending[:full]
+                del pending_sizes[:full]
+                last_flush = time.monotonic()
+
+            if pending and (stopping or flushing or time.monotonic() - last_flush >= interval):
+                self._publish_chunk(pending, sum(pending_sizes), len(pending))
+                pending = []
+                pending_sizes = []
+            if not pending and time.monotonic() - last_flush >= interval:
+                last_flush = time.monotonic()
+            if draining and self._inner_request_flush is not None:
+                try:
+                    self._inner_request_flush()
+                except Exception:
+                    logger.exception("Error requesting a flush from the inner publisher")
+
+            if stopping:
+                with self._lock:
+                    if not self._depth():
+                        return
+
+    def _drain_stages(self) -> List[SqlLogMessage]:
+        """Take every staged event in publish order and forget finished threads' stages (lock held)."""
+        drained = []
+        live = []
+        for stage in self._stages:
+            n = len(stage.q)
+            if n:
+                popleft = stage.q.popleft
+                drained.append([popleft() for _ in range(n)])
+                live.append(stage)
+            elif stage.thread.is_alive():
+                live.append(stage)
+            else:
+                # Its thread is gone and it is empty: fold its counters into the shard's.
+                self._enqueued += stage.staged
+                self._dropped[HIGH] += stage.dropped
+        self._stages = live
+        if not drained:
+            return []
+        merged: Iterable[Tuple[int, SqlLogMessage]] = (
+            drained[0] if len(drained) == 1 else heapq.merge(*drained, key=_SEQ)
+        )
+        return [e for _, e in merged]
+
+    def _publish_chunk(self, batch: List[SqlLogMessage], nbytes: int, backlog: int) -> None:
+        out: List[SqlLogMessage] = batch
+        if self._ladder:
+            # The worker's backlog (taken + still queued) drives the payload levels.
+            level = self.level(backlog)
+            if level:
+                out = degrade(batch, level)
+                self._degraded += sum(1 for a, b in zip(batch, out) if a is not b)
+        try:
+            self._inner.publish_batch(materialize(out) if self._settings.deferred_capture else out)
+        except Exception:
+            logger.exception("Error in background publisher thread")
+        with self._lock:
+            self._published += len(batch)
+            self._batches += 1
+            self._bytes -= nbytes
+            self._drained.notify_all()
+            if self._max_bytes > 0:
+                self._not_full.notify_all()
+
+
+class QueueingPublisher:
+    """Hand events to background worker threads that publish them in batches.
+
+    Producers append to a deque under a single lock: one acquire per
+    ``publish_batch()`` call instead of one per event, and the worker is only
+    notified when a full batch is waiting. The worker swaps the whole deque
+    out in one go and publishes it in chunks of ``publish_batch_size``.
+
+    With ``publish_workers > 1`` events are sharded by ``connectionId`` over
+    that many queues/threads, so per-connection order is preserved while
+    serialization and produce calls run in parallel. ``publish_queue_maxsize``
+    is split evenly between shards.
+
+    With ``publish_queue_max_bytes`` set, every shard also accounts an
+    estimated payload size per event (``events.sizing``) for everything
+    queued or in flight, and enforces that budget (split across shards) the
+    same way as the event count.
+
+    With ``priority_lanes`` each shard keeps reads in a separate lane bounded
+    by ``publish_read_queue_maxsize``; writes, DDL, errors and other records
+    use the main lane (``publish_queue_maxsize``). The worker drains the main
+    lane first, and under byte pressure queued reads are shed to make room
+    for main-lane events. Order is kept within a lane, not between lanes.
+
+    With ``degrade_under_load`` the shard's fill level (events or bytes,
+    whichever is fuller) walks a four-step ladder: published events lose
+    their params, then their SQL text (replaced by a fingerprint), then new
+    reads and finally new writes are shed at enqueue (``events.degrade``).
+
+    With ``thread_staging`` (not combined with lanes, a byte budget or the
+    ladder) every application thread appends to its own staging deque
+    without taking the shard lock; the lock is only taken once per
+    ``publish_batch_size`` events to wake the worker, which merges the
+    stages. ``publish_queue_maxsize`` then bounds each thread's stage, and
+    order is kept per thread rather than per connection.
+
+    ``flush()`` is a sequence barrier: it waits until every event enqueued
+    before the call has been handed to the inner publisher (including a batch
+    the worker already took off the queue), and wakes as soon as that happens.
+    ``request_flush()`` only asks the workers to publish their partial batches
+    now (and the inner publisher to serve its queue) and returns at once.
+
+    With ``deferred_capture`` the queue also carries RawStatements; workers
+    build the messages (redaction, formatting) before publishing.
+
+    Worker threads start with the first event. In the child of a fork the
+    shards start over empty (events queued before the fork belong to the
+    parent) and start their own workers on demand.
+    """
+
+    def __init__(self, *, inner: Publisher, settings: Settings) -> None:
+        self._inner = inner
+        self._settings = settings
+        # Only a queue whose workers materialize RawStatements may be handed them.
+        self.accepts_deferred = settings.deferred_capture
+        self.circuit = getattr(inner, "circuit", None)
+        reinit_after_fork(self)
+        n = max(1, settings.publish_workers)
+        maxsize = settings.publish_queue_maxsize
+        shard_maxsize = -(-maxsize // n) if maxsize > 0 else maxsize
+        read_maxsize = settings.publish_read_queue_maxsize
+        shard_read_maxsize = -(-read_maxsize // n) if read_maxsize > 0 else read_maxsize
+        max_bytes = settings.publish_queue_max_bytes
+        shard_max_bytes = -(-max_bytes // n) if max_bytes > 0 else max_bytes
+        self._shards = [
+            _Shard(
+                index=i,
+                inner=inner,
+                settings=settings,
+                maxsize=shard_maxsize,
+                read_maxsize=shard_read_maxsize,
+                max_bytes=shard_max_bytes,
+                name="mysql-interceptor-publisher" if n == 1 else f"mysql-interceptor-publisher-{i}",
+            )
+            for i in range(n)
+        ]
+
+    def publish(self, event: SqlLogMessage) -> None:
+        self._shard_for(event).enqueue((event,))
+
+    def publish_batch(self, events: List[SqlLogMessage]) -> None:
+        if not events:
+            return
+        if len(self._shards) == 1:
+            self._shards[0].enqueue(events)
+            return
+        # A commit batch normally belongs to one connection: avoid regrouping it.
+        first = self._shard_for(events[0])
+        if all(self._shard_for(e) is first for e in events):
+            first.enqueue(events)
+            return
+        groups: Dict[int, List[SqlLogMessage]] = {}
+        for e in events:
+            groups.setdefault(self._shard_for(e).index, []).append(e)
+        for index, group in groups.items():
+            self._shards[index].enqueue(group)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything enqueued so far reached the inner publisher, then flush it.
+
+        Returns False (without flushing the inner publisher) if ``timeout``
+        seconds pass first; the inner flush gets whatever time is left.
+        Without a timeout the wait is bounded by ``shutdown_flush_timeout_s``,
+        so a stuck broker cannot hang the caller.
+        """
+        if timeout is None:
+            timeout = self._settings.shutdown_flush_timeout_s
+        deadline = time.monotonic() + timeout
+        for shard in self._shards:
+            if not shard.wait_published(deadline):
+                return False
+        return self._inner.flush(max(0.0, deadline - time.monotonic())) is not False
+
+    def request_flush(self) -> None:
+        """Have the workers publish what is queued now, without waiting for it."""
+        for shard in self._shards:
+            shard.request_drain()
+
+    def close(self, timeout: float = 2.0) -> None:
+        deadline = time.monotonic() + timeout
+        for shard in self._shards:
+            shard.stop()
+        for shard in self._shards:
+            if not shard.join(max(0.0, deadline - time.monotonic())):
+                logger.warning("Background publisher did not drain within %.1fs; closing anyway", timeout)
                 break
-        if batch:
-            self._inner.publish_batch(batch)
+        self._inner.flush(max(0.0, deadline - time.monotonic()))
+        self._inner.close()
+
+    def stats(self) -> List[Dict[str, int]]:
+        """Per-shard counters: enqueued/published/dropped (per lane) events, batches, queue depth and bytes."""
+        return [shard.stats() for shard in self._shards]
+
+    def queued_bytes(self) -> int:
+        """Estimated payload bytes currently queued or in flight, across shards."""
+        return sum(shard.queued_bytes() for shard in self._shards)
+
+    def _after_fork_in_child(self) -> None:
+        for shard in self._shards:
+            shard.after_fork_in_child()
+
+    def _shard_for(self, event: SqlLogMessage) -> _Shard:
+        shards = self._shards
+        if len(shards) == 1:
+            return shards[0]
+        cid = getattr(event, "connectionId", None)
+        return shards[cid % len(shards)] if isinstance(cid, int) else shards[0]
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from ..events.models import SqlLogMessage
+from ..forksafe import reinit_after_fork
+from .circuit import CircuitBreaker
+from .confluent import _json_serializer
+from .publisher import Publisher, StdoutPublisher
+
+logger = logging.getLogger(__name__)
+
+# ("events", [event, ...], None) or ("serialized", [value, ...], key)
+_Pending = Tuple[str, List[Any], Optional[int]]
+
+
+class BootstrappingPublisher:
+    """Build the real publisher on a background thread; buffer events until it is ready.
+
+    ``build(decisions)`` creates the sink (importing the client library,
+    choosing a fallback) and appends one ``{"sink": ..., "outcome": ...}``
+    entry per candidate it tried. If the result has ``warmup(timeout)``, the
+    topic metadata is fetched next, so the first real produce does not pay
+    for it. Until both finish, events wait in a bounded pre-ready queue
+    (``max_pending`` events; past that new events are dropped and counted);
+    the bootstrap thread hands them over in order and from then on calls go
+    straight through.
+
+    ``stats()`` reports readiness, ``time_to_ready_ms``, the warm-up outcome,
+    the pre-ready queue counters and the sink decisions.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[List[Dict[str, str]]], Publisher],
+        *,
+        max_pending: int = 10_000,
+        warmup_timeout_s: float = 10.0,
+        circuit: Optional[CircuitBreaker] = None,
+        serializer: Optional[Callable[[Any], bytes]] = None,
+    ) -> None:
+        self.circuit = circuit
+        self._serializer = serializer or _json_serializer
+        self._build = build
+        self._max_pending = max_pending
+        self._warmup_timeout_s = warmup_timeout_s
+        self._inner: Optional[Publisher] = None
+        self._ready = False
+        self._lock = threading.Lock()
+        self._ready_event = threading.Event()
+        self._pending: Deque[_Pending] = deque()
+        self._pending_count = 0
+        self._max_pending_seen = 0
+        self._dropped = 0
+        self._warmup: Optional[str] = None
+        self._time_to_ready_ms: Optional[float] = None
+        self.decisions: List[Dict[str, str]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._start()
+        reinit_after_fork(self)
+
+    def publish(self, event: SqlLogMessage) -> None:
+        if self._ready:
+            self._inner.publish(event)  # type: ignore[union-attr]
+        else:
+            self._hold(("events", [event], None), 1)
+
+    def publish_batch(self, events: List[SqlLogMessage]) -> None:
+        if self._ready:
+            self._inner.publish_batch(events)  # type: ignore[union-attr]
+        elif events:
+            self._hold(("events", list(events), None), len(events))
+
+    def serialize(self, event: SqlLogMessage) -> bytes:
+        return self._serializer(event)
+
+    def publish_serialized(self, values: List[memoryview], *, key: Optional[int] = None) -> None:
+        if self._ready:
+            self._forward(("serialized", values, key))
+        elif values:
+            self._hold(("serialized", list(values), key), len(values))
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready_event.wait(timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> Any:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self._ready_event.wait(timeout):
+            return False
+        assert self._inner is not None
+        if deadline is None:
+            return self._inner.flush()
+        return self._inner.flush(max(0.0, deadline - time.monotonic()))
+
+    def request_flush(self) -> None:
+        request_flush = getattr(self._inner, "request_flush", None) if self._ready else None
+        if request_flush is not None:
+            request_flush()
+
+    def close(self) -> None:
+        if not self._ready_event.wait(self._warmup_timeout_s):
+            logger.warning("Kafka publisher never became ready; dropping %d pending events", self._pending_count)
+            return
+        assert self._inner is not None
+        self._inner.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": self._ready,
+                "time_to_ready_ms": self._time_to_ready_ms,
+                "warmup": self._warmup,
+                "sink": type(self._inner).__name__ if self._inner is not None else None,
+                "decisions": list(self.decisions),
+                "pending": self._pending_count,
+                "max_pending": self._max_pending_seen,
+                "dropped_pending": self._dropped,
+            }
+
+    def _start(self) -> None:
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._bootstrap, name="mysql-interceptor-bootstrap", daemon=True)
+        self._thread.start()
+
+    def _hold(self, item: _Pending, n: int) -> None:
+        with self._lock:
+            if not self._ready:
+                if self._max_pending > 0 and self._pending_count + n > self._max_pending:
+                    self._dropped += n
+                    return
+                self._pending.append(item)
+                self._pending_count += n
+                if self._pending_count > self._max_pending_seen:
+                    self._max_pending_seen = self._pending_count
+                return
+        self._forward(item)  # became ready meanwhile
+
+    def _forward(self, item: _Pending) -> None:
+        kind, payload, key = item
+        inner = self._inner
+        assert inner is not None
+        if kind == "events":
+            inner.publish_batch(payload)
+            return
+        publish_serialized = getattr(inner, "publish_serialized", None)
+        if publish_serialized is None:
+            logger.warning("%s cannot take pre-serialized events; dropped %d", type(inner).__name__, len(payload))
+            return
+        publish_serialized(payload, key=key)
+
+    def _bootstrap(self) -> None:
+        try:
+            inner = self._build(self.decisions)
+        except Exception as e:
+            logger.exception("Kafka publisher bootstrap failed; falling back to StdoutPublisher")
+            self.decisions.append({"sink": "stdout", "outcome": f"bootstrap failed: {e!r}"})
+            inner = StdoutPublisher()
+
+        warmup = getattr(inner, "warmup", None)
+        if warmup is not None:
+            try:
+                self._warmup = "ok" if warmup(self._warmup_timeout_s) else "timeout"
+            except Exception as e:
+                self._warmup = f"failed: {e!r}"
+            if self._warmup != "ok":
+                logger.warning("Kafka metadata warm-up %s; publishing anyway", self._warmup)
+
+        self._inner = inner
+        # Hand the pre-ready queue over in order; publishers keep queueing until it is empty.
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._ready = True
+                    self._time_to_ready_ms = (time.monotonic() - self._started_at) * 1000.0
+                    break
+                items, self._pending = self._pending, deque()
+                self._pending_count = 0
+            for item in items:
+                try:
+                    self._forward(item)
+                except Exception:
+                    logger.exception("Failed to publish events buffered during bootstrap")
+        self._ready_event.set()
+        logger.info("Kafka publisher %s ready after %.0f ms", type(inner).__name__, self._time_to_ready_ms)
+
+    def _after_fork_in_child(self) -> None:
+        self._lock = threading.Lock()
+        if self._ready:
+            return  # the inner publisher reinitializes itself
+        # The bootstrap thread stayed in the parent, and so do the events it was holding.
+        self._pending = deque()
+        self._pending_count = 0
+        self._ready_event = threading.Event()
+        self._start()
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from ..dbapi.constants import IVER8
+from ..events.models import OutageSummaryMessage
+from ..forksafe import reinit_after_fork
+from ..utils import hostname
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Tell the capture layer to stop building events while the sink is down.
+
+    The sink reports every produce/delivery outcome with ``record_success()``
+    or ``record_failure()``. ``failure_threshold`` consecutive failures open
+    the breaker; while open, ``allow_capture()`` returns False and only
+    counts the skipped statements. After ``reset_timeout_s`` it half-opens
+    and lets ``probe_events`` statements through; the first delivery
+    success closes it, a failure opens it again. If no verdict arrives within
+    another ``reset_timeout_s`` a new round of probes is let through.
+
+    ``poll`` (e.g. the producer's ``poll(0)``) is called by capture threads
+    while probes are outstanding, so delivery reports are served even though
+    nothing else is being produced. Closing queues one
+    ``OutageSummaryMessage`` for the sink to collect with ``pop_summary()``.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        reset_timeout_s: float = 5.0,
+        probe_events: int = 10,
+        service: str = "",
+        poll: Optional[Callable[[], object]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._threshold = max(1, failure_threshold)
+        self._reset_timeout_s = reset_timeout_s
+        self._probe_events = max(1, probe_events)
+        self._service = service
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.poll = poll
+        self.state = CLOSED
+        self._consecutive = 0
+        self._retry_at = 0.0
+        self._probes = 0
+        self._opened_ms = 0
+        self._failures = 0
+        self._skipped = 0
+        self._summary: Optional[OutageSummaryMessage] = None
+        reinit_after_fork(self)
+
+    def allow_capture(self, n: int = 1) -> bool:
+        """Whether to capture the next ``n`` statements; skipped ones are counted."""
+        if self.state is CLOSED:
+            return True
+        with self._lock:
+            now = self._clock()
+            if self.state is CLOSED:
+                return True
+            if self.state is OPEN:
+                if now < self._retry_at:
+                    self._skipped += n
+                    return False
+                self.state = HALF_OPEN
+                logger.info("Kafka circuit breaker half-open; probing the sink")
+                self._start_probes(now)
+            if self._probes <= 0 and now >= self._retry_at:
+                self._start_probes(now)  # no verdict on the last round
+            if self._probes > 0:
+                self._probes -= n
+                return True
+            self._skipped += n
+        poll = self.poll
+        if poll is not None:
+            try:
+                poll()
+            except Exception:
+                logger.debug("Circuit breaker poll failed", exc_info=True)
+        return False
+
+    def record_success(self) -> None:
+        if self.state is CLOSED and not self._consecutive:
+            return
+        with self._lock:
+            if self.state is CLOSED:
+                self._consecutive = 0
+            elif self.state is HALF_OPEN:
+                self._close()
+            # While OPEN: a late report for an event produced before the outage; wait for a probe.
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self.state is CLOSED:
+                self._consecutive += 1
+                if self._consecutive >= self._threshold:
+                    self.state = OPEN
+                    self._opened_ms = time.time_ns() // 1_000_000
+                    self._failures = self._consecutive
+                    self._skipped = 0
+                    self._retry_at = self._clock() + self._reset_timeout_s
+                    logger.warning("Kafka sink failing; circuit breaker open, capture paused")
+                return
+            self._failures += 1
+            if self.state is HALF_OPEN:
+                self.state = OPEN
+                self._retry_at = self._clock() + self._reset_timeout_s
+
+    def pop_summary(self) -> Optional[OutageSummaryMessage]:
+        """The summary of the last outage, once, after the breaker closed."""
+        if self._summary is None:
+            return None
+        with self._lock:
+            summary, self._summary = self._summary, None
+        return summary
+
+    def _after_fork_in_child(self) -> None:
+        # The child's sink starts from scratch; so does its view of it.
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self._consecutive = 0
+        self._summary = None
+
+    def _start_probes(self, now: float) -> None:
+        self._probes = self._probe_events
+        self._retry_at = now + self._reset_timeout_s
+
+    def _close(self) -> None:
+        self.state = CLOSED
+        self._consecutive = 0
+        self._summary = OutageSummaryMessage(
+            recordType="outage",
+            timestamp=self._opened_ms,
+            endTs=time.time_ns() // 1_000_000,
+            service=self._service,
+            client=hostname(),
+            failures=self._failures,
+            skippedCount=self._skipped,
+            iFlags=IVER8,
+        )
+        logger.warning("Kafka sink recovered; circuit breaker closed after skipping %d statements", self._skipped)
@@ -1,20 +1,70 @@
 from __future__ import annotations
 
 import logging
-from typing import Callable, List, Optional
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from ..errors import PublisherError
 from ..events.models import SqlLogMessage
+from ..forksafe import reinit_after_fork
+from .circuit import CircuitBreaker
+from .profiles import producer_conf
+from .serializers import json_dumps
+from .spill import SpillQueue, claim_worker_dir, release_worker_dir
 
 logger = logging.getLogger(__name__)
 
 
-def _json_serializer(event: SqlLogMessage) -> bytes:
-    import json
-    return json.dumps(event.to_dict(), ensure_ascii=False, default=str, separators=(",", ":")).encode("utf-8")
+# The default JSON encoder (fastest verified backend, see serializers.json_encoder);
+# the name predates the serializer registry and is imported throughout.
+_json_serializer = json_dumps
 
 
 class ConfluentKafkaPublisher:
+    """Produce events to Kafka with confluent-kafka.
+
+    ``producer`` injects a ready-made producer (or a stand-in with the same
+    ``produce``/``poll``/``flush`` surface) instead of building one from the
+    connection settings. Otherwise the producer (and the replay thread) is
+    created on the first publish, and again in the child after a fork: a
+    librdkafka handle does not survive ``fork()``, and a pre-fork master
+    that never publishes never opens one.
+
+    ``profile`` names a throughput profile from ``kafka.profiles``; its
+    librdkafka properties replace the matching individual settings.
+    ``extra_conf`` (``"key=value"`` strings) is applied last, so any
+    librdkafka property can be set.
+
+    With ``spill_dir`` the publisher never drops on a saturated or failing
+    producer: records rejected with ``BufferError`` or reported failed by the
+    delivery callback go to a ``SpillQueue`` on disk, and so does everything
+    published while it is non-empty, so replay keeps publish order (failed
+    deliveries re-enter in callback order). A
+    background thread replays the spill in batches, committing a batch only
+    once all of its deliveries succeeded, with exponential backoff between
+    failed attempts. Every process (forked or not) spills into its own
+    ``worker-<n>`` subdirectory, claimed with a file lock on the first
+    publish and reused by a later process once its owner exits; records left
+    in a slot are replayed by the next process that claims it. Nothing is
+    opened at construction, so a pre-fork master never starts a producer.
+
+    ``circuit`` is fed every produce error and delivery report and exposed
+    as ``self.circuit`` for the capture layer (see ``kafka.circuit``); the
+    outage summary it queues on closing is produced from the delivery
+    callback.
+
+    ``serializer`` turns records into bytes (default: compact JSON; see
+    ``kafka.serializers``). ``close()`` waits at most ``close_timeout_s``
+    for the replay thread and outstanding deliveries.
+
+    ``publish_batch`` serializes the whole batch first and serves delivery
+    callbacks once per batch. When librdkafka's local queue is full
+    (``BufferError``) and no spill is configured, it polls with growing
+    backoff and retries until ``produce_timeout_s`` has passed for the
+    batch, then drops what is left of it and counts it in ``dropped``.
+    """
+
     def __init__(
         self,
         *,
@@ -27,48 +77,315 @@ class ConfluentKafkaPublisher:
         batch_size: int = 16384,
         buffer_memory: int = 33_554_432,
         adaptive_partitioning_enabled: bool = True,
+        profile: Optional[str] = None,
+        extra_conf: Sequence[str] = (),
+        producer: Any = None,
+        spill_dir: Optional[str] = None,
+        spill_max_bytes: int = 1 << 30,
+        replay_batch_size: int = 500,
+        replay_timeout_s: float = 10.0,
+        replay_backoff_s: float = 0.5,
+        circuit: Optional[CircuitBreaker] = None,
+        produce_timeout_s: float = 1.0,
+        serializer: Optional[Callable[[Any], bytes]] = None,
+        close_timeout_s: float = 5.0,
     ) -> None:
-        try:
-            from confluent_kafka import Producer  # type: ignore
-        except Exception as e:
-            raise PublisherError("confluent-kafka is not installed. Install mysql-interceptor[confluent].") from e
-
         self._topic = topic
-        conf = {
-            "bootstrap.servers": bootstrap_servers,
-            "client.id": client_id,
-            "acks": acks,
-            "retries": retries,
-            "linger.ms": linger_ms,
-            "batch.size": batch_size,
-            "queue.buffering.max.kbytes": max(1, buffer_memory // 1024),
-        }
-        if adaptive_partitioning_enabled is False:
-            conf["debug"] = conf.get("debug", "")
-        self._producer = Producer(conf)
+        self._serializer = serializer or _json_serializer
+        if producer is None:
+            try:
+                from confluent_kafka import Producer  # type: ignore
+            except Exception as e:
+                raise PublisherError("confluent-kafka is not installed. Install mysql-interceptor[confluent].") from e
+
+            # librdkafka has no adaptive partitioner: adaptive_partitioning_enabled is
+            # accepted for Java compatibility only (set "partitioner" through extra_conf).
+            conf = producer_conf(
+                {
+                    "bootstrap.servers": bootstrap_servers,
+                    "client.id": client_id,
+                    "acks": acks,
+                    "retries": retries,
+                    "linger.ms": linger_ms,
+                    "batch.size": batch_size,
+                    "queue.buffering.max.kbytes": max(1, buffer_memory // 1024),
+                },
+                profile=profile,
+                overrides=extra_conf,
+            )
+            self._new_producer = lambda: Producer(conf)
+        else:
+            self._new_producer = None
+        self._producer = producer
+        self.circuit = circuit
+        if circuit is not None and circuit.poll is None:
+            circuit.poll = self._poll
+
+        self._spill_dir = spill_dir or None
+        self._spill_max_bytes = spill_max_bytes
+        self._spill: Optional[SpillQueue] = None
+        self._spilling = False
+        self._replay_batch_size = max(1, replay_batch_size)
+        self._replay_timeout_s = replay_timeout_s
+        self._replay_backoff_s = replay_backoff_s
+        self._produce_timeout_s = max(0.0, produce_timeout_s)
+        self._close_timeout_s = max(0.0, close_timeout_s)
+        self.spilled = 0
+        self.replayed = 0
+        self.dropped = 0
+        self._reset_threading()
+        reinit_after_fork(self)
+
+    def _reset_threading(self) -> None:
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._spill_wake = threading.Event()
+        self._closed = threading.Event()
+        self._replayer: Optional[threading.Thread] = None
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._started:
+                return
+            if self._producer is None and self._new_producer is not None:
+                self._producer = self._new_producer()
+            if self._spill_dir and self._spill is None:
+                directory = claim_worker_dir(self._spill_dir)
+                if directory is None:
+                    logger.warning("No free spill slot under %s; spilling disabled in this process", self._spill_dir)
+                else:
+                    self._spill = SpillQueue(directory, max_bytes=self._spill_max_bytes)
+                    self._spilling = not self._spill.empty
+            if self._spill is not None:
+                self._replayer = threading.Thread(
+                    target=self._replay_loop, name="mysql-interceptor-spill-replay", daemon=True
+                )
+                self._replayer.start()
+            self._started = True
+
+    def _after_fork_in_child(self) -> None:
+        # The parent's producer handle and replay thread are unusable here, and its
+        # spill directory is still the parent's. Rebuild all three on first publish.
+        if self._new_producer is not None:
+            self._producer = None
+        self._spill = None
+        self._spilling = False
+        self._reset_threading()
+
+    def warmup(self, timeout: float) -> bool:
+        """Create the producer and fetch the topic's metadata; True if the topic is known."""
+        if not self._started:
+            self._start()
+        metadata = self._producer.list_topics(self._topic, timeout=timeout)
+        topic = metadata.topics.get(self._topic)
+        return topic is not None and topic.error is None
+
+    def _poll(self) -> None:
+        if self._started:
+            self._producer.poll(0)
 
     def publish(self, event: SqlLogMessage) -> None:
+        self.publish_batch([event])
+
+    def serialize(self, event: SqlLogMessage) -> bytes:
+        return self._serializer(event)
+
+    def publish_serialized(self, values: List[memoryview], *, key: Optional[int] = None) -> None:
+        """Produce already-serialized values (e.g. a transaction arena) under one key."""
+        k = str(key or "")
+        self._produce_batch([(k, v) for v in values])
+
+    def publish_batch(self, events: List[SqlLogMessage]) -> None:
+        records: List[Tuple[str, Any]] = []
+        keys: Dict[Any, str] = {}
+        serialize = self._serializer
+        for e in events:
+            try:
+                value = serialize(e)
+            except Exception:
+                logger.exception("Failed to serialize event for Kafka")
+                continue
+            cid = e.connectionId
+            key = keys.get(cid)
+            if key is None:
+                key = keys[cid] = str(cid or "")
+            records.append((key, value))
+        self._produce_batch(records)
+
+    def _produce_batch(self, records: List[Tuple[str, Any]]) -> None:
+        if not self._started:
+            self._start()
+        producer = self._producer
+        produce = self._produce
+        deadline = 0.0
+        backoff = 0.0
+        for i, (key, value) in enumerate(records):
+            while True:
+                try:
+                    produce(key, value)
+                    break
+                except BufferError:
+                    # Local queue full: serve delivery callbacks to make room, then retry.
+                    now = time.monotonic()
+                    if not deadline:
+                        deadline = now + self._produce_timeout_s
+                        backoff = 0.001
+                    if now >= deadline:
+                        self._drop(len(records) - i)
+                        self._poll_once()
+                        return
+                    try:
+                        producer.poll(min(backoff, deadline - now))
+                    except Exception:
+                        logger.exception("Failed to poll Kafka producer")
+                    backoff = min(backoff * 2, 0.1)
+                except Exception:
+                    logger.exception("Failed to produce message to Kafka")
+                    if self.circuit is not None:
+                        self.circuit.record_failure()
+                    break
+        self._poll_once()
+
+    def _poll_once(self) -> None:
         try:
-            self._producer.produce(
-                self._topic,
-                key=str(event.connectionId or ""),
-                value=_json_serializer(event),
-                on_delivery=self._on_delivery,
-            )
             self._producer.poll(0)
         except Exception:
-            logger.exception("Failed to produce message to Kafka")
+            logger.exception("Failed to poll Kafka producer")
+
+    def _drop(self, n: int) -> None:
+        self.dropped += n
+        logger.error(
+            "Kafka producer queue still full after %.3fs; dropped %d event(s)", self._produce_timeout_s, n
+        )
+        if self.circuit is not None:
+            self.circuit.record_failure()
+
+    def _produce(self, key: str, value: Any) -> None:
+        if self._spill is not None:
+            if self._spilling:
+                self._spill_records([(key.encode("utf-8"), bytes(value))])
+                return
+            try:
+                self._producer.produce(self._topic, key=key, value=value, on_delivery=self._on_delivery)
+                return
+            except BufferError:
+                # Serve delivery callbacks first: earlier failed records spill ahead of this one.
+                self._producer.poll(0)
+            if not self._spilling:
+                try:
+                    self._producer.produce(self._topic, key=key, value=value, on_delivery=self._on_delivery)
+                    return
+                except BufferError:
+                    pass
+            self._spill_records([(key.encode("utf-8"), bytes(value))])
+            return
+        self._producer.produce(self._topic, key=key, value=value, on_delivery=self._on_delivery)
 
     def _on_delivery(self, err, msg):
+        circuit = self.circuit
+        if circuit is not None:
+            if err is None:
+                circuit.record_success()
+                summary = circuit.pop_summary()
+                if summary is not None:
+                    try:
+                        self._produce("", self._serializer(summary))  # type: ignore[arg-type]
+                    except Exception:
+                        logger.exception("Failed to produce outage summary to Kafka")
+            else:
+                circuit.record_failure()
         if err is not None:
+            if self._spill is not None:
+                key = msg.key() or b""
+                self._spill_records([(key if isinstance(key, bytes) else str(key).encode("utf-8"), msg.value())])
+                return
             logger.error("Failed to deliver message to Kafka: %s", err)
 
-    def publish_batch(self, events: List[SqlLogMessage]) -> None:
-        for e in events:
-            self.publish(e)
+    def _spill_records(self, records: List[Tuple[bytes, bytes]]) -> None:
+        assert self._spill is not None
+        with self._spill_lock:
+            if not self._spilling:
+                logger.warning("Kafka producer saturated or failing; spilling events to %s", self._spill.directory)
+            self._spilling = True
+            self.spilled += self._spill.append(records)
+        self._spill_wake.set()
+
+    def _replay_loop(self) -> None:
+        assert self._spill is not None
+        backoff = self._replay_backoff_s
+        while not self._closed.is_set():
+            if not self._spilling:
+                self._spill_wake.wait(1.0)
+                self._spill_wake.clear()
+                continue
+            records, position = self._spill.read_batch(self._replay_batch_size)
+            if not records:
+                self._spill.commit(position)  # past a torn tail, if the read skipped one
+                with self._spill_lock:
+                    if self._spill.empty:
+                        self._spilling = False
+                        logger.warning("Kafka spill drained; producing directly again")
+                        continue
+                self._closed.wait(self._replay_backoff_s)  # nothing readable yet: don't spin
+                continue
+            if self._replay(records):
+                self._spill.commit(position)
+                self.replayed += len(records)
+                backoff = self._replay_backoff_s
+            else:
+                self._closed.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def _replay(self, records: List[Tuple[bytes, bytes]]) -> bool:
+        failed = [0]
 
-    def flush(self) -> None:
-        self._producer.flush()
+        def on_delivery(err, msg) -> None:
+            if err is not None:
+                failed[0] += 1
+
+        deadline = time.monotonic() + self._replay_timeout_s
+        try:
+            for key, value in records:
+                while True:
+                    try:
+                        self._producer.produce(self._topic, key=key, value=value, on_delivery=on_delivery)
+                        break
+                    except BufferError:
+                        # Local queue full: serve delivery callbacks to make room.
+                        if time.monotonic() >= deadline:
+                            return False
+                        self._producer.poll(0.1)
+                if failed[0]:
+                    return False
+            remaining = self._producer.flush(max(0.0, deadline - time.monotonic()))
+        except Exception:
+            logger.exception("Failed to replay spilled messages to Kafka")
+            return False
+        return failed[0] == 0 and not remaining
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for outstanding deliveries; False if some were still pending after ``timeout``."""
+        if not self._started:
+            return True
+        remaining = self._producer.flush() if timeout is None else self._producer.flush(timeout)
+        return not remaining
+
+    def request_flush(self) -> None:
+        """Serve delivery callbacks without blocking; librdkafka sends on its own threads."""
+        if self._started:
+            self._producer.poll(0)
 
     def close(self) -> None:
-        self.flush()
+        """Stop the replay thread and deliver what is queued, within ``close_timeout_s`` in all."""
+        deadline = time.monotonic() + self._close_timeout_s
+        self._closed.set()
+        self._spill_wake.set()
+        if self._replayer is not None:
+            self._replayer.join(timeout=max(0.0, deadline - time.monotonic()))
+        if not self.flush(max(0.0, deadline - time.monotonic())):
+            logger.warning("Kafka deliveries still pending after %.1fs; closing anyway", self._close_timeout_s)
+        if self._spill is not None:
+            self._spill.close()
+            if self._replayer is None or not self._replayer.is_alive():
+                release_worker_dir(self._spill.directory)
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import json
+import logging
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from ..errors import PublisherError
+from ..events.models import SqlLogMessage, TxnSummaryMessage
+from ..forksafe import reinit_after_fork
+from .confluent import _json_serializer
+
+logger = logging.getLogger(__name__)
+
+NDJSON = "ndjson"
+LENGTH_PREFIXED = "length-prefixed"
+FORMATS = (NDJSON, LENGTH_PREFIXED)
+
+# Length-prefixed envelope: MAGIC, then (value length, value) per event.
+MAGIC = b"MIE\x01"
+_LEN = struct.Struct(">I")
+
+# How a serialized TxnSummaryMessage starts (recordType is its first field).
+_TXN_SUMMARY_PREFIX = b'{"recordType":"txnSummary"'
+
+
+def pack(values: Sequence[Any], fmt: str = NDJSON) -> bytes:
+    """One Kafka record value holding ``values`` (serialized events) in order."""
+    if fmt == NDJSON:
+        return b"\n".join(bytes(v) for v in values)
+    parts: List[bytes] = [MAGIC]
+    for v in values:
+        parts.append(_LEN.pack(len(v)))
+        parts.append(bytes(v))
+    return b"".join(parts)
+
+
+def unpack(payload: bytes) -> List[bytes]:
+    """The serialized events in a record value.
+
+    Accepts both envelope formats and plain one-event records (a single JSON
+    document is a one-line NDJSON envelope; a binary record is returned as
+    is), so consumers need not know how the producer was configured.
+    """
+    if payload[: len(MAGIC)] == MAGIC:
+        out: List[bytes] = []
+        pos = len(MAGIC)
+        n = len(payload)
+        while pos + _LEN.size <= n:
+            (length,) = _LEN.unpack_from(payload, pos)
+            pos += _LEN.size
+            if pos + length > n:
+                raise ValueError(f"truncated envelope: record of {length} bytes at offset {pos}")
+            out.append(bytes(payload[pos : pos + length]))
+            pos += length
+        if pos != n:
+            raise ValueError(f"trailing bytes in envelope at offset {pos}")
+        return out
+    if payload[:1] == b"\x00":
+        return [bytes(payload)]  # one binary record (kafka.serializers), not an envelope
+    # JSON escapes newlines inside strings, so every line is one event.
+    return [line for line in bytes(payload).split(b"\n") if line.strip()]
+
+
+def iter_events(payload: bytes, decoder: Any = None) -> Iterator[Dict[str, Any]]:
+    """Decoded events of a record value (see ``unpack``).
+
+    JSON events are parsed here; binary ones need ``decoder`` (a
+    ``serializers.BinaryDecoder``), else they raise ValueError.
+    """
+    for value in unpack(payload):
+        if value[:1] == b"\x00":
+            if decoder is None:
+                raise ValueError("binary record in envelope; pass a BinaryDecoder to iter_events()")
+            yield decoder.decode(value)
+        else:
+            yield json.loads(value)
+
+
+class _Open:
+    __slots__ = ("parts", "nbytes", "opened")
+
+    def __init__(self, opened: float, nbytes: int) -> None:
+        self.parts: List[Any] = []
+        self.nbytes = nbytes
+        self.opened = opened
+
+
+class EnvelopePublisher:
+    """Pack many events into one Kafka record per connection.
+
+    Each event is otherwise its own Kafka record, and per-record overhead
+    (record headers, delivery callbacks, offsets) dominates small payloads.
+    This stage serializes events with ``inner.serialize`` and keeps one open
+    envelope per connection id (the Kafka key), so per-connection order and
+    partitioning are unchanged. An envelope is handed to
+    ``inner.publish_serialized`` once adding the next event would exceed
+    ``max_bytes``, once it has been open ``max_delay_s`` (checked on every
+    publish and by a timer thread), and on ``flush()``/``request_flush()``.
+
+    With ``txn_boundaries`` an envelope also closes at the end of each
+    transaction, right after its ``txnSummary`` record
+    (``INTERCEPTOR_EMIT_TXN_SUMMARY``), which follows the transaction's
+    statements on the same connection; one commit then maps to one record
+    unless it outgrows ``max_bytes``. Summaries are recognized as objects in
+    ``publish_batch`` and by their leading bytes in ``publish_serialized``
+    (pre-serialized values): the JSON prefix, or for the binary wire format
+    the schema id header of ``serializer`` (pass the one producing them).
+
+    ``fmt`` is ``ndjson`` (events joined by newlines) or ``length-prefixed``
+    (``MAGIC`` then a 4-byte big-endian length before each event); ``unpack``
+    reads both, and plain one-event records too.
+    """
+
+    def __init__(
+        self,
+        *,
+        inner: Any,
+        fmt: str = NDJSON,
+        max_bytes: int = 262_144,
+        max_delay_s: float = 0.1,
+        txn_boundaries: bool = False,
+        serializer: Optional[Callable[[Any], bytes]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if fmt not in FORMATS:
+            raise PublisherError(f"Unknown envelope format {fmt!r}; expected one of {', '.join(FORMATS)}")
+        if not callable(getattr(inner, "publish_serialized", None)):
+            raise PublisherError("EnvelopePublisher needs an inner publisher with publish_serialized()")
+        self._inner = inner
+        self._serialize = serializer or getattr(inner, "serialize", None) or _json_serializer
+        self._fmt = fmt
+        # Envelope bytes besides the values: the header, and a separator or length per value.
+        self._header = 0 if fmt == NDJSON else len(MAGIC)
+        self._per_value = 1 if fmt == NDJSON else _LEN.size
+        self._max_bytes = max(1, max_bytes)
+        self._max_delay_s = max_delay_s
+        self._txn_boundaries = txn_boundaries
+        # Binary values (kafka.serializers.BinarySerializer) are told apart by their schema id header.
+        header = getattr(serializer, "header", None)
+        self._txn_header = header(TxnSummaryMessage) if txn_boundaries and callable(header) else None
+        self._clock = clock
+        self.circuit = getattr(inner, "circuit", None)
+        self.envelopes = 0
+        self.events = 0
+        self._reset()
+        reinit_after_fork(self)
+
+    def _reset(self) -> None:
+        self._lock = threading.Lock()
+        self._open: Dict[Optional[int], _Open] = {}
+        self._stop = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+
+    def _after_fork_in_child(self) -> None:
+        # Open envelopes are the parent's to publish; the timer thread stayed there too.
+        self._reset()
+
+    def serialize(self, event: SqlLogMessage) -> bytes:
+        return self._serialize(event)
+
+    def publish(self, event: SqlLogMessage) -> None:
+        self.publish_batch([event])
+
+    def publish_batch(self, events: List[SqlLogMessage]) -> None:
+        if not events:
+            return
+        if self._timer is None:
+            self._start_timer()
+        serialize = self._serialize
+        with self._lock:
+            now = self._clock()
+            for e in events:
+                try:
+                    value = serialize(e)
+                except Exception:
+                    logger.exception("Failed to serialize event for an envelope")
+                    continue
+                key = getattr(e, "connectionId", None)
+                self._add(key, value, now)
+                if self._txn_boundaries and isinstance(e, TxnSummaryMessage):
+                    self._close(key)
+            self._close_aged(now)
+
+    def publish_serialized(self, values: List[memoryview], *, key: Optional[int] = None) -> None:
+        if not values:
+            return
+        if self._timer is None:
+            self._start_timer()
+        with self._lock:
+            now = self._clock()
+            for v in values:
+                self._add(key, v, now)
+                if self._txn_boundaries and self._ends_txn(v):
+                    self._close(key)
+            self._close_aged(now)
+
+    def flush(self, timeout: Optional[float] = None) -> Any:
+        with self._lock:
+            self._close_all()
+        return self._inner.flush() if timeout is None else self._inner.flush(timeout)
+
+    def request_flush(self) -> None:
+        with self._lock:
+            self._close_all()
+        request_flush = getattr(self._inner, "request_flush", None)
+        if request_flush is not None:
+            request_flush()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._timer is not None:
+            self._timer.join(timeout=1.0)
+        with self._lock:
+            self._close_all()
+        self._inner.close()
+
+    def _ends_txn(self, value: Any) -> bool:
+        head = bytes(value[: len(_TXN_SUMMARY_PREFIX)])
+        if head[:1] == b"\x00":
+            return self._txn_header is not None and head[: len(self._txn_header)] == self._txn_header
+        return head == _TXN_SUMMARY_PREFIX
+
+    def _add(self, key: Optional[int], value: Any, now: float) -> None:
+        size = len(value) + self._per_value
+        env = self._open.get(key)
+        if env is None:
+            env = self._open[key] = _Open(now, self._header)
+        elif env.nbytes + size > self._max_bytes:
+            self._close(key)
+            env = self._open[key] = _Open(now, self._header)
+        env.parts.append(value)
+        env.nbytes += size
+
+    def _close(self, key: Optional[int]) -> None:
+        env = self._open.pop(key, None)
+        if env is None or not env.parts:
+            return
+        try:
+            self._inner.publish_serialized([pack(env.parts, self._fmt)], key=key)
+        except Exception:
+            logger.exception("Failed to publish envelope")
+        self.envelopes += 1
+        self.events += len(env.parts)
+
+    def _close_aged(self, now: float) -> None:
+        cutoff = now - self._max_delay_s
+        for key in [k for k, env in self._open.items() if env.opened <= cutoff]:
+            self._close(key)
+
+    def _close_all(self) -> None:
+        for key in list(self._open):
+            self._close(key)
+
+    def _start_timer(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Thread(target=self._tick, name="mysql-interceptor-envelope", daemon=True)
+            self._timer.start()
+
+    def _tick(self) -> None:
+        interval = max(0.001, self._max_delay_s / 2)
+        while not self._stop.wait(interval):
+            with self._lock:
+                self._close_aged(self._clock())
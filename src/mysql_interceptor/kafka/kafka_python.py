@@ -1,15 +1,17 @@
 from __future__ import annotations
 
-import json
-from typing import Any, Optional
+from typing import Any, Callable, List, Optional
 
 from .publisher import Publisher
+from .serializers import json_dumps
 
 
 class KafkaPythonPublisher(Publisher):
     """Publisher implementation based on the `kafka-python` package.
 
     This module is optional; it is imported dynamically in connect._build_default_kafka_publisher.
+    Values are encoded by ``serializer`` (the default JSON encoder unless
+    given) and keyed by connection id, like ConfluentKafkaPublisher.
     """
 
     def __init__(
@@ -22,6 +24,7 @@ class KafkaPythonPublisher(Publisher):
         linger_ms: int,
         batch_size: int,
         buffer_memory: int,
+        serializer: Optional[Callable[[Any], bytes]] = None,
     ) -> None:
         try:
             from kafka import KafkaProducer  # type: ignore
@@ -29,6 +32,7 @@ class KafkaPythonPublisher(Publisher):
             raise ImportError("kafka-python is not installed") from e
 
         self._topic = topic
+        self._serializer = serializer or json_dumps
         self._producer = KafkaProducer(
             bootstrap_servers=bootstrap_servers.split(",") if isinstance(bootstrap_servers, str) else bootstrap_servers,
             acks=acks,
@@ -36,19 +40,27 @@ class KafkaPythonPublisher(Publisher):
             linger_ms=linger_ms,
             batch_size=batch_size,
             buffer_memory=buffer_memory,
-            value_serializer=lambda v: json.dumps(v, separators=(",", ":")).encode("utf-8"),
         )
 
+    def serialize(self, msg: Any) -> bytes:
+        return self._serializer(msg)
+
     def publish(self, msg: Any) -> None:
         # Fire-and-forget; errors are handled by the interceptor's best-effort wrappers.
-        self._producer.send(self._topic, msg.model_dump(by_alias=True))
+        key = getattr(msg, "connectionId", None)
+        self._producer.send(self._topic, key=str(key or "").encode("utf-8"), value=self._serializer(msg))
 
-    def publish_batch(self, msgs: list[Any]) -> None:
+    def publish_batch(self, msgs: List[Any]) -> None:
         for m in msgs:
             self.publish(m)
 
-    def flush(self, timeout_s: Optional[float] = None) -> None:
-        self._producer.flush(timeout=timeout_s)
+    def publish_serialized(self, values: List[memoryview], *, key: Optional[int] = None) -> None:
+        k = str(key or "").encode("utf-8")
+        for v in values:
+            self._producer.send(self._topic, key=k, value=bytes(v))
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        self._producer.flush(timeout=timeout)
 
     def close(self) -> None:
         try:
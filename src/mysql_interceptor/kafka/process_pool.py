@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import operator
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import fields, is_dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from ..errors import PublisherError
+from ..events.models import SqlLogMessage
+from ..forksafe import reinit_after_fork
+from .confluent import _json_serializer
+from .serializers import json_encoder
+
+logger = logging.getLogger(__name__)
+
+# (field names, field values) -- names is one shared tuple per record class, which
+# pickle memoizes, so each row costs little more than its values.
+_Row = Tuple[Tuple[str, ...], Tuple[Any, ...]]
+
+_GETTERS: Dict[type, Tuple[Tuple[str, ...], Callable[[Any], Tuple[Any, ...]]]] = {}
+
+
+def _to_row(event: Any) -> Optional[_Row]:
+    cls = type(event)
+    entry = _GETTERS.get(cls)
+    if entry is None:
+        if not is_dataclass(cls):
+            return None
+        names = tuple(f.name for f in fields(cls))
+        getter = operator.attrgetter(*names)
+        entry = (names, getter)
+        _GETTERS[cls] = entry
+    names, getter = entry
+    values = getter(event)
+    return names, (values if len(names) > 1 else (values,))
+
+
+def _serialize_rows(rows: List[_Row], backend: Optional[str] = None) -> List[bytes]:
+    """Runs in the pool processes; output matches confluent._json_serializer."""
+    _, encode = json_encoder(backend)
+    return [encode(dict(zip(names, values))) for names, values in rows]
+
+
+class ProcessPoolSerializingPublisher:
+    """Serialize batches in a small pool of processes; produce the bytes here.
+
+    JSON encoding in a publisher thread competes for the GIL with application
+    threads. This stage ships compact rows (field values, not dicts) to
+    ``processes`` serializer processes over pipes and hands the returned bytes
+    to ``inner.publish_serialized()``, keeping per-connection order. Up to
+    ``processes`` batches are in flight at once; results are handed over in
+    submission order. The pool processes encode with ``json_backend``
+    (``serializers.json_encoder``). Records that cannot be turned into rows, or
+    a broken pool, fall back to in-thread serialization.
+    """
+
+    def __init__(
+        self, *, inner: Any, processes: int = 2, mp_context: str = "spawn", json_backend: Optional[str] = None
+    ) -> None:
+        if not callable(getattr(inner, "publish_serialized", None)):
+            raise PublisherError("ProcessPoolSerializingPublisher needs an inner publisher with publish_serialized()")
+        self._inner = inner
+        self.circuit = getattr(inner, "circuit", None)
+        self._processes = max(1, processes)
+        self._mp_context = mp_context
+        self._json_backend = json_backend
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._unavailable = False
+        self._lock = threading.Lock()
+        # Submitted batches, oldest first; published in this order.
+        self._inflight: Deque[Tuple[List[SqlLogMessage], "Future[List[bytes]]"]] = deque()
+        self._window_lock = threading.Lock()
+        reinit_after_fork(self)
+
+    def publish(self, event: SqlLogMessage) -> None:
+        self.publish_batch([event])
+
+    def publish_batch(self, events: List[SqlLogMessage]) -> None:
+        if not events:
+            return
+        rows: List[_Row] = []
+        for e in events:
+            row = _to_row(e)
+            if row is None:
+                with self._window_lock:
+                    self._drain(None)  # earlier batches go out first
+                    self._inner.publish_batch(events)
+                return
+            rows.append(row)
+
+        future: Optional["Future[List[bytes]]"] = None
+        pool = self._get_pool()
+        if pool is not None:
+            try:
+                future = pool.submit(_serialize_rows, rows, self._json_backend)
+            except Exception:
+                logger.warning("Serializer process pool failed; serializing in-thread", exc_info=True)
+                self._discard_pool()
+        with self._window_lock:
+            if future is None:
+                self._drain(None)
+                self._publish_runs(events, self._serialize_here(events))
+                return
+            self._inflight.append((events, future))
+            # Hand over what is done; wait for the oldest only while the window is full.
+            while self._inflight and (self._inflight[0][1].done() or len(self._inflight) > self._processes):
+                self._publish_oldest(None)
+
+    def serialize(self, event: SqlLogMessage) -> bytes:
+        return self._inner.serialize(event)
+
+    def publish_serialized(self, values: List[memoryview], *, key: Optional[int] = None) -> None:
+        self._inner.publish_serialized(values, key=key)
+
+    def flush(self, timeout: Optional[float] = None) -> Any:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._window_lock:
+            if not self._drain(deadline):
+                return False
+        if deadline is None:
+            return self._inner.flush()
+        return self._inner.flush(max(0.0, deadline - time.monotonic()))
+
+    def request_flush(self) -> None:
+        request_flush = getattr(self._inner, "request_flush", None)
+        if request_flush is not None:
+            request_flush()
+
+    def close(self) -> None:
+        with self._window_lock:
+            self._drain(None)
+        self._discard_pool()
+        self._inner.close()
+
+    def _drain(self, deadline: Optional[float]) -> bool:
+        """Publish every in-flight batch in order (window lock held); False if ``deadline`` passed first."""
+        while self._inflight:
+            if not self._publish_oldest(deadline):
+                return False
+        return True
+
+    def _publish_oldest(self, deadline: Optional[float]) -> bool:
+        events, future = self._inflight[0]
+        try:
+            values = future.result(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        except TimeoutError:
+            return False
+        except Exception:
+            logger.warning("Serializer process pool failed; serializing in-thread", exc_info=True)
+            self._discard_pool()
+            values = self._serialize_here(events)
+        self._inflight.popleft()
+        self._publish_runs(events, values)
+        return True
+
+    def _serialize_here(self, events: Sequence[Any]) -> List[bytes]:
+        serialize = getattr(self._inner, "serialize", None) or _json_serializer
+        return [serialize(e) for e in events]
+
+    def _publish_runs(self, events: Sequence[Any], values: List[bytes]) -> None:
+        # One publish_serialized() call per run of consecutive same-connection events.
+        start = 0
+        n = len(events)
+        while start < n:
+            key = getattr(events[start], "connectionId", None)
+            end = start + 1
+            while end < n and getattr(events[end], "connectionId", None) == key:
+                end += 1
+            self._inner.publish_serialized(values[start:end], key=key)
+            start = end
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        with self._lock:
+            if self._pool is None and not self._unavailable:
+                try:
+                    ctx = multiprocessing.get_context(self._mp_context)
+                    self._pool = ProcessPoolExecutor(max_workers=self._processes, mp_context=ctx)
+                except Exception:
+                    logger.warning("Could not start serializer processes; serializing in-thread", exc_info=True)
+                    self._unavailable = True
+            return self._pool
+
+    def _after_fork_in_child(self) -> None:
+        # The executor's management thread stayed in the parent; start a fresh pool on demand.
+        self._pool = None
+        self._unavailable = False
+        self._lock = threading.Lock()
+        self._inflight = deque()  # the parent publishes its own batches
+        self._window_lock = threading.Lock()
+
+    def _discard_pool(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            try:
+                pool.shutdown(wait=True, cancel_futures=True)
+            except Exception:
+                pass
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# librdkafka properties per throughput profile. Captured statements are
+# repetitive JSON (the same SQL text, keys and hosts over and over), so larger
+# batches compress far better; the profiles trade delivery latency for that.
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "low-latency": {
+        "linger.ms": 5,
+        "batch.num.messages": 1000,
+        "compression.type": "none",
+    },
+    "balanced": {
+        "linger.ms": 20,
+        "batch.size": 262_144,
+        "batch.num.messages": 10_000,
+        "compression.type": "lz4",
+    },
+    "max-throughput": {
+        "linger.ms": 100,
+        "batch.size": 1_048_576,
+        "batch.num.messages": 100_000,
+        "queue.buffering.max.messages": 1_000_000,
+        "compression.type": "zstd",
+    },
+}
+
+
+def parse_conf(entries: Sequence[str]) -> Dict[str, str]:
+    """``["key=value", ...]`` as a dict; malformed entries are logged and skipped."""
+    out: Dict[str, str] = {}
+    for entry in entries:
+        key, sep, value = entry.partition("=")
+        key = key.strip()
+        if not sep or not key:
+            logger.warning("Ignoring malformed Kafka conf entry %r (expected key=value)", entry)
+            continue
+        out[key] = value.strip()
+    return out
+
+
+def producer_conf(
+    base: Dict[str, Any], *, profile: Optional[str] = None, overrides: Sequence[str] = ()
+) -> Dict[str, Any]:
+    """librdkafka conf: ``base``, then the profile's properties, then ``overrides``."""
+    conf = dict(base)
+    if profile:
+        props = PROFILES.get(profile.strip().lower())
+        if props is None:
+            logger.warning("Unknown Kafka profile %r; expected one of %s", profile, ", ".join(PROFILES))
+        else:
+            conf.update(props)
+    conf.update(parse_conf(overrides))
+    return conf
@@ -1,35 +1,43 @@
 from __future__ import annotations
 
-from typing import List, Protocol, runtime_checkable
+import json
+from typing import Any, Callable, List, Optional, Protocol, runtime_checkable
 
 from ..events.models import SqlLogMessage
+from .serializers import json_dumps
 
 
 @runtime_checkable
 class Publisher(Protocol):
     def publish(self, event: SqlLogMessage) -> None: ...
     def publish_batch(self, events: List[SqlLogMessage]) -> None: ...
-    def flush(self) -> None: ...
+    # Block until queued events are delivered, for at most ``timeout`` seconds if given.
+    def flush(self, timeout: Optional[float] = None) -> Any: ...
     def close(self) -> None: ...
 
 
 class StdoutPublisher:
-    def __init__(self, *, pretty: bool = False) -> None:
+    def __init__(self, *, pretty: bool = False, serializer: Optional[Callable[[Any], bytes]] = None) -> None:
         self._pretty = pretty
+        self._serializer = serializer or json_dumps
 
-    def publish(self, event: SqlLogMessage) -> None:
-        import json
-        payload = event.to_dict()
+    def serialize(self, event: SqlLogMessage) -> bytes:
         if self._pretty:
-            print(json.dumps(payload, indent=2, ensure_ascii=False, default=str))
-        else:
-            print(json.dumps(payload, ensure_ascii=False, default=str, separators=(",", ":")))
+            return json.dumps(event.to_dict(), indent=2, ensure_ascii=False, default=str).encode("utf-8")
+        return self._serializer(event)
+
+    def publish(self, event: SqlLogMessage) -> None:
+        print(self.serialize(event).decode("utf-8"))
+
+    def publish_serialized(self, values: List[memoryview], *, key: Optional[int] = None) -> None:
+        for v in values:
+            print(bytes(v).decode("utf-8"))
 
     def publish_batch(self, events: List[SqlLogMessage]) -> None:
         for e in events:
             self.publish(e)
 
-    def flush(self) -> None:
+    def flush(self, timeout: Optional[float] = None) -> None:
         return None
 
     def close(self) -> None:
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple
+
+from ..config.settings import Settings
+from ..forksafe import reinit_after_fork
+from .publisher import Publisher
+
+logger = logging.getLogger(__name__)
+
+_Key = Tuple[Tuple[str, Any], ...]
+
+# The Settings fields _build_publisher_stack() reads: Kafka conf and topic, sink choice, serializer, envelopes,
+# sessions, bootstrap, spill, circuit breaker and the queueing publisher. Capture policy, redaction and payload
+# toggles are applied per connection and must not split the process's producer.
+PUBLISHER_FIELDS: Tuple[str, ...] = (
+    "kafka_bootstrap_servers", "kafka_topic", "kafka_acks", "kafka_retries", "kafka_linger_ms", "kafka_batch_size",
+    "kafka_buffer_memory", "kafka_adaptive_partitioning_enabled", "kafka_profile", "kafka_conf",
+    "kafka_produce_timeout_s", "wire_format", "schema_registry_dir", "json_backend",
+    "envelope_format", "envelope_max_bytes", "envelope_max_delay_s", "envelope_txn_boundaries",
+    "session_records", "session_refresh_s",
+    "kafka_async_bootstrap", "bootstrap_max_pending", "bootstrap_warmup_timeout_s",
+    "spill_dir", "spill_max_bytes", "sidecar_socket",
+    "circuit_breaker", "circuit_failure_threshold", "circuit_reset_timeout_s", "service_name",
+    "enable_queueing_publisher", "publish_queue_maxsize", "publish_queue_max_bytes", "priority_lanes",
+    "publish_read_queue_maxsize", "degrade_under_load", "degrade_params_at", "degrade_sql_at", "degrade_reads_at",
+    "degrade_writes_at", "publish_batch_size", "publish_flush_interval_s", "publish_workers", "thread_staging",
+    "deferred_capture", "serializer_processes", "backpressure", "shutdown_flush_timeout_s",
+)
+
+
+def settings_key(settings: Settings) -> _Key:
+    """Hashable identity of the publisher stack these settings build (list fields become tuples)."""
+    return tuple(
+        (name, tuple(v) if isinstance(v, list) else v) for name in PUBLISHER_FIELDS for v in (getattr(settings, name),)
+    )
+
+
+class PublisherRegistry:
+    """Publishers shared process-wide, one per distinct publisher stack (see ``PUBLISHER_FIELDS``).
+
+    ``get()`` returns the publisher for the settings, building it with
+    ``factory`` on first use. A publisher stays registered and open for the
+    life of the process: a sequential connect()/close() loop must not build
+    and tear down a producer per connection, and closing one would block the
+    closing thread on Kafka. ``flush_all()`` gives every registered publisher
+    a bounded ``flush(timeout)`` of its ``shutdown_flush_timeout_s``;
+    ``SHARED_PUBLISHERS`` runs it at interpreter exit.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._by_key: Dict[_Key, Publisher] = {}
+        self._flush_timeouts: Dict[int, float] = {}
+        reinit_after_fork(self)
+
+    def get(self, settings: Settings, factory: Callable[[Settings], Publisher]) -> Publisher:
+        key = settings_key(settings)
+        with self._lock:
+            publisher = self._by_key.get(key)
+            if publisher is None:
+                # Built under the lock: concurrent first connects wait for one bootstrap.
+                publisher = self._by_key[key] = factory(settings)
+                self._flush_timeouts[id(publisher)] = settings.shutdown_flush_timeout_s
+            return publisher
+
+    def flush_all(self) -> bool:
+        """Flush every registered publisher until its ``shutdown_flush_timeout_s`` (counted from this call) runs out."""
+        with self._lock:
+            pending = [(p, self._flush_timeouts[id(p)]) for p in self._by_key.values()]
+        ok = True
+        start = time.monotonic()
+        for publisher, timeout in pending:
+            try:
+                remaining = max(0.0, timeout - (time.monotonic() - start))
+                ok = publisher.flush(remaining) is not False and ok
+            except Exception:
+                logger.warning("Failed to flush shared publisher at exit", exc_info=True)
+                ok = False
+        if not ok:
+            logger.warning("Some interceptor events were not delivered before exit")
+        return ok
+
+    def _after_fork_in_child(self) -> None:
+        self._lock = threading.Lock()  # the publishers themselves reinitialize on their own
+
+
+SHARED_PUBLISHERS = PublisherRegistry()
+atexit.register(SHARED_PUBLISHERS.flush_all)
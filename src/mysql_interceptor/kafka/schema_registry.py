@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+_PREFIX = "schema-"
+_SUFFIX = ".json"
+
+
+def _canonical(schema: Dict[str, Any]) -> str:
+    return json.dumps(schema, sort_keys=True, separators=(",", ":"))
+
+
+class FileSchemaRegistry:
+    """Local stand-in for a schema registry: one JSON file per schema in ``directory``.
+
+    ``register(subject, schema)`` returns the id of an identical schema
+    already registered under the subject, or allocates the next id with an
+    exclusive file create, so several processes sharing the directory agree
+    on ids. Each file holds ``{"id", "subject", "version", "schema"}``;
+    versions count per subject from 1. Producers and consumers only need
+    the same directory (a shared volume, or a copy shipped with the
+    consumer) to agree on ids.
+    """
+
+    def __init__(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self._dir = directory
+        self._lock = threading.Lock()
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+
+    @property
+    def directory(self) -> str:
+        return self._dir
+
+    def register(self, subject: str, schema: Dict[str, Any]) -> int:
+        canonical = _canonical(schema)
+        with self._lock:
+            while True:
+                entries = self._scan()
+                version = 1
+                for sid, entry in entries.items():
+                    if entry["subject"] == subject:
+                        if _canonical(entry["schema"]) == canonical:
+                            return sid
+                        version += 1
+                sid = max(entries, default=0) + 1
+                entry = {"id": sid, "subject": subject, "version": version, "schema": schema}
+                try:
+                    fd = os.open(self._path(sid), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+                except FileExistsError:
+                    continue  # another process took this id; rescan
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, sort_keys=True))
+                self._by_id[sid] = entry
+                return sid
+
+    def get(self, schema_id: int) -> Dict[str, Any]:
+        """The schema registered under ``schema_id``; KeyError if there is none."""
+        entry = self._by_id.get(schema_id)
+        if entry is None:
+            entry = self._read(schema_id)
+            if entry is None:
+                raise KeyError(f"unknown schema id {schema_id} in {self._dir}")
+            self._by_id[schema_id] = entry
+        return entry["schema"]
+
+    def latest(self, subject: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """(id, schema) of the newest version under ``subject``, if any."""
+        with self._lock:
+            found = [(e["version"], sid, e["schema"]) for sid, e in self._scan().items() if e["subject"] == subject]
+        if not found:
+            return None
+        _, sid, schema = max(found)
+        return sid, schema
+
+    def _scan(self) -> Dict[int, Dict[str, Any]]:
+        for name in os.listdir(self._dir):
+            if name.startswith(_PREFIX) and name.endswith(_SUFFIX):
+                try:
+                    sid = int(name[len(_PREFIX) : -len(_SUFFIX)])
+                except ValueError:
+                    continue
+                if sid not in self._by_id:
+                    entry = self._read(sid)
+                    if entry is not None:
+                        self._by_id[sid] = entry
+        return dict(self._by_id)
+
+    def _read(self, schema_id: int) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(schema_id), "r", encoding="utf-8") as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            return None  # missing, or still being written by another process
+
+    def _path(self, schema_id: int) -> str:
+        return os.path.join(self._dir, f"{_PREFIX}{schema_id:08d}{_SUFFIX}")
@@ -0,0 +1,415 @@
+from __future__ import annotations
+
+import json
+import logging
+import operator
+import struct
+import threading
+import typing
+from dataclasses import fields, is_dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from ..errors import PublisherError
+from .schema_registry import FileSchemaRegistry
+
+logger = logging.getLogger(__name__)
+
+# Binary records start with the Confluent wire-format header: a zero magic
+# byte, then the schema id (4 bytes, big-endian). JSON records start with "{".
+MAGIC_BYTE = 0
+_HEADER = struct.Struct(">bI")
+ENCODING = "mysql-interceptor-varint/1"
+SUBJECT_PREFIX = "mysql-interceptor."
+
+LONG = "long"
+STRING = "string"
+STRINGS = "strings"  # list of strings
+
+Serializer = Callable[[Any], bytes]
+
+# JSON encoders, in the order "auto" tries them; "stdlib" is the reference.
+JSON_BACKENDS = ("orjson", "msgspec", "python", "stdlib")
+_AUTO_ORDER = ("orjson", "msgspec", "python")
+
+
+def stdlib_json(record: Any) -> bytes:
+    """The JSON wire format by definition; every other backend must return these exact bytes."""
+    payload = record if type(record) is dict else record.to_dict()
+    return json.dumps(payload, ensure_ascii=False, default=str, separators=(",", ":")).encode("utf-8")
+
+
+def _refuse(value: Any) -> Any:
+    # Accelerated encoders call this for types they do not handle natively:
+    # bail out, and the record goes through stdlib_json (default=str) instead.
+    raise TypeError(f"{type(value).__name__} is left to the stdlib encoder")
+
+
+def _orjson_backend() -> Serializer:
+    import orjson  # type: ignore
+
+    dumps = orjson.dumps
+    # Subclasses and datetimes would be encoded differently from default=str.
+    option = orjson.OPT_PASSTHROUGH_SUBCLASS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def encode(record: Any) -> bytes:
+        try:
+            return dumps(record, default=_refuse, option=option)
+        except TypeError:  # also orjson.JSONEncodeError: integers beyond 64 bits, lone surrogates
+            return stdlib_json(record)
+
+    return encode
+
+
+def _msgspec_backend() -> Serializer:
+    import msgspec  # type: ignore
+
+    dumps = msgspec.json.Encoder(enc_hook=_refuse).encode
+
+    def encode(record: Any) -> bytes:
+        try:
+            return dumps(record)
+        except (TypeError, ValueError, OverflowError, UnicodeError):
+            return stdlib_json(record)
+
+    return encode
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _python_value(v: Any, encode_str: Callable[[str], str] = json.encoder.encode_basestring) -> str:
+    t = type(v)
+    if t is str:
+        return encode_str(v)
+    if v is None:
+        return "null"
+    if t is int:
+        return int.__repr__(v)
+    if t is bool:
+        return "true" if v else "false"
+    if t is list or t is tuple:
+        return "[" + ",".join([_python_value(x) for x in v]) + "]"
+    raise _Unsupported  # floats, dicts, subclasses, default=str values
+
+
+def _python_backend() -> Serializer:
+    """Pure-Python encoder specialized per record class (field prefixes built once)."""
+    encode_str = json.encoder.encode_basestring  # the C version when _json is available
+    plans: Dict[type, Tuple[Tuple[str, ...], Callable[[Any], Any]]] = {}
+
+    def plan(cls: type) -> Optional[Tuple[Tuple[str, ...], Callable[[Any], Any]]]:
+        if not is_dataclass(cls):
+            return None
+        names = [f.name for f in fields(cls)]
+        prefixes = tuple(("{" if i == 0 else ",") + encode_str(n) + ":" for i, n in enumerate(names))
+        getter = operator.attrgetter(*names)
+        if len(names) == 1:
+            getter = lambda r, g=getter: (g(r),)  # noqa: E731
+        plans[cls] = (prefixes, getter)
+        return plans[cls]
+
+    def encode(record: Any) -> bytes:
+        p = plans.get(type(record)) or plan(type(record))
+        if p is None:
+            return stdlib_json(record)
+        prefixes, getter = p
+        parts = []
+        append = parts.append
+        try:
+            for prefix, v in zip(prefixes, getter(record)):
+                t = type(v)
+                if t is str:
+                    append(prefix + encode_str(v))
+                elif v is None:
+                    append(prefix + "null")
+                elif t is int:
+                    append(prefix + int.__repr__(v))
+                else:
+                    append(prefix + _python_value(v))
+        except _Unsupported:
+            return stdlib_json(record)
+        append("}")
+        return "".join(parts).encode("utf-8")
+
+    return encode
+
+
+_BUILDERS: Dict[str, Callable[[], Serializer]] = {
+    "orjson": _orjson_backend,
+    "msgspec": _msgspec_backend,
+    "python": _python_backend,
+    "stdlib": lambda: stdlib_json,
+}
+_ENCODERS: Dict[str, Tuple[str, Serializer]] = {}
+
+
+def _probe_records() -> List[Any]:
+    from ..events.models import SqlLogMessage, TxnSummaryMessage
+
+    tricky = 'q"b\\s/\n\r\t\b\f\x00\x1f\x7f \u2028\u2029 é ü 中文 😀'
+    big = 2**63 - 1
+    return [
+        SqlLogMessage(1, "h", "8.0", "u", "c", "db", None, None, 7, 3, 1, 2, 0, 0, "UTC", None, 4, 12345, -1,
+                      tricky, [tricky, "", "NULL"], None, "Rows matched: 1"),
+        SqlLogMessage(-big - 1, *([None] * 12), big, *([None] * 6), [], None, None),
+        TxnSummaryMessage("txnSummary", 0, None, tricky, None, None, None, None, None, "commit", None, 0, 0, 0, 0,
+                          0, 0, 0, 0),
+    ]
+
+
+def _verified(name: str, encode: Serializer) -> bool:
+    for record in _probe_records():
+        if encode(record) != stdlib_json(record):
+            logger.warning("JSON backend %s does not reproduce the stdlib encoding; not using it", name)
+            return False
+    return True
+
+
+def json_encoder(backend: Optional[str] = None) -> Tuple[str, Serializer]:
+    """(name, encode) for the JSON backend ``backend``: one of JSON_BACKENDS, or "auto"/None.
+
+    "auto" takes the first of orjson, msgspec and the specialized pure-Python
+    encoder that is importable and reproduces ``stdlib_json`` byte for byte
+    on a set of probe records. A backend named explicitly but not installed
+    falls back to "auto" with a warning. Records an accelerated backend
+    cannot encode identically (integers beyond 64 bits, values needing
+    ``default=str``) go through ``stdlib_json`` one by one.
+    """
+    name = (backend or "auto").strip().lower()
+    cached = _ENCODERS.get(name)
+    if cached is not None:
+        return cached
+    if name == "auto":
+        for candidate in _AUTO_ORDER:
+            try:
+                encode = _BUILDERS[candidate]()
+            except ImportError:
+                continue
+            if _verified(candidate, encode):
+                result = (candidate, encode)
+                break
+        else:
+            result = ("stdlib", stdlib_json)
+    elif name in _BUILDERS:
+        try:
+            encode = _BUILDERS[name]()
+        except ImportError:
+            logger.warning("JSON backend %s is not installed; choosing one automatically", name)
+            result = json_encoder("auto")
+        else:
+            result = (name, encode) if _verified(name, encode) else json_encoder("auto")
+    else:
+        raise PublisherError(f"Unknown JSON backend {backend!r}; expected auto or one of {', '.join(JSON_BACKENDS)}")
+    _ENCODERS[name] = result
+    return result
+
+
+class JsonSerializer:
+    """The default wire format: one compact JSON object per record.
+
+    ``backend`` picks the encoder (see ``json_encoder``); the bytes are the
+    same whichever one runs.
+    """
+
+    name = "json"
+
+    def __init__(self, backend: Optional[str] = None) -> None:
+        self.backend, self._encode = json_encoder(backend)
+
+    def __call__(self, event: Any) -> bytes:
+        return self._encode(event)
+
+
+def _kind(annotation: Any) -> str:
+    if typing.get_origin(annotation) is Union:  # Optional[X]: every field is nullable anyway
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        if len(args) == 1:
+            return _kind(args[0])
+    elif annotation is int:
+        return LONG
+    elif annotation is str:
+        return STRING
+    elif typing.get_origin(annotation) in (list, tuple) and set(typing.get_args(annotation)) <= {str, Ellipsis}:
+        return STRINGS
+    raise TypeError(f"no binary encoding for fields of type {annotation!r}")
+
+
+def record_schema(cls: type) -> Dict[str, Any]:
+    """Schema of a record dataclass: every field nullable, in declaration order.
+
+    Field types come from the resolved annotations: ``int``, ``str`` and
+    ``List[str]`` (optionally ``Optional``); anything else is a TypeError.
+    """
+    hints = typing.get_type_hints(cls)
+    return {
+        "type": "record",
+        "name": cls.__name__,
+        "encoding": ENCODING,
+        "fields": [{"name": f.name, "type": _kind(hints[f.name])} for f in fields(cls)],
+    }
+
+
+def _write_varint(out: bytearray, n: int) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _write_long(out: bytearray, v: Any) -> None:
+    v = int(v)
+    _write_varint(out, v << 1 if v >= 0 else ((-v) << 1) - 1)  # zigzag
+
+
+def _write_string(out: bytearray, v: Any) -> None:
+    data = (v if isinstance(v, str) else str(v)).encode("utf-8")
+    _write_varint(out, len(data))
+    out += data
+
+
+def _write_strings(out: bytearray, v: Any) -> None:
+    _write_varint(out, len(v))
+    for item in v:
+        _write_string(out, item)
+
+
+_WRITERS = {LONG: _write_long, STRING: _write_string, STRINGS: _write_strings}
+
+
+class BinarySerializer:
+    """Compact binary records: schema id header, null bitmap, varint/length-prefixed fields.
+
+    Each record class gets a schema (``record_schema``) registered under
+    ``mysql-interceptor.<ClassName>`` on first use. A record is the 5-byte
+    header, a bitmap with one bit per field (set = null), then the non-null
+    fields in schema order: integers as zigzag varints, strings as a varint
+    byte length and UTF-8, string lists as a varint count and strings.
+    ``BinaryDecoder`` reads it back with the same registry.
+    """
+
+    name = "binary"
+
+    def __init__(self, registry: FileSchemaRegistry) -> None:
+        self._registry = registry
+        self._lock = threading.Lock()
+        self._plans: Dict[type, Tuple[bytes, List[Tuple[str, Callable[[bytearray, Any], None]]]]] = {}
+
+    def __call__(self, event: Any) -> bytes:
+        plan = self._plans.get(type(event))
+        if plan is None:
+            plan = self._plan(type(event))
+        header, writers = plan
+        values = [getattr(event, name) for name, _ in writers]
+        nulls = 0
+        for i, v in enumerate(values):
+            if v is None:
+                nulls |= 1 << i
+        out = bytearray(header)
+        out += nulls.to_bytes((len(writers) + 7) // 8, "little")
+        for (_, write), v in zip(writers, values):
+            if v is not None:
+                write(out, v)
+        return bytes(out)
+
+    def header(self, cls: type) -> bytes:
+        """The 5-byte header every record of ``cls`` starts with (registers its schema on first use)."""
+        plan = self._plans.get(cls)
+        return (plan if plan is not None else self._plan(cls))[0]
+
+    def _plan(self, cls: type) -> Tuple[bytes, List[Tuple[str, Callable[[bytearray, Any], None]]]]:
+        if not is_dataclass(cls):
+            raise TypeError(f"cannot encode {cls.__name__}: not a record dataclass")
+        with self._lock:
+            plan = self._plans.get(cls)
+            if plan is None:
+                schema = record_schema(cls)
+                schema_id = self._registry.register(SUBJECT_PREFIX + cls.__name__, schema)
+                writers = [(f["name"], _WRITERS[f["type"]]) for f in schema["fields"]]
+                plan = (_HEADER.pack(MAGIC_BYTE, schema_id), writers)
+                self._plans[cls] = plan
+            return plan
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    n = 0
+    shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def _read_long(data: bytes, pos: int) -> Tuple[int, int]:
+    z, pos = _read_varint(data, pos)
+    return (z >> 1) ^ -(z & 1), pos
+
+
+def _read_string(data: bytes, pos: int) -> Tuple[str, int]:
+    n, pos = _read_varint(data, pos)
+    return data[pos : pos + n].decode("utf-8"), pos + n
+
+
+def _read_strings(data: bytes, pos: int) -> Tuple[List[str], int]:
+    count, pos = _read_varint(data, pos)
+    out = []
+    for _ in range(count):
+        s, pos = _read_string(data, pos)
+        out.append(s)
+    return out, pos
+
+
+_READERS = {LONG: _read_long, STRING: _read_string, STRINGS: _read_strings}
+
+
+class BinaryDecoder:
+    """Consumer side of ``BinarySerializer``: record bytes back to a dict (field order kept)."""
+
+    def __init__(self, registry: FileSchemaRegistry) -> None:
+        self._registry = registry
+        self._plans: Dict[int, List[Tuple[str, Any]]] = {}
+
+    def decode(self, payload: bytes) -> Dict[str, Any]:
+        data = bytes(payload)
+        magic, schema_id = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC_BYTE:
+            raise ValueError("not a binary record (bad magic byte)")
+        plan = self._plans.get(schema_id)
+        if plan is None:
+            schema = self._registry.get(schema_id)
+            if schema.get("encoding") != ENCODING:
+                raise ValueError(f"schema {schema_id} uses unsupported encoding {schema.get('encoding')!r}")
+            plan = [(f["name"], _READERS[f["type"]]) for f in schema["fields"]]
+            self._plans[schema_id] = plan
+        pos = _HEADER.size
+        width = (len(plan) + 7) // 8
+        nulls = int.from_bytes(data[pos : pos + width], "little")
+        pos += width
+        out: Dict[str, Any] = {}
+        for i, (name, read) in enumerate(plan):
+            if nulls >> i & 1:
+                out[name] = None
+            else:
+                out[name], pos = read(data, pos)
+        return out
+
+
+def build_serializer(
+    wire_format: Optional[str], schema_registry_dir: Optional[str], json_backend: Optional[str] = None
+) -> Serializer:
+    """The serializer for ``wire_format`` ("json", the default, or "binary")."""
+    fmt = (wire_format or "json").strip().lower()
+    if fmt == "json":
+        return JsonSerializer(json_backend)
+    if fmt == "binary":
+        if not schema_registry_dir:
+            raise PublisherError("The binary wire format needs INTERCEPTOR_SCHEMA_REGISTRY_DIR")
+        return BinarySerializer(FileSchemaRegistry(schema_registry_dir))
+    raise PublisherError(f"Unknown wire format {wire_format!r}; expected json or binary")
+
+
+# The process-wide default JSON encoder (what confluent._json_serializer points at).
+JSON_BACKEND, json_dumps = json_encoder()
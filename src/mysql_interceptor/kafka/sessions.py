@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Tuple
+
+from ..events.models import SqlLogMessage
+from ..events.sessions import session_message, session_state, slim_message
+from ..forksafe import reinit_after_fork
+
+# connectionId -> (session fields, sessionId, monotonic time the session record was last emitted)
+_Entry = Tuple[Tuple[Any, ...], str, float]
+
+
+class SessionRecordPublisher:
+    """Replace full statement records with a session record plus slim ``stmt`` records.
+
+    For every connection, the first statement is preceded by a ``session``
+    record holding the connection-static fields (``events.sessions.SESSION_FIELDS``),
+    and statements are published as ``SlimSqlLogMessage`` carrying only
+    the ``sessionId`` and per-statement fields. The capture paths fix the
+    session fields when a connection opens, so ``USE`` does not start a new
+    session: ``dbName`` stays the connect-time schema and only the
+    statements' ``stmtDbName`` follows ``USE``. Should a session field still
+    differ for a connection id (for example an id reused by another
+    server), a new session record with a new id goes out first. It is also
+    repeated every ``refresh_s`` so that consumers starting late, or reading
+    a topic whose older segments were deleted, can resolve it.
+
+    Session records share the connection id, so they land on the statements'
+    partition ahead of them. Other record types and statements without a
+    connection id pass through unchanged. At most ``max_sessions`` connections
+    are tracked; a connection evicted from the table gets a new session
+    record on its next statement.
+    """
+
+    def __init__(
+        self,
+        *,
+        inner: Any,
+        refresh_s: float = 300.0,
+        max_sessions: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._inner = inner
+        self._refresh_s = refresh_s
+        self._max_sessions = max(1, max_sessions)
+        self._clock = clock
+        self.circuit = getattr(inner, "circuit", None)
+        self.sessions = 0
+        self._reset()
+        reinit_after_fork(self)
+
+    def _reset(self) -> None:
+        self._lock = threading.Lock()
+        self._table: "OrderedDict[Optional[int], _Entry]" = OrderedDict()
+        # Unique per process (and per child after a fork): a pid is reused, the random part is not.
+        self._prefix = f"{os.getpid():x}-{os.urandom(4).hex()}"
+        self._seq = itertools.count(1)
+
+    def _after_fork_in_child(self) -> None:
+        self._reset()
+
+    def publish(self, event: SqlLogMessage) -> None:
+        self.publish_batch([event])
+
+    def publish_batch(self, events: List[SqlLogMessage]) -> None:
+        if not events:
+            return
+        out: List[Any] = []
+        table = self._table
+        with self._lock:
+            now = self._clock()
+            for e in events:
+                cid = e.connectionId if type(e) is SqlLogMessage else None
+                if cid is None:
+                    out.append(e)
+                    continue
+                state = session_state(e)
+                entry = table.get(cid)
+                if entry is None or entry[0] != state:
+                    entry = (state, f"{self._prefix}-{next(self._seq)}", now)
+                    out.append(session_message(e, entry[1], e.timestamp))
+                    self.sessions += 1
+                elif now - entry[2] >= self._refresh_s:
+                    entry = (state, entry[1], now)
+                    out.append(session_message(e, entry[1], e.timestamp))
+                table[cid] = entry
+                table.move_to_end(cid)
+                out.append(slim_message(e, entry[1]))
+            while len(table) > self._max_sessions:
+                table.popitem(last=False)
+        self._inner.publish_batch(out)
+
+    def flush(self, timeout: Optional[float] = None) -> Any:
+        return self._inner.flush() if timeout is None else self._inner.flush(timeout)
+
+    def request_flush(self) -> None:
+        request_flush = getattr(self._inner, "request_flush", None)
+        if request_flush is not None:
+            request_flush()
+
+    def close(self) -> None:
+        self._inner.close()
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import logging
+import socket
+import struct
+import threading
+import time
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from ..events.models import SqlLogMessage
+from ..forksafe import reinit_after_fork
+from .confluent import _json_serializer
+
+logger = logging.getLogger(__name__)
+
+# Kafka key (the connection id; 0 = none), value length, then the value bytes.
+FRAME = struct.Struct(">QI")
+
+Frame = Tuple[Optional[int], bytes]  # (key, value)
+
+
+def pack_frames(values: Sequence[Any], key: Optional[int]) -> bytes:
+    k = key if isinstance(key, int) and key > 0 else 0
+    pack = FRAME.pack
+    parts: List[bytes] = []
+    for v in values:
+        parts.append(pack(k, len(v)))
+        parts.append(v)
+    return b"".join(parts)
+
+
+class FrameReader:
+    """Incremental decoder for a stream of frames (``feed()`` bytes, get whole frames back)."""
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+
+    def feed(self, data: bytes) -> List[Frame]:
+        buf = self._buf
+        buf += data
+        out: List[Frame] = []
+        pos = 0
+        n = len(buf)
+        while pos + FRAME.size <= n:
+            key, length = FRAME.unpack_from(buf, pos)
+            end = pos + FRAME.size + length
+            if end > n:
+                break
+            out.append((key or None, bytes(buf[pos + FRAME.size : end])))
+            pos = end
+        del buf[:pos]
+        return out
+
+
+class SidecarPublisher:
+    """Ship serialized events over a Unix domain socket to the local aggregator.
+
+    Every process on a host writes frames to ``mysql-interceptor-aggregator``
+    (see ``aggregator``), which owns the one Kafka producer, instead of opening
+    its own producer and broker connections. Events are serialized here, in
+    the caller's thread, and a batch goes out in one ``sendall``.
+
+    The socket is connected on first use and reconnected after an error
+    (at most once per ``reconnect_interval_s``). Sends that cannot complete
+    within ``send_timeout_s`` drop the batch, because a half-written frame
+    cannot be resumed; dropped events are counted in ``dropped``. Use it
+    behind the ``QueueingPublisher`` so a slow aggregator never blocks
+    application threads.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        send_timeout_s: float = 1.0,
+        reconnect_interval_s: float = 1.0,
+        serializer: Optional[Callable[[Any], bytes]] = None,
+    ) -> None:
+        self._path = path
+        self._serializer = serializer or _json_serializer
+        self._send_timeout_s = send_timeout_s
+        self._reconnect_interval_s = reconnect_interval_s
+        self._sock: Optional[socket.socket] = None
+        self._next_connect = 0.0
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.dropped = 0
+        reinit_after_fork(self)
+
+    def serialize(self, event: SqlLogMessage) -> bytes:
+        return self._serializer(event)
+
+    def publish(self, event: SqlLogMessage) -> None:
+        self._send(pack_frames((self._serializer(event),), getattr(event, "connectionId", None)), 1)
+
+    def publish_batch(self, events: List[SqlLogMessage]) -> None:
+        if not events:
+            return
+        pack = FRAME.pack
+        serialize = self._serializer
+        parts: List[bytes] = []
+        for e in events:
+            value = serialize(e)
+            cid = getattr(e, "connectionId", None)
+            parts.append(pack(cid if isinstance(cid, int) and cid > 0 else 0, len(value)))
+            parts.append(value)
+        self._send(b"".join(parts), len(events))
+
+    def publish_serialized(self, values: List[memoryview], *, key: Optional[int] = None) -> None:
+        if values:
+            self._send(pack_frames(values, key), len(values))
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        return None  # sendall() already handed everything to the socket
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+    def _send(self, data: bytes, count: int) -> None:
+        with self._lock:
+            sock = self._sock or self._connect()
+            if sock is None:
+                self.dropped += count
+                return
+            try:
+                sock.sendall(data)
+            except OSError:
+                logger.warning("Lost connection to the aggregator at %s; dropped %d events", self._path, count)
+                self._disconnect()
+                self.dropped += count
+                return
+            self.sent += count
+
+    def _connect(self) -> Optional[socket.socket]:
+        now = time.monotonic()
+        if now < self._next_connect:
+            return None
+        self._next_connect = now + self._reconnect_interval_s
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self._send_timeout_s)
+        try:
+            sock.connect(self._path)
+        except OSError:
+            sock.close()
+            logger.warning("Cannot connect to the aggregator at %s", self._path, exc_info=True)
+            return None
+        self._sock = sock
+        return sock
+
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def _after_fork_in_child(self) -> None:
+        # A shared stream would interleave the parent's and the child's frames.
+        self._lock = threading.Lock()
+        self._disconnect()  # closes only this process's copy of the descriptor
+        self._next_connect = 0.0
+        self.sent = 0
+        self.dropped = 0
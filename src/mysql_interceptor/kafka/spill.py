@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import threading
+import zlib
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# crc32(key + value), key length, value length
+_HEADER = struct.Struct(">III")
+_PREFIX = "spill-"
+_SUFFIX = ".log"
+_CURSOR = "cursor"
+
+Record = Tuple[bytes, bytes]  # (key, value)
+Position = Tuple[int, int]  # (segment sequence number, byte offset)
+
+
+class SpillQueue:
+    """Durable FIFO of (key, value) records in a local directory.
+
+    Records are appended to numbered segment files (``spill-<seq>.log``) that
+    rotate at ``segment_bytes``; each frame carries a CRC, and a torn tail
+    after a crash is skipped (the position moves past it). Readers take a batch with ``read_batch()`` and
+    acknowledge it with ``commit()``, which persists the read position in a
+    small ``cursor`` file and deletes fully consumed segments. Delivery is
+    at-least-once: a batch read but not committed before a crash is read
+    again. Appends past ``max_bytes`` on disk are dropped and counted.
+    """
+
+    def __init__(self, directory: str, *, max_bytes: int, segment_bytes: int = 16 * 1024 * 1024) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self._dir = directory
+        self._max_bytes = max_bytes
+        self._segment_bytes = max(1, segment_bytes)
+        self._lock = threading.Lock()
+        self._sizes: Dict[int, int] = {}
+        for name in os.listdir(directory):
+            if name.startswith(_PREFIX) and name.endswith(_SUFFIX):
+                seq = int(name[len(_PREFIX) : -len(_SUFFIX)])
+                self._sizes[seq] = os.path.getsize(self._path(seq))
+        self._read: Position = self._load_cursor()
+        self._writer: Optional[BinaryIO] = None
+        # Never append to a segment from a previous run: it may end in a torn frame.
+        self._write_seq = max(self._sizes, default=self._read[0]) + 1
+        self.dropped = 0
+
+    @property
+    def directory(self) -> str:
+        return self._dir
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes on disk, including consumed records of segments not deleted yet."""
+        with self._lock:
+            return sum(self._sizes.values())
+
+    @property
+    def empty(self) -> bool:
+        with self._lock:
+            return self._empty_locked()
+
+    def append(self, records: Sequence[Record]) -> int:
+        """Append records in order; returns how many fit under ``max_bytes``."""
+        stored = 0
+        with self._lock:
+            total = sum(self._sizes.values())
+            for key, value in records:
+                value = bytes(value)
+                frame = _HEADER.pack(zlib.crc32(value, zlib.crc32(key)), len(key), len(value)) + key + value
+                if self._max_bytes > 0 and total + len(frame) > self._max_bytes:
+                    self.dropped += 1
+                    continue
+                writer = self._writer_for(len(frame))
+                writer.write(frame)
+                self._sizes[self._write_seq] += len(frame)
+                total += len(frame)
+                stored += 1
+            if self._writer is not None:
+                self._writer.flush()
+        return stored
+
+    def read_batch(self, max_records: int) -> Tuple[List[Record], Position]:
+        """Up to ``max_records`` from the read position, and the position after them."""
+        with self._lock:
+            seq, off = self._read
+            segments = sorted((s, n) for s, n in self._sizes.items() if s >= seq)
+        out: List[Record] = []
+        for s, size in segments:
+            if s != seq:
+                seq, off = s, 0
+            if off >= size:
+                continue
+            with open(self._path(s), "rb") as f:
+                f.seek(off)
+                data = f.read(size - off)
+            pos = 0
+            while len(out) < max_records and pos < len(data):
+                end = pos + _HEADER.size
+                if end <= len(data):
+                    crc, klen, vlen = _HEADER.unpack_from(data, pos)
+                    end += klen + vlen
+                if end > len(data):
+                    # Appends write whole frames under the lock, so a partial one is a crash's torn tail.
+                    logger.warning("Torn spill record in %s at offset %d; skipping it", self._path(s), off + pos)
+                    pos = len(data)
+                    break
+                key = data[pos + _HEADER.size : pos + _HEADER.size + klen]
+                value = data[pos + _HEADER.size + klen : end]
+                if zlib.crc32(value, zlib.crc32(key)) != crc:
+                    logger.warning("Corrupt spill record in %s at offset %d; skipping the rest", self._path(s), off + pos)
+                    pos = len(data)
+                    break
+                out.append((key, value))
+                pos = end
+            off += pos
+            if len(out) >= max_records:
+                break
+        return out, (seq, off)
+
+    def commit(self, position: Position) -> None:
+        """Acknowledge everything before ``position``; drops consumed segments."""
+        with self._lock:
+            self._read = position
+            seq, off = position
+            for s in sorted(self._sizes):
+                done = s < seq or (s == seq and off >= self._sizes[s])
+                if not done:
+                    break
+                if s == self._write_seq:
+                    if self._writer is not None:
+                        self._writer.close()
+                        self._writer = None
+                    self._write_seq = s + 1  # offsets in the cursor refer to the deleted file
+                try:
+                    os.remove(self._path(s))
+                except OSError:
+                    logger.warning("Could not remove spill segment %s", self._path(s), exc_info=True)
+                del self._sizes[s]
+            self._save_cursor()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    def _empty_locked(self) -> bool:
+        seq, off = self._read
+        return all(s < seq or (s == seq and off >= n) for s, n in self._sizes.items())
+
+    def _writer_for(self, frame_len: int) -> BinaryIO:
+        if self._writer is not None and self._sizes[self._write_seq] + frame_len > self._segment_bytes:
+            self._writer.close()
+            self._writer = None
+            self._write_seq += 1
+        if self._writer is None:
+            self._sizes.setdefault(self._write_seq, 0)
+            self._writer = open(self._path(self._write_seq), "ab")
+        return self._writer
+
+    def _path(self, seq: int) -> str:
+        return os.path.join(self._dir, f"{_PREFIX}{seq:012d}{_SUFFIX}")
+
+    def _load_cursor(self) -> Position:
+        try:
+            with open(os.path.join(self._dir, _CURSOR), "r", encoding="ascii") as f:
+                seq, off = f.read().split()
+            return int(seq), int(off)
+        except Exception:
+            return (min(self._sizes) if self._sizes else 0), 0
+
+    def _save_cursor(self) -> None:
+        path = os.path.join(self._dir, _CURSOR)
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="ascii") as f:
+                f.write(f"{self._read[0]} {self._read[1]}")
+            os.replace(tmp, path)
+        except OSError:
+            logger.warning("Could not persist spill cursor", exc_info=True)
+
+
+_CLAIMED: Dict[str, Tuple[int, int]] = {}  # claimed slot directory -> (owner pid, lock fd)
+
+
+def _drop_inherited_claims() -> None:
+    # A forked child holds copies of the parent's lock fds; the slots stay the parent's.
+    pid = os.getpid()
+    for path, (owner, fd) in list(_CLAIMED.items()):
+        if owner != pid:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+            del _CLAIMED[path]
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_drop_inherited_claims)
+
+
+def claim_worker_dir(base: str, *, slots: int = 1024) -> Optional[str]:
+    """Claim the first ``worker-<n>`` subdirectory of ``base`` no live owner holds.
+
+    Every process sharing ``base`` spills through a claimed slot, never into
+    ``base`` itself, so two processes (or two publishers in one process)
+    never interleave segments or cursor writes. The claim is an exclusive
+    ``flock`` on ``worker-<n>/lock`` held until ``release_worker_dir()`` or
+    process exit, so a process started after an owner died takes over (and
+    replays) its slot. None if every slot is taken or locking is unsupported.
+    """
+    _drop_inherited_claims()
+    try:
+        import fcntl
+    except ImportError:
+        return None
+    for n in range(slots):
+        path = os.path.join(base, f"worker-{n}")
+        if path in _CLAIMED:
+            continue
+        os.makedirs(path, exist_ok=True)
+        fd = os.open(os.path.join(path, "lock"), os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            continue
+        _CLAIMED[path] = (os.getpid(), fd)
+        return path
+    return None
+
+
+def release_worker_dir(path: str) -> None:
+    """Give up a slot taken with ``claim_worker_dir()`` (its records stay for the next owner)."""
+    entry = _CLAIMED.pop(path, None)
+    if entry is not None and entry[0] == os.getpid():
+        try:
+            os.close(entry[1])
+        except OSError:
+            pass
@@ -5,7 +5,7 @@ from dataclasses import replace
 from typing import Any, Callable, Dict, Optional
 
 from .config.settings import Settings
-from .connect import _build_default_kafka_publisher, connect
+from .connect import connect, get_shared_publisher
 from .kafka.batching import QueueingPublisher
 from .kafka.publisher import Publisher, StdoutPublisher
 from .sqlalchemy_interceptor import instrument_engine
@@ -18,15 +18,14 @@ def patch_pymysql(*, publisher: Optional[Publisher] = None, settings: Optional[S
         raise RuntimeError("pymysql is not installed") from e
 
     settings = settings or Settings.from_env()
-    owns_publisher = publisher is None
-    # Build publisher once per patch() call (not per connection).
-    # If we wrap it with QueueingPublisher here, disable the connect() wrapping
-    # to avoid double-wrapping.
+    # One publisher per patch() call (not per connection), shared with connect() and
+    # patch_sqlalchemy() for the same settings. It already includes the
+    # QueueingPublisher, so disable the connect() wrapping to avoid double-wrapping.
     if publisher is None:
-        publisher = _build_default_kafka_publisher(settings)
-    if settings.enable_queueing_publisher and not isinstance(publisher, QueueingPublisher):
+        publisher = get_shared_publisher(settings)
+    elif settings.enable_queueing_publisher and not isinstance(publisher, QueueingPublisher):
         publisher = QueueingPublisher(inner=publisher, settings=settings)
-        settings = replace(settings, enable_queueing_publisher=False)
+    settings = replace(settings, enable_queueing_publisher=False)
     original = pymysql.connect
 
     # Ensure adapter uses unpatched driver connect (prevents recursion).
@@ -59,12 +58,6 @@ def patch_pymysql(*, publisher: Optional[Publisher] = None, settings: Optional[S
         except Exception:
             pass
 
-        if owns_publisher:
-            try:
-                publisher.close()  # type: ignore[union-attr]
-            except Exception:
-                pass
-
     return unpatch
 
 
@@ -75,12 +68,11 @@ def patch_sqlalchemy(*, publisher: Optional[Publisher] = None, settings: Optiona
         raise RuntimeError("sqlalchemy is not installed") from e
 
     settings = settings or Settings.from_env()
-    owns_publisher = publisher is None
     if publisher is None:
-        publisher = _build_default_kafka_publisher(settings)
-    if settings.enable_queueing_publisher and not isinstance(publisher, QueueingPublisher):
+        publisher = get_shared_publisher(settings)
+    elif settings.enable_queueing_publisher and not isinstance(publisher, QueueingPublisher):
         publisher = QueueingPublisher(inner=publisher, settings=settings)
-        settings = replace(settings, enable_queueing_publisher=False)
+    settings = replace(settings, enable_queueing_publisher=False)
 
     publisher = publisher or StdoutPublisher()
 
@@ -95,10 +87,4 @@ def patch_sqlalchemy(*, publisher: Optional[Publisher] = None, settings: Optiona
 
     def unpatch() -> None:
         sqlalchemy.create_engine = original  # type: ignore[attr-defined]
-        if owns_publisher:
-            try:
-                publisher.close()
-            except Exception:
-                pass
-
     return unpatch
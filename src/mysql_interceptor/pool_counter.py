@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import threading
 
+from .forksafe import reinit_after_fork
+
 
 class PoolCounter:
     """Process-wide count of open DBAPI connections ("sessions").
@@ -15,6 +17,7 @@ class PoolCounter:
     def __init__(self) -> None:
         self._lock = threading.Lock()
         self._count = 0
+        reinit_after_fork(self)
 
     def inc(self) -> int:
         with self._lock:
@@ -28,8 +31,12 @@ class PoolCounter:
             return self._count
 
     def get(self) -> int:
-        with self._lock:
-            return self._count
+        # Read on every statement: no lock. Reading an int attribute is atomic on
+        # both GIL and free-threaded builds; writers still serialize on the lock.
+        return self._count
+
+    def _after_fork_in_child(self) -> None:
+        self._lock = threading.Lock()  # may have been held by another thread at fork time
 
 
 GLOBAL_POOL_COUNTER = PoolCounter()
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config.settings import Settings
+from .dbapi.constants import IVER8
+from .events.models import SuppressedEventsMessage
+from .forksafe import reinit_after_fork
+from .utils import hostname
+
+logger = logging.getLogger(__name__)
+
+_Key = Tuple[Optional[str], Optional[str]]  # (stmtDbName, statement kind)
+
+
+@dataclass(frozen=True)
+class RateRule:
+    """``service:schema:kind=rate[/burst]``; ``*`` matches anything, rate is events per second."""
+
+    service: str
+    schema: str
+    kind: str
+    rate: float
+    burst: float
+
+    def matches(self, service: str, schema: Optional[str], kind: Optional[str]) -> bool:
+        return (
+            self.service in ("*", service)
+            and self.schema in ("*", schema or "")
+            and self.kind in ("*", kind or "")
+        )
+
+
+def parse_rules(specs: List[str]) -> List[RateRule]:
+    """Parse ``INTERCEPTOR_RATE_LIMITS`` entries; malformed ones are logged and skipped."""
+    rules: List[RateRule] = []
+    for spec in specs:
+        try:
+            scope, _, limit = spec.partition("=")
+            service, schema, kind = (p.strip() for p in scope.split(":"))
+            rate_s, _, burst_s = limit.partition("/")
+            rate = float(rate_s)
+            burst = float(burst_s) if burst_s else max(1.0, rate)
+            if rate < 0 or burst < 1:
+                raise ValueError("rate must be >= 0 and burst >= 1")
+            rules.append(RateRule(service or "*", schema or "*", kind.lower() or "*", rate, burst))
+        except Exception:
+            logger.warning("Ignoring malformed rate limit rule %r", spec)
+    return rules
+
+
+class _Bucket:
+    __slots__ = ("rate", "burst", "tokens", "last")
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = now
+
+    def take(self, now: float, n: int) -> bool:
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens >= n:
+            self.tokens -= n
+            return True
+        return False
+
+
+class RateLimiter:
+    """Token buckets per (schema, statement kind) for one service.
+
+    The first rule matching a key decides its bucket; keys no rule matches
+    are never limited (and cost one dict lookup). Held-back statements are
+    counted and reported as ``SuppressedEventsMessage`` records via
+    ``pop_summaries()``: by the capture path on the next statement after
+    ``summary_interval_s``, and by a timer thread publishing to the
+    ``attach()``ed publisher every ``summary_interval_s`` (so idle periods
+    still report). ``close()`` stops the timer and publishes the open window;
+    shared limiters are closed at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        rules: List[RateRule],
+        *,
+        service: str,
+        summary_interval_s: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._rules = rules
+        self._service = service
+        self._interval = summary_interval_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: Dict[_Key, Optional[_Bucket]] = {}
+        self._suppressed: Dict[_Key, int] = {}
+        self._window_start_ms = time.time_ns() // 1_000_000
+        self._next_summary = clock() + summary_interval_s
+        self._publisher: Any = None
+        self._timer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        reinit_after_fork(self)
+
+    def attach(self, publisher: Any) -> None:
+        """Where the timer thread publishes summaries (the most recently attached publisher)."""
+        self._publisher = publisher
+
+    def emit(self, publisher: Any = None, *, force: bool = False) -> None:
+        """Publish due summaries (all pending ones with ``force``) to ``publisher`` or the attached one."""
+        target = publisher if publisher is not None else self._publisher
+        if target is None or not self._suppressed:
+            return
+        summaries = self.pop_summaries(force=force)
+        if summaries:
+            try:
+                target.publish_batch(summaries)
+            except Exception:
+                logger.warning("Failed to publish rate limit summaries", exc_info=True)
+
+    def allow(self, schema: Optional[str], kind: Optional[str], n: int = 1) -> bool:
+        """Take ``n`` tokens for the key, all or nothing."""
+        key = (schema, kind)
+        bucket = self._buckets.get(key, _MISSING)
+        if bucket is None:
+            return True
+        with self._lock:
+            if bucket is _MISSING:
+                bucket = self._buckets[key] = self._new_bucket(schema, kind)
+                if bucket is None:
+                    return True
+            if bucket.take(self._clock(), n):  # type: ignore[union-attr]
+                return True
+            self._suppressed[key] = self._suppressed.get(key, 0) + n
+            if self._timer is None and not self._stop.is_set():
+                self._start_timer()
+            return False
+
+    def pop_summaries(self, *, force: bool = False) -> List[SuppressedEventsMessage]:
+        """Summary records for the window that just ended (empty until it ends, unless ``force``)."""
+        if not self._suppressed or (not force and self._clock() < self._next_summary):
+            return []
+        with self._lock:
+            counts, self._suppressed = self._suppressed, {}
+            start_ms = self._window_start_ms
+            self._window_start_ms = end_ms = time.time_ns() // 1_000_000
+            self._next_summary = self._clock() + self._interval
+        client = hostname()
+        return [
+            SuppressedEventsMessage(
+                recordType="suppressed",
+                timestamp=start_ms,
+                endTs=end_ms,
+                service=self._service,
+                client=client,
+                stmtDbName=schema,
+                statementKind=kind,
+                suppressedCount=count,
+                iFlags=IVER8,
+            )
+            for (schema, kind), count in counts.items()
+        ]
+
+    def close(self, timeout: Optional[float] = 1.0) -> None:
+        """Stop the timer thread and publish the open window's counts to the attached publisher."""
+        self._stop.set()
+        timer = self._timer
+        if timer is not None and timer is not threading.current_thread():
+            timer.join(timeout)
+        self.emit(force=True)
+
+    def _after_fork_in_child(self) -> None:
+        self._lock = threading.Lock()
+        self._suppressed = {}  # the parent reports these
+        self._timer = None  # the parent's thread did not survive the fork
+        self._stop = threading.Event()
+
+    def _start_timer(self) -> None:
+        # Called under self._lock.
+        self._timer = threading.Thread(target=self._tick, name="mysql-interceptor-ratelimit", daemon=True)
+        self._timer.start()
+
+    def _tick(self) -> None:
+        while not self._stop.wait(max(0.1, self._interval)):
+            self.emit()
+
+    def _new_bucket(self, schema: Optional[str], kind: Optional[str]) -> Optional[_Bucket]:
+        for rule in self._rules:
+            if rule.matches(self._service, schema, kind):
+                return _Bucket(rule.rate, rule.burst, self._clock())
+        return None
+
+
+_MISSING: object = object()
+
+_LIMITERS: Dict[Tuple[Tuple[str, ...], str, float], RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(settings: Settings) -> Optional[RateLimiter]:
+    """Process-wide limiter for these rules, shared by all connections; None without rules."""
+    if not settings.rate_limits:
+        return None
+    key = (tuple(settings.rate_limits), settings.service_name, settings.rate_limit_summary_interval_s)
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            if not _LIMITERS:
+                # Registered after the shared publishers' exit flush, so it runs first and that flush delivers it.
+                atexit.register(close_rate_limiters)
+            limiter = _LIMITERS[key] = RateLimiter(
+                parse_rules(settings.rate_limits),
+                service=settings.service_name,
+                summary_interval_s=settings.rate_limit_summary_interval_s,
+            )
+        return limiter
+
+
+def close_rate_limiters() -> None:
+    """Close every shared limiter, publishing its open window; new statements get fresh limiters."""
+    with _LIMITERS_LOCK:
+        limiters = list(_LIMITERS.values())
+        _LIMITERS.clear()
+    for limiter in limiters:
+        try:
+            limiter.close()
+        except Exception:
+            logger.warning("Failed to close rate limiter", exc_info=True)
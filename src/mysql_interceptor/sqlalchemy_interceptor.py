@@ -7,7 +7,9 @@ from typing import Any, List, Optional, Tuple
 
 from .config.redaction import params_to_query_params
 from .config.settings import Settings
-from .dbapi.classify import is_call, is_ddl, is_use, is_write, parse_use_db
+from .dbapi.classify import is_call, is_ddl, is_use, is_write, parse_use_db, statement_kind
+from .dbapi.txn_buffer import TransactionBuffer, make_transaction_buffer
+from .dbapi.txn_span import TransactionSpan, autocommitted
 from .dbapi.constants import (
     IVER8,
     PY_DRIVER_SQLALCHEMY,
@@ -23,7 +25,9 @@ from .dbapi.constants import (
     PY_ERROR_SERVER_TZ,
     PY_ERROR_SERVER_VERSION,
 )
-from .events.models import SqlLogMessage
+from .events.deferred import RawStatement, SessionContext, capture_params
+from .events.models import SqlLogMessage, TxnSummaryMessage
+from .kafka.circuit import CircuitBreaker
 from .kafka.publisher import Publisher
 from .utils import (
     _default_tz,
@@ -34,6 +38,7 @@ from .utils import (
     hostname,
 )
 from .pool_counter import GLOBAL_POOL_COUNTER
+from .ratelimit import RateLimiter, get_rate_limiter
 
 
 @dataclasses.dataclass
@@ -60,7 +65,11 @@ class _SAState:
 
     base_iflags: int = IVER8 | PY_DRIVER_SQLALCHEMY
     execution_count: int = 0
-    buffer: List[SqlLogMessage] = dataclasses.field(default_factory=list)
+    buffer: TransactionBuffer = dataclasses.field(default_factory=TransactionBuffer)
+    span: Optional[TransactionSpan] = None
+    session: Optional[SessionContext] = None  # set when deferred capture is active
+    limiter: Optional[RateLimiter] = None
+    circuit: Optional[CircuitBreaker] = None
 
 
 def _get_dbapi_conn_from_sa_connection(sa_conn: Any) -> Any:
@@ -156,6 +165,23 @@ def _build_state(*, dbapi_conn: Any, engine_url: Any, publisher: Publisher, sett
     except Exception:
         iflags |= PY_ERROR_CLIENT_FLAGS
 
+    session = None
+    if settings.deferred_capture and getattr(publisher, "accepts_deferred", False):
+        session = SessionContext(
+            settings=settings,
+            serverHost=server_host,
+            serverVersion=server_version,
+            user=user,
+            client=client,
+            dbName=db_name,
+            connectionId=connection_id,
+            defaultTZ=default_tz,
+            serverTZ=server_tz,
+            isolationLvl=isolation_lvl,
+            clientFlags=client_flags,
+            base_iflags=iflags,
+        )
+
     return _SAState(
         publisher=publisher,
         settings=settings,
@@ -171,6 +197,11 @@ def _build_state(*, dbapi_conn: Any, engine_url: Any, publisher: Publisher, sett
         isolation_lvl=isolation_lvl,
         client_flags=client_flags,
         base_iflags=iflags,
+        buffer=make_transaction_buffer(publisher, settings),
+        span=(TransactionSpan() if (settings.emit_txn_summary or settings.txn_summary_only) else None),
+        session=session,
+        limiter=get_rate_limiter(settings),
+        circuit=getattr(publisher, "circuit", None),
     )
 
 
@@ -187,6 +218,10 @@ def instrument_engine(*, engine: Any, publisher: Publisher, settings: Settings)
         # Best effort. If we can't set the attribute, we still proceed.
         pass
 
+    limiter = get_rate_limiter(settings)
+    if limiter is not None:
+        limiter.attach(publisher)  # the summary timer's target
+
     @event.listens_for(engine, "connect")
     def _on_connect(dbapi_conn: Any, connection_record: Any) -> None:
         if not connection_record.info.get("_mi_pool_counted"):
@@ -207,24 +242,28 @@ def instrument_engine(*, engine: Any, publisher: Publisher, settings: Settings)
             except Exception:
                 pass
 
+    @event.listens_for(engine, "begin")
+    def _on_begin(sa_conn: Any) -> None:
+        st: Optional[_SAState] = getattr(sa_conn, "info", {}).get("mysql_interceptor_state")  # type: ignore[attr-defined]
+        if st and st.span is not None:
+            st.span.begin(time.time_ns() // 1_000_000)
+
     @event.listens_for(engine, "commit")
     def _on_commit(sa_conn: Any) -> None:
         st: Optional[_SAState] = getattr(sa_conn, "info", {}).get("mysql_interceptor_state")  # type: ignore[attr-defined]
-        if not st or not st.settings.buffer_until_commit or not st.buffer:
+        if not st:
             return
-        batch = list(st.buffer)
-        st.buffer.clear()
-        try:
-            st.publisher.publish_batch(batch)
-        except Exception:
-            for e in batch:
-                _publish_best_effort(st, e)
+        _flush_buffer(st)
+        _emit_txn_summary(st, "commit")
 
     @event.listens_for(engine, "rollback")
     def _on_rollback(sa_conn: Any) -> None:
         st: Optional[_SAState] = getattr(sa_conn, "info", {}).get("mysql_interceptor_state")  # type: ignore[attr-defined]
-        if st and st.settings.buffer_until_commit:
+        if not st:
+            return
+        if st.settings.buffer_until_commit:
             st.buffer.clear()
+        _emit_txn_summary(st, "rollback")
 
     @event.listens_for(engine, "before_cursor_execute")
     def _before_cursor_execute(sa_conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
@@ -251,20 +290,46 @@ def instrument_engine(*, engine: Any, publisher: Publisher, settings: Settings)
 
         _track_stmt_db_name(st, statement)
 
-        if not _should_capture(st, statement, force_call=False):
-            if executemany:
-                try:
-                    st.execution_count += len(parameters)
-                except Exception:
-                    st.execution_count += 1
-            else:
-                st.execution_count += 1
+        n_stmts = _statement_count(parameters, executemany)
+        if st.span is not None:
+            st.span.record(
+                timestamp_ms=timestamp_ms,
+                duration_ns=duration_ns,
+                write=is_write(statement),
+                update_count=_safe_int(getattr(cursor, "rowcount", None)),
+                error=False,
+                statements=n_stmts,
+            )
+            if st.settings.txn_summary_only:
+                _summarize_if_autocommitted(st, sa_conn)
+
+        if (
+            st.settings.txn_summary_only
+            or not _should_capture(st, statement, force_call=False)
+            or (st.circuit is not None and not st.circuit.allow_capture(n_stmts))
+            or (st.limiter is not None and _rate_limited(st, statement, n_stmts))
+        ):
+            st.execution_count += n_stmts
             return
 
-        server_flags, _ = _compute_server_flags(sa_conn)
-        st.cached_server_flags = server_flags
         iflags = st.base_iflags | iflags_extra
+        if st.session is not None:
+            _capture_deferred(
+                st,
+                server_status=_read_server_status(sa_conn)[0],
+                timestamp_ms=timestamp_ms,
+                duration_ns=duration_ns,
+                update_count=_safe_int(getattr(cursor, "rowcount", None)),
+                sql=statement,
+                parameters=parameters,
+                executemany=executemany,
+                server_info=server_info,
+                iflags=iflags,
+            )
+            return
 
+        server_flags, _ = _compute_server_flags(sa_conn)
+        st.cached_server_flags = server_flags
         if not executemany:
             st.execution_count += 1
             msg = _build_message(
@@ -321,10 +386,15 @@ def instrument_engine(*, engine: Any, publisher: Publisher, settings: Settings)
 
 
 def _compute_server_flags(sa_conn: Any) -> Tuple[Optional[int], int]:
+    v, iflags = _read_server_status(sa_conn)
+    return _safe_int(v), iflags
+
+
+def _read_server_status(sa_conn: Any) -> Tuple[Any, int]:
+    # The raw status word; deferred capture converts it on the publisher workers.
     try:
         dbapi_conn = _get_dbapi_conn_from_sa_connection(sa_conn)
-        v = getattr(dbapi_conn, "server_status", None) or getattr(dbapi_conn, "_server_status", None)
-        return _safe_int(v), 0
+        return getattr(dbapi_conn, "server_status", None) or getattr(dbapi_conn, "_server_status", None), 0
     except Exception:
         return None, PY_ERROR_SERVER_FLAGS
 
@@ -350,6 +420,24 @@ def _should_capture(st: _SAState, sql: str, *, force_call: bool) -> bool:
     )
 
 
+def _statement_count(parameters: Any, executemany: bool) -> int:
+    if not executemany:
+        return 1
+    try:
+        return max(1, len(parameters))
+    except Exception:
+        return 1
+
+
+def _rate_limited(st: _SAState, sql: str, n: int) -> bool:
+    limiter = st.limiter
+    assert limiter is not None
+    allowed = limiter.allow(st.stmt_db_name or st.db_name, statement_kind(sql), n)
+    for summary in limiter.pop_summaries():
+        _publish_best_effort(st, summary)  # type: ignore[arg-type]
+    return not allowed
+
+
 def _params_or_none(st: _SAState, params: Any) -> Optional[List[str]]:
     if not st.settings.include_params:
         return None
@@ -398,6 +486,110 @@ def _build_message(
     )
 
 
+def _capture_deferred(
+    st: _SAState,
+    *,
+    timestamp_ms: int,
+    duration_ns: Optional[int],
+    update_count: Optional[int],
+    sql: str,
+    parameters: Any,
+    executemany: bool,
+    server_info: Optional[str],
+    iflags: int,
+    server_status: Any,
+) -> None:
+    """Deferred capture: enqueue RawStatements; the publisher's workers build the messages."""
+    session = st.session
+    assert session is not None
+    stmt_db_name = st.stmt_db_name or st.db_name
+    if not executemany:
+        st.execution_count += 1
+        raw = RawStatement(
+            session, timestamp_ms, stmt_db_name, GLOBAL_POOL_COUNTER.get(), st.execution_count,
+            server_status, iflags, duration_ns, update_count, sql, capture_params(parameters), None, server_info,
+        )
+        _buffer_or_publish(st, raw)  # type: ignore[arg-type]
+        return
+
+    try:
+        param_sets = list(parameters) if not isinstance(parameters, list) else parameters
+    except Exception:
+        param_sets = [parameters]
+        iflags |= PY_ERROR_PREPROCESS_BATCHED_ARGS
+    n = len(param_sets)
+    for i in range(n):
+        st.execution_count += 1
+        is_last = i == (n - 1)
+        raw = RawStatement(
+            session, timestamp_ms, stmt_db_name, GLOBAL_POOL_COUNTER.get(), st.execution_count,
+            server_status, iflags,
+            (duration_ns if is_last else None),
+            (update_count if is_last else None),
+            sql, capture_params(param_sets[i]), None,
+            (server_info if is_last else None),
+        )
+        _buffer_or_publish(st, raw)  # type: ignore[arg-type]
+
+
+def _flush_buffer(st: _SAState) -> None:
+    if not st.settings.buffer_until_commit or not st.buffer:
+        return
+    if st.buffer.preserialized:
+        values = st.buffer.drain_serialized()
+        try:
+            st.publisher.publish_serialized(values, key=st.connection_id)  # type: ignore[attr-defined]
+        except Exception:
+            pass
+        return
+    batch = st.buffer.drain()
+    try:
+        st.publisher.publish_batch(batch)
+    except Exception:
+        for e in batch:
+            _publish_best_effort(st, e)
+
+
+def _summarize_if_autocommitted(st: _SAState, sa_conn: Any) -> None:
+    # Summary-only mode: without this, statements on an autocommit connection would never be reported.
+    if autocommitted(_compute_server_flags(sa_conn)[0]):
+        _emit_txn_summary(st, "commit")
+
+
+def _emit_txn_summary(st: _SAState, outcome: str) -> None:
+    span = st.span
+    if span is None:
+        return
+    if not span.statements or span.begin_ms is None:
+        # Pool reset-on-return rolls back empty transactions; nothing to report.
+        span.reset()
+        return
+    end_ms = time.time_ns() // 1_000_000
+    msg = TxnSummaryMessage(
+        recordType="txnSummary",
+        timestamp=span.begin_ms,
+        serverHost=st.server_host,
+        user=st.user,
+        client=st.client,
+        dbName=st.db_name,
+        stmtDbName=st.stmt_db_name or st.db_name,
+        debug=st.settings.inline_debug_value,
+        connectionId=st.connection_id,
+        outcome=outcome,
+        firstWriteTs=span.first_write_ms,
+        endTs=end_ms,
+        durationMs=max(0, end_ms - span.begin_ms),
+        statementCount=span.statements,
+        writeCount=span.writes,
+        errorCount=span.errors,
+        dbTimeNs=span.db_time_ns,
+        rowsAffected=span.rows_affected,
+        iFlags=IVER8 | PY_DRIVER_SQLALCHEMY,
+    )
+    span.reset()
+    _publish_best_effort(st, msg)  # type: ignore[arg-type]
+
+
 def _publish_best_effort(st: _SAState, msg: SqlLogMessage) -> None:
     try:
         st.publisher.publish(msg)
@@ -407,7 +599,10 @@ def _publish_best_effort(st: _SAState, msg: SqlLogMessage) -> None:
 
 def _buffer_or_publish(st: _SAState, msg: SqlLogMessage) -> None:
     if st.settings.buffer_until_commit:
-        st.buffer.append(msg)
+        try:
+            st.buffer.add(msg)
+        except Exception:
+            pass
         return
     _publish_best_effort(st, msg)
 
@@ -431,10 +626,6 @@ def handle_error(exception_context: Any) -> None:
 
         _track_stmt_db_name(st, sql)
 
-        if not _should_capture(st, sql, force_call=False):
-            st.execution_count += 1
-            return
-
         exec_ctx = getattr(exception_context, "execution_context", None)
         t0 = getattr(exec_ctx, "_mi_t0", None)
         duration_ns: Optional[int] = (time.perf_counter_ns() - t0) if isinstance(t0, int) else None
@@ -442,22 +633,50 @@ def handle_error(exception_context: Any) -> None:
         end_ms = time.time_ns() // 1_000_000
         timestamp_ms = end_ms - (duration_ns // 1_000_000) if duration_ns is not None else end_ms
 
+        if st.span is not None:
+            st.span.record(
+                timestamp_ms=timestamp_ms,
+                duration_ns=duration_ns,
+                write=is_write(sql),
+                update_count=None,
+                error=True,
+            )
+            if st.settings.txn_summary_only:
+                _summarize_if_autocommitted(st, sa_conn)
+
+        if (
+            st.settings.txn_summary_only
+            or not _should_capture(st, sql, force_call=False)
+            or (st.circuit is not None and not st.circuit.allow_capture())
+            or (st.limiter is not None and _rate_limited(st, sql, 1))
+        ):
+            st.execution_count += 1
+            return
+
         cursor = getattr(exception_context, "cursor", None)
         dbapi_conn = _get_dbapi_conn_from_sa_connection(sa_conn) if sa_conn is not None else None
         server_info, had_err = extract_server_info_best_effort(cursor, dbapi_conn)
         iflags_extra = PY_ERROR_SERVER_INFO if had_err else 0
 
-        server_flags, _ = _compute_server_flags(sa_conn)
-        st.cached_server_flags = server_flags
         iflags = st.base_iflags | iflags_extra
 
-        query_params = _params_or_none(st, getattr(exception_context, "parameters", None))
+        query_params = None if st.session is not None else _params_or_none(st, getattr(exception_context, "parameters", None))
 
         original = getattr(exception_context, "original_exception", None)
         if original is None:
             original = getattr(exception_context, "original", None)
 
         st.execution_count += 1
+        if st.session is not None:
+            raw = RawStatement(
+                st.session, timestamp_ms, st.stmt_db_name or st.db_name, GLOBAL_POOL_COUNTER.get(),
+                st.execution_count, _read_server_status(sa_conn)[0], iflags, duration_ns, None, sql,
+                capture_params(getattr(exception_context, "parameters", None)), _safe_str(original), server_info,
+            )
+            _publish_best_effort(st, raw)  # type: ignore[arg-type]
+            return
+        server_flags, _ = _compute_server_flags(sa_conn)
+        st.cached_server_flags = server_flags
         msg = _build_message(
             st=st,
             timestamp_ms=timestamp_ms,
@@ -1,2 +1,20 @@
+from typing import Any
+
+from mysql_interceptor.events.models import SqlLogMessage
+
+
 def pytest_configure(config):
     config.addinivalue_line('markers', 'integration: docker-based integration tests')
+
+
+def make_event(n: int = 0, **changes: Any) -> SqlLogMessage:
+    """Statement event number ``n`` on connection 7; keyword arguments override fields."""
+    fields = dict(
+        timestamp=n, serverHost=None, serverVersion=None, user=None, client=None, dbName=None,
+        stmtDbName=None, debug=None, connectionId=7, totalPoolCount=None, executionCount=n,
+        serverFlags=None, clientFlags=None, iFlags=1, defaultTZ=None, serverTZ=None,
+        isolationLvl=None, durationNs=n, updateCount=1, sql=f"UPDATE t SET a={n}",
+        queryParams=None, errorMessage=None, serverInfo=None,
+    )
+    fields.update(changes)
+    return SqlLogMessage(**fields)
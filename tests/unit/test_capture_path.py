@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import time
+
+from mysql_interceptor.config.settings import Settings
+from mysql_interceptor.dbapi.classify import sql_fingerprint
+from mysql_interceptor.dbapi.constants import PY_DEGRADED_PARAMS, PY_DEGRADED_SQL
+from mysql_interceptor.dbapi.wrappers import ConnectionWrapper
+from mysql_interceptor.events.deferred import RawStatement, materialize
+from mysql_interceptor.events.models import SqlLogMessage, SuppressedEventsMessage
+from mysql_interceptor.kafka.batching import QueueingPublisher
+from mysql_interceptor.ratelimit import RateLimiter, RateRule, close_rate_limiters, get_rate_limiter, parse_rules
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _MemPublisher:
+    def __init__(self) -> None:
+        self.events: list = []
+
+    def publish(self, event) -> None:
+        self.events.append(event)
+
+    def publish_batch(self, events: list) -> None:
+        self.events.extend(events)
+
+    def flush(self, timeout=None) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _DeferredMemPublisher(_MemPublisher):
+    accepts_deferred = True
+
+
+class _Cur:
+    rowcount = 1
+
+    def execute(self, sql, params=None):
+        return 1
+
+    def executemany(self, sql, seq):
+        self.rowcount = sum(1 for _ in seq)
+        return self.rowcount
+
+    def fetchone(self):
+        return (9,)
+
+    def close(self):
+        pass
+
+
+class _Conn:
+    server_status = 2
+
+    def cursor(self, *a, **k):
+        return _Cur()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+    def get_server_info(self):
+        return "8.0.0"
+
+
+def _workload(conn: ConnectionWrapper) -> None:
+    cur = conn.cursor()
+    cur.execute("UPDATE users SET token=%(token)s WHERE id=%(id)s", {"token": "s3cr3t", "id": 5})
+    cur.executemany("INSERT INTO t (a) VALUES (%s)", [(1,), ("x" * 10,)])
+    conn.commit()
+    cur.execute("SELECT 1")
+
+
+def _comparable(e: SqlLogMessage) -> dict:
+    d = e.to_dict()
+    for k in ("timestamp", "durationNs", "totalPoolCount"):
+        d.pop(k)
+    return d
+
+
+def test_request_thread_only_enqueues_raw_statements() -> None:
+    pub = _DeferredMemPublisher()
+    s = Settings(deferred_capture=True, buffer_until_commit=False)
+    conn = ConnectionWrapper(conn=_Conn(), publisher=pub, settings=s, driver_name="pymysql", database="test")
+    _workload(conn)
+
+    assert len(pub.events) == 4
+    assert all(isinstance(e, RawStatement) for e in pub.events)
+    # Params are copied as passed, not redacted yet; the status word is converted at build time.
+    assert pub.events[0].params == {"token": "s3cr3t", "id": 5}
+    assert pub.events[0].connectionId == 9
+    assert pub.events[0].server_flags == 2 and pub.events[0].build().serverFlags == 2
+
+
+def test_deferred_params_are_copied_at_capture_time() -> None:
+    pub = _DeferredMemPublisher()
+    s = Settings(deferred_capture=True, buffer_until_commit=False)
+    conn = ConnectionWrapper(conn=_Conn(), publisher=pub, settings=s, driver_name="pymysql", database="test")
+    cur = conn.cursor()
+    params = {"id": 1}
+    cur.execute("UPDATE t SET a=1 WHERE id=%(id)s", params)
+    rows = [[1], [2]]
+    cur.executemany("INSERT INTO t (a) VALUES (%s)", rows)
+    params["id"] = 2  # the application reuses its objects before the workers build the messages
+    rows[0][0] = 3
+    rows[1] = [4]
+
+    assert [e.build().queryParams for e in pub.events] == [["id=1"], ["1"], ["2"]]
+
+
+def test_deferred_messages_match_immediate_capture() -> None:
+    s = Settings(max_param_length=9)
+
+    immediate = _MemPublisher()
+    _workload(ConnectionWrapper(conn=_Conn(), publisher=immediate, settings=s, driver_name="pymysql", database="test"))
+
+    inner = _MemPublisher()
+    deferred_settings = Settings(max_param_length=9, deferred_capture=True)
+    queued = QueueingPublisher(inner=inner, settings=deferred_settings)
+    _workload(
+        ConnectionWrapper(
+            conn=_Conn(), publisher=queued, settings=deferred_settings, driver_name="pymysql", database="test"
+        )
+    )
+    queued.close()
+
+    assert all(isinstance(e, SqlLogMessage) for e in inner.events)
+    assert [_comparable(e) for e in inner.events] == [_comparable(e) for e in immediate.events]
+    assert inner.events[0].queryParams == ["token=***", "id=5"]
+    assert inner.events[2].queryParams == ["xxxxxx..."]
+
+
+def test_deferred_setting_is_ignored_without_a_capable_publisher() -> None:
+    pub = _MemPublisher()
+    s = Settings(deferred_capture=True, buffer_until_commit=False)
+    conn = ConnectionWrapper(conn=_Conn(), publisher=pub, settings=s, driver_name="pymysql", database="test")
+    conn.cursor().execute("SELECT 1")
+
+    assert isinstance(pub.events[0], SqlLogMessage)
+    assert materialize(pub.events) == pub.events
+
+
+def test_a_queue_without_deferred_capture_never_receives_raw_statements() -> None:
+    inner = _MemPublisher()
+    queued = QueueingPublisher(inner=inner, settings=Settings(deferred_capture=False))
+    assert not queued.accepts_deferred
+
+    s = Settings(deferred_capture=True, buffer_until_commit=False)
+    conn = ConnectionWrapper(conn=_Conn(), publisher=queued, settings=s, driver_name="pymysql", database="test")
+    conn.cursor().execute("SELECT 1")
+    queued.close()
+    assert len(inner.events) == 1 and isinstance(inner.events[0], SqlLogMessage)
+
+
+def test_deferred_statements_degrade_at_build_time() -> None:
+    pub = _DeferredMemPublisher()
+    s = Settings(deferred_capture=True, buffer_until_commit=False)
+    conn = ConnectionWrapper(conn=_Conn(), publisher=pub, settings=s, driver_name="pymysql", database="test")
+    conn.cursor().execute("UPDATE t SET a=%s", ("v",))
+    raw = pub.events[0]
+
+    assert raw.build().queryParams == ["v"]
+    msg = raw._replace(degrade=2).build()
+    assert msg.queryParams is None and msg.sql == "fp:" + sql_fingerprint("UPDATE t SET a=%s")
+    assert msg.iFlags & PY_DEGRADED_PARAMS and msg.iFlags & PY_DEGRADED_SQL
+
+
+def test_parse_rules_skips_malformed_entries() -> None:
+    rules = parse_rules(["svc:shop:UPDATE=5/10", "*:*:*=100", "nonsense", "a:b:c=-1"])
+    assert rules == [RateRule("svc", "shop", "update", 5.0, 10.0), RateRule("*", "*", "*", 100.0, 100.0)]
+
+
+def test_buckets_are_keyed_by_schema_and_kind_and_refill() -> None:
+    clock = _Clock()
+    limiter = RateLimiter(parse_rules(["svc:*:update=1/2"]), service="svc", summary_interval_s=5, clock=clock)
+
+    assert [limiter.allow("shop", "update") for _ in range(3)] == [True, True, False]
+    assert limiter.allow("billing", "update")  # its own bucket
+    assert all(limiter.allow("shop", "select") for _ in range(10))  # no rule matches
+    assert not limiter.allow("shop", "update", 2)  # all or nothing
+
+    clock.now += 1
+    assert limiter.allow("shop", "update")
+    assert limiter.pop_summaries() == []  # window still open
+
+    clock.now += 5
+    (summary,) = limiter.pop_summaries()
+    assert isinstance(summary, SuppressedEventsMessage)
+    assert (summary.service, summary.stmtDbName, summary.statementKind, summary.suppressedCount) == (
+        "svc",
+        "shop",
+        "update",
+        3,
+    )
+    assert limiter.pop_summaries() == []
+
+
+def test_connection_suppresses_before_building_and_reports_summary() -> None:
+    s = Settings(
+        rate_limits=["test-rl:test:update=0/2"],
+        rate_limit_summary_interval_s=0.0,
+        service_name="test-rl",
+        buffer_until_commit=False,
+    )
+    assert get_rate_limiter(s) is get_rate_limiter(Settings(**{**s.__dict__}))
+
+    pub = _MemPublisher()
+    conn = ConnectionWrapper(conn=_Conn(), publisher=pub, settings=s, driver_name="pymysql", database="test")
+    cur = conn.cursor()
+    for i in range(4):
+        cur.execute("UPDATE t SET a=%s", (i,))
+    cur.executemany("UPDATE t SET a=%s", [(1,), (2,)])
+    cur.execute("SELECT 1")
+
+    messages = [e for e in pub.events if isinstance(e, SqlLogMessage)]
+    summaries = [e for e in pub.events if isinstance(e, SuppressedEventsMessage)]
+    assert [m.queryParams for m in messages] == [["0"], ["1"], None]
+    assert [m.executionCount for m in messages] == [1, 2, 7]
+    assert sum(s.suppressedCount for s in summaries) == 4
+    assert {(s.stmtDbName, s.statementKind) for s in summaries} == {("test", "update")}
+
+
+def test_closing_a_connection_leaves_the_window_to_the_timer_and_shutdown() -> None:
+    s = Settings(rate_limits=["test-rl-close:test:update=0/1"], service_name="test-rl-close", buffer_until_commit=False)
+    pub = _MemPublisher()
+    conn = ConnectionWrapper(conn=_Conn(), publisher=pub, settings=s, driver_name="pymysql", database="test")
+    cur = conn.cursor()
+    for i in range(3):
+        cur.execute("UPDATE t SET a=%s", (i,))
+    conn.close()
+    assert not [e for e in pub.events if isinstance(e, SuppressedEventsMessage)]  # 10s window still open
+
+    close_rate_limiters()  # what interpreter exit runs
+    (summary,) = [e for e in pub.events if isinstance(e, SuppressedEventsMessage)]
+    assert summary.suppressedCount == 2
+    assert get_rate_limiter(s) is not conn._limiter
+
+
+def test_closing_a_limiter_stops_its_timer() -> None:
+    limiter = RateLimiter(parse_rules(["svc:*:update=0/1"]), service="svc", summary_interval_s=60)
+    pub = _MemPublisher()
+    limiter.attach(pub)
+    assert limiter.allow("shop", "update")
+    assert not limiter.allow("shop", "update")
+    timer = limiter._timer
+    assert timer is not None and timer.is_alive()
+
+    limiter.close()
+    assert not timer.is_alive()
+    assert [e.suppressedCount for e in pub.events] == [1]
+    assert not limiter.allow("shop", "update") and limiter._timer is timer  # no new timer after close
+
+
+def test_timer_reports_to_the_attached_publisher_without_further_statements() -> None:
+    limiter = RateLimiter(parse_rules(["svc:*:update=0/1"]), service="svc", summary_interval_s=0.1)
+    assert limiter.allow("shop", "update")
+    pub = _MemPublisher()
+    limiter.attach(pub)
+    assert not limiter.allow("shop", "update")
+
+    deadline = time.monotonic() + 5
+    while not pub.events and time.monotonic() < deadline:
+        time.sleep(0.02)
+    (summary,) = pub.events
+    assert (summary.stmtDbName, summary.suppressedCount) == ("shop", 1)
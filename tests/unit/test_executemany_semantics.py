@@ -16,7 +16,7 @@ class _MemPublisher(Publisher):
     def publish_batch(self, events: list[SqlLogMessage]) -> None:
         self.events.extend(events)
 
-    def flush(self) -> None:
+    def flush(self, timeout=None) -> None:
         return
 
 
@@ -13,7 +13,7 @@ class _MemPublisher(Publisher):
         self.events.append(event)
     def publish_batch(self, events: list[SqlLogMessage]) -> None:
         self.events.extend(events)
-    def flush(self) -> None:
+    def flush(self, timeout=None) -> None:
         pass
     def close(self) -> None:
         pass
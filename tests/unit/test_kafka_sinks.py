@@ -0,0 +1,519 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from mysql_interceptor.aggregator import Aggregator
+from mysql_interceptor.config.settings import Settings
+from mysql_interceptor.connect import _build_default_kafka_publisher
+from mysql_interceptor.dbapi.wrappers import ConnectionWrapper
+from mysql_interceptor.events.models import OutageSummaryMessage
+from mysql_interceptor.kafka.bootstrap import BootstrappingPublisher
+from mysql_interceptor.kafka.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from mysql_interceptor.kafka.confluent import ConfluentKafkaPublisher
+from mysql_interceptor.kafka.profiles import PROFILES, parse_conf, producer_conf
+from mysql_interceptor.kafka.sidecar import FrameReader, SidecarPublisher, pack_frames
+from mysql_interceptor.kafka.spill import SpillQueue
+from tests.conftest import make_event
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _Producer:
+    """Local stand-in for confluent_kafka.Producer: a bounded queue drained by poll() when ``drains``."""
+
+    def __init__(self, capacity: int = 1000, drains: bool = True) -> None:
+        self.capacity = capacity
+        self.drains = drains
+        self.queued: list = []
+        self.delivered: list = []
+        self.polls: list = []
+
+    def produce(self, topic, key=None, value=None, on_delivery=None):
+        if len(self.queued) >= self.capacity:
+            raise BufferError("Local: Queue full")
+        self.queued.append((key, value))
+
+    def poll(self, timeout=0):
+        self.polls.append(timeout)
+        if not self.drains:
+            return 0
+        n = len(self.queued)
+        self.delivered.extend(self.queued)
+        self.queued = []
+        return n
+
+    def flush(self, timeout=None):
+        self.poll(0)
+        return len(self.queued)
+
+
+class _Msg:
+    def __init__(self, key, value) -> None:
+        self._key = key
+        self._value = value
+
+    def key(self):
+        return self._key
+
+    def value(self):
+        return self._value
+
+
+class _OutageProducer:
+    """Local stand-in for confluent_kafka.Producer: a bounded queue; while down, deliveries fail."""
+
+    def __init__(self, capacity: int = 2) -> None:
+        self.up = True
+        self.capacity = capacity
+        self.produced = 0
+        self.queued: list = []
+        self.delivered: list = []
+
+    def produce(self, topic, key=None, value=None, on_delivery=None):
+        if len(self.queued) >= self.capacity:
+            raise BufferError("Local: Queue full")
+        self.produced += 1
+        k = key.encode() if isinstance(key, str) else key
+        self.queued.append((_Msg(k, bytes(value)), on_delivery))
+
+    def poll(self, timeout=0):
+        return self._deliver()
+
+    def flush(self, timeout=None):
+        self._deliver()
+        return len(self.queued)
+
+    def _deliver(self) -> int:
+        queued, self.queued = self.queued, []
+        for msg, cb in queued:
+            if self.up:
+                self.delivered.append(msg)
+            if cb is not None:
+                cb(None if self.up else "broker down", msg)
+        return len(queued)
+
+
+class _WarmingSink:
+    def __init__(self, warm: bool = True) -> None:
+        self.records: list = []
+        self.warm = warm
+        self.warmed_with = None
+
+    def publish(self, event) -> None:
+        self.records.append(event.executionCount)
+
+    def publish_batch(self, events: list) -> None:
+        self.records.extend(e.executionCount for e in events)
+
+    def publish_serialized(self, values, *, key=None) -> None:
+        self.records.extend(bytes(v) for v in values)
+
+    def warmup(self, timeout: float) -> bool:
+        self.warmed_with = timeout
+        return self.warm
+
+    def flush(self, timeout=None) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _StubSink:
+    """Stands in for the aggregator's Kafka publisher."""
+
+    def __init__(self) -> None:
+        self.calls: list = []
+        self.closed = False
+
+    def publish_serialized(self, values, *, key=None) -> None:
+        self.calls.append((key, [bytes(v) for v in values]))
+
+    def flush(self, timeout=None) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class _Cur:
+    rowcount = 1
+
+    def execute(self, sql, params=None):
+        return 1
+
+    def fetchone(self):
+        return (9,)
+
+    def close(self):
+        pass
+
+
+class _Conn:
+    server_status = 2
+
+    def cursor(self, *a, **k):
+        return _Cur()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+    def get_server_info(self):
+        return "8.0.0"
+
+
+def _wait_for(cond, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return cond()
+
+
+def test_batch_polls_once_and_reuses_keys() -> None:
+    producer = _Producer()
+    pub = ConfluentKafkaPublisher(bootstrap_servers="unused:9092", topic="t", producer=producer)
+    pub.publish_batch([make_event(i, connectionId=i % 2 + 1) for i in range(6)])
+
+    assert producer.polls == [0]
+    assert [k for k, _ in producer.delivered] == ["1", "2", "1", "2", "1", "2"]
+    assert [json.loads(v)["executionCount"] for _, v in producer.delivered] == list(range(6))
+
+
+def test_full_queue_is_retried_after_polling() -> None:
+    producer = _Producer(capacity=2)
+    pub = ConfluentKafkaPublisher(bootstrap_servers="unused:9092", topic="t", producer=producer)
+    pub.publish_batch([make_event(i) for i in range(5)])
+    pub.flush()
+
+    assert [json.loads(v)["executionCount"] for _, v in producer.delivered] == [0, 1, 2, 3, 4]
+    assert pub.dropped == 0
+    assert producer.polls[0] == 0.001  # first backoff step
+
+
+def test_batch_is_dropped_once_the_deadline_passes() -> None:
+    producer = _Producer(capacity=2, drains=False)
+    pub = ConfluentKafkaPublisher(
+        bootstrap_servers="unused:9092", topic="t", producer=producer, produce_timeout_s=0.05
+    )
+    pub.publish_batch([make_event(i) for i in range(5)])
+
+    assert pub.dropped == 3
+    assert len(producer.queued) == 2
+    assert 0.001 in producer.polls and max(producer.polls) <= 0.1
+
+
+def test_conf_passthrough_is_read_from_env() -> None:
+    env = {
+        "INTERCEPTOR_KAFKA_PROFILE": "max-throughput",
+        "INTERCEPTOR_KAFKA_CONF_COMPRESSION_TYPE": "lz4",
+        "INTERCEPTOR_KAFKA_CONF_ENABLE_IDEMPOTENCE": "true",
+        "INTERCEPTOR_KAFKA_CONF_EMPTY": "",
+    }
+    with mock.patch.dict(os.environ, env):
+        s = Settings.from_env()
+    assert s.kafka_profile == "max-throughput"
+    assert s.kafka_conf == ["compression.type=lz4", "enable.idempotence=true"]
+    assert Settings().kafka_conf == []
+
+
+def test_profile_then_overrides_win() -> None:
+    base = {"bootstrap.servers": "k:9092", "linger.ms": 1000, "batch.size": 16384}
+    conf = producer_conf(base, profile="Max-Throughput", overrides=["compression.type=lz4", "bogus"])
+
+    assert conf["bootstrap.servers"] == "k:9092"
+    assert conf["linger.ms"] == PROFILES["max-throughput"]["linger.ms"]
+    assert conf["batch.num.messages"] == 100_000
+    assert conf["compression.type"] == "lz4"
+    assert "bogus" not in conf and "debug" not in conf
+
+    assert producer_conf(base, profile="no-such-profile") == base
+    assert parse_conf(["a.b = 1", "=x", "c=d=e"]) == {"a.b": "1", "c": "d=e"}
+
+
+def test_events_wait_in_a_bounded_queue_until_the_sink_is_ready() -> None:
+    gate = threading.Event()
+    inner = _WarmingSink(warm=False)
+
+    def build(decisions):
+        gate.wait(5)
+        decisions.append({"sink": "mem", "outcome": "ok"})
+        return inner
+
+    pub = BootstrappingPublisher(build, max_pending=4, warmup_timeout_s=3.0)
+    pub.publish(make_event(1))
+    pub.publish_serialized([memoryview(b"raw")], key=7)
+    pub.publish_batch([make_event(2), make_event(3), make_event(4)])  # would exceed 4: dropped
+    pub.publish_batch([make_event(5), make_event(6)])
+    assert not pub.wait_ready(0.05)
+    assert pub.flush(timeout=0.05) is False
+
+    stats = pub.stats()
+    assert (stats["ready"], stats["pending"], stats["dropped_pending"]) == (False, 4, 3)
+
+    gate.set()
+    assert pub.wait_ready(5)
+    pub.publish(make_event(7))
+    assert inner.records == [1, b"raw", 5, 6, 7]
+    stats = pub.stats()
+    assert stats["ready"] and stats["sink"] == "_WarmingSink" and stats["time_to_ready_ms"] > 0
+    assert stats["warmup"] == "timeout" and inner.warmed_with == 3.0
+    assert stats["decisions"] == [{"sink": "mem", "outcome": "ok"}]
+    pub.close()
+
+
+def test_settings_build_records_sink_fallbacks_in_the_background() -> None:
+    pub = _build_default_kafka_publisher(
+        Settings(kafka_async_bootstrap=True, kafka_bootstrap_servers="unused:9092", bootstrap_warmup_timeout_s=0.1)
+    )
+    assert isinstance(pub, BootstrappingPublisher)
+    assert pub.wait_ready(10)
+    decisions = pub.stats()["decisions"]
+    *rejected, chosen = decisions
+    assert chosen["outcome"].startswith("ok")
+    assert all(d["outcome"].startswith("error") for d in rejected)
+
+
+def test_spill_queue_is_fifo_durable_and_bounded(tmp_path) -> None:
+    q = SpillQueue(str(tmp_path), max_bytes=10_000, segment_bytes=32)
+    assert q.append([(b"k", b"v%d" % i) for i in range(5)]) == 5
+    assert len(os.listdir(tmp_path)) > 2  # rotated into several segments
+
+    batch, pos = q.read_batch(2)
+    assert batch == [(b"k", b"v0"), (b"k", b"v1")]
+    q.commit(pos)
+    q.close()
+
+    # A torn frame at the end of the last segment is ignored after a restart.
+    last = sorted(n for n in os.listdir(tmp_path) if n.endswith(".log"))[-1]
+    with open(tmp_path / last, "ab") as f:
+        f.write(b"\x00\x00\x00\x01\x00")
+
+    q = SpillQueue(str(tmp_path), max_bytes=10_000, segment_bytes=32)
+    q.append([(b"k", b"v5")])
+    batch, pos = q.read_batch(100)
+    assert [v for _, v in batch] == [b"v2", b"v3", b"v4", b"v5"]
+    q.commit(pos)
+    assert q.empty and q.nbytes == 0
+
+    small = SpillQueue(str(tmp_path / "small"), max_bytes=40)
+    assert small.append([(b"", b"x" * 20), (b"", b"y" * 20)]) == 1
+    assert small.dropped == 1
+
+
+def test_a_torn_tail_is_skipped_and_replay_goes_idle(tmp_path) -> None:
+    slot = tmp_path / "worker-0"
+    q = SpillQueue(str(slot), max_bytes=10_000)
+    q.append([(b"7", b'{"executionCount":0}')])
+    q.close()
+    segment = next(n for n in os.listdir(slot) if n.endswith(".log"))
+    with open(slot / segment, "ab") as f:
+        f.write(b"\x00\x00\x00\x01\x00")  # half a frame header: the process died mid-write
+
+    producer = _OutageProducer(capacity=100)
+    pub = ConfluentKafkaPublisher(
+        bootstrap_servers="unused:9092", topic="t", producer=producer, spill_dir=str(tmp_path), replay_backoff_s=0.01
+    )
+    pub._start()  # what the first publish does: claim the slot and start replaying it
+    assert _wait_for(lambda: not pub._spilling)
+    assert pub._spill.empty and pub.replayed == 1
+
+    reads = []
+    real_read = pub._spill.read_batch
+    pub._spill.read_batch = lambda n: reads.append(n) or real_read(n)  # type: ignore[method-assign]
+    time.sleep(0.3)
+    assert len(reads) <= 1  # idle: waiting for the next outage, not polling the disk
+    pub.publish(make_event(1))
+    pub.close()
+    assert [json.loads(m.value())["executionCount"] for m in producer.delivered] == [0, 1]
+
+
+def test_outage_spills_to_disk_and_replays_in_order(tmp_path) -> None:
+    producer = _OutageProducer(capacity=2)
+    pub = ConfluentKafkaPublisher(
+        bootstrap_servers="unused:9092",
+        topic="t",
+        producer=producer,
+        spill_dir=str(tmp_path),
+        replay_backoff_s=0.01,
+        replay_timeout_s=0.1,
+    )
+
+    producer.up = False
+    pub.publish_batch([make_event(i) for i in range(5)])
+    pub.publish_serialized([memoryview(b'{"raw":1}')], key=7)
+    assert pub.spilled >= 6
+    assert producer.delivered == []
+
+    producer.up = True
+    assert _wait_for(lambda: pub.replayed == 6 and not pub._spilling)
+    pub.publish(make_event(5))
+    pub.close()
+
+    values = [json.loads(m.value()) for m in producer.delivered]
+    assert [v.get("executionCount") for v in values] == [0, 1, 2, 3, 4, None, 5]
+    assert {m.key() for m in producer.delivered} == {b"7"}
+    assert [n for n in os.listdir(tmp_path / "worker-0") if n.endswith(".log")] == []
+
+
+def test_spilled_events_survive_a_restart(tmp_path) -> None:
+    down = _OutageProducer()
+    down.up = False
+    pub = ConfluentKafkaPublisher(
+        bootstrap_servers="unused:9092", topic="t", producer=down, spill_dir=str(tmp_path), replay_backoff_s=5
+    )
+    pub.publish_batch([make_event(i) for i in range(3)])
+    pub._closed.set()  # simulate the process exiting without a successful replay
+    pub.close()
+
+    up = _OutageProducer(capacity=100)
+    pub = ConfluentKafkaPublisher(
+        bootstrap_servers="unused:9092", topic="t", producer=up, spill_dir=str(tmp_path), replay_backoff_s=0.01
+    )
+    assert pub._replayer is None  # nothing starts before the first publish
+    pub.publish(make_event(3))  # claims the slot, replays what was left, then the new event
+    assert _wait_for(lambda: pub.replayed >= 3 and not pub._spilling)
+    pub.close()
+    assert [json.loads(m.value())["executionCount"] for m in up.delivered] == [0, 1, 2, 3]
+
+
+def test_publishers_sharing_a_spill_dir_each_claim_a_slot(tmp_path) -> None:
+    producers = [_OutageProducer(), _OutageProducer()]
+    pubs = [
+        ConfluentKafkaPublisher(bootstrap_servers="unused:9092", topic="t", producer=p, spill_dir=str(tmp_path))
+        for p in producers
+    ]
+    for p in producers:
+        p.up = False
+    pubs[0].publish(make_event(0))
+    pubs[1].publish(make_event(1))
+    assert {p._spill.directory for p in pubs} == {str(tmp_path / "worker-0"), str(tmp_path / "worker-1")}
+    assert [n for n in os.listdir(tmp_path) if n.endswith(".log") or n == "cursor"] == []
+    for p in pubs:
+        p._closed.set()
+        p.close()
+
+
+def test_breaker_opens_half_opens_and_closes() -> None:
+    clock = _Clock()
+    cb = CircuitBreaker(failure_threshold=3, reset_timeout_s=5, probe_events=2, service="svc", clock=clock)
+
+    cb.record_failure()
+    cb.record_failure()
+    cb.record_success()  # resets the streak
+    assert cb.state is CLOSED
+    for _ in range(3):
+        cb.record_failure()
+    assert cb.state is OPEN
+    assert [cb.allow_capture() for _ in range(4)] == [False] * 4
+
+    clock.now += 5
+    assert [cb.allow_capture() for _ in range(3)] == [True, True, False]
+    assert cb.state is HALF_OPEN
+    cb.record_failure()  # probe failed
+    assert cb.state is OPEN and not cb.allow_capture()
+
+    clock.now += 5
+    assert [cb.allow_capture() for _ in range(3)] == [True, True, False]
+    clock.now += 5  # no verdict: another round of probes
+    assert cb.allow_capture(2) and not cb.allow_capture()
+    assert cb.pop_summary() is None
+    cb.record_success()
+    assert cb.state is CLOSED and cb.allow_capture()
+
+    summary = cb.pop_summary()
+    assert isinstance(summary, OutageSummaryMessage)
+    assert (summary.service, summary.failures, summary.skippedCount) == ("svc", 4, 8)
+    assert cb.pop_summary() is None
+
+
+def test_open_breaker_skips_capture_until_the_sink_recovers() -> None:
+    clock = _Clock()
+    producer = _OutageProducer(capacity=1000)
+    cb = CircuitBreaker(failure_threshold=2, reset_timeout_s=5, probe_events=1, service="svc", clock=clock)
+    pub = ConfluentKafkaPublisher(bootstrap_servers="unused:9092", topic="t", producer=producer, circuit=cb)
+    s = Settings(buffer_until_commit=False)
+    conn = ConnectionWrapper(conn=_Conn(), publisher=pub, settings=s, driver_name="pymysql", database="test")
+    cur = conn.cursor()
+
+    producer.up = False
+    for i in range(3):
+        cur.execute("UPDATE t SET a=%s", (i,))
+    assert cb.state is OPEN
+    produced = producer.produced
+    for i in range(100):
+        cur.execute("UPDATE t SET a=%s", (i,))
+    assert producer.produced == produced  # nothing built or produced while open
+
+    producer.up = True
+    clock.now += 5
+    cur.execute("UPDATE t SET a=%s", ("probe",))  # half-open probe
+    assert cb.state is CLOSED
+    cur.execute("UPDATE t SET a=%s", ("after",))
+    pub.close()
+
+    values = [json.loads(m.value()) for m in producer.delivered]
+    assert values[0]["queryParams"] == ["probe"]
+    assert values[1]["recordType"] == "outage" and values[1]["skippedCount"] == 101
+    assert values[2]["queryParams"] == ["after"] and values[2]["executionCount"] == 105
+
+
+def test_frame_reader_handles_split_reads() -> None:
+    data = pack_frames([b"a", b"bcd"], 7) + pack_frames([b""], None)
+    reader = FrameReader()
+    out = []
+    for i in range(len(data)):
+        out.extend(reader.feed(data[i : i + 1]))
+    assert out == [(7, b"a"), (7, b"bcd"), (None, b"")]
+
+
+def test_processes_ship_through_one_aggregator_sink() -> None:
+    path = os.path.join(tempfile.mkdtemp(), "agg.sock")
+    sink = _StubSink()
+    agg = Aggregator(path, sink)
+    agg.start()
+    try:
+        a = SidecarPublisher(path)
+        b = SidecarPublisher(path)
+        a.publish_batch([make_event(1), make_event(2), make_event(3, connectionId=9)])
+        b.publish(make_event(4, connectionId=11))
+        a.publish_serialized([memoryview(b'{"raw":1}')], key=7)
+        assert _wait_for(lambda: agg.frames == 5)
+        assert (a.sent, b.sent, a.dropped) == (4, 1, 0)
+    finally:
+        agg.stop()
+    a.close()
+    b.close()
+
+    assert sink.closed and agg.connections == 2
+    by_key = {}
+    for key, values in sink.calls:
+        by_key.setdefault(key, []).extend(json.loads(v) for v in values)
+    assert [v.get("executionCount") for v in by_key[7]] == [1, 2, None]
+    assert [v["executionCount"] for v in by_key[9]] == [3]
+    assert [v["executionCount"] for v in by_key[11]] == [4]
+
+
+def test_unreachable_aggregator_drops_and_counts() -> None:
+    pub = SidecarPublisher(os.path.join(tempfile.mkdtemp(), "missing.sock"), reconnect_interval_s=60)
+    pub.publish_batch([make_event(1), make_event(2)])
+    pub.publish(make_event(3))  # no reconnect attempt within the interval
+    assert (pub.sent, pub.dropped) == (0, 3)
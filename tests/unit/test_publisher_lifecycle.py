@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+import dataclasses
+import gc
+import importlib
+import json
+import os
+import threading
+import time
+from typing import Iterator
+
+import pytest
+
+from mysql_interceptor.adapters.registry import get_adapter_with_defaults, register_adapter
+from mysql_interceptor import forksafe
+from mysql_interceptor.aggregator import Aggregator
+from mysql_interceptor.config.settings import Settings
+from mysql_interceptor.connect import connect
+from mysql_interceptor.dbapi.wrappers import ConnectionWrapper
+from mysql_interceptor.kafka.batching import QueueingPublisher
+from mysql_interceptor.kafka.confluent import ConfluentKafkaPublisher
+from mysql_interceptor.kafka.registry import PUBLISHER_FIELDS, PublisherRegistry
+from mysql_interceptor.kafka.spill import claim_worker_dir
+from tests.conftest import make_event
+
+needs_fork = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+
+
+class _MemPublisher:
+    def __init__(self) -> None:
+        self.events: list = []
+        self.closed = False
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+
+    def publish(self, event) -> None:
+        self.publish_batch([event])
+
+    def publish_batch(self, events: list) -> None:
+        self.entered.set()
+        self.gate.wait(5)
+        self.events.extend(events)
+
+    def flush(self, timeout=None) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class _SlowPublisher:
+    """flush() blocks like a Producer.flush() against an unreachable broker."""
+
+    def __init__(self) -> None:
+        self.events: list = []
+        self.flush_calls: list = []
+        self.drain_requests = 0
+        self.received = threading.Event()
+
+    def publish(self, event) -> None:
+        self.publish_batch([event])
+
+    def publish_batch(self, events: list) -> None:
+        self.events.extend(events)
+        self.received.set()
+
+    def flush(self, timeout=None) -> bool:
+        self.flush_calls.append(timeout)
+        time.sleep(timeout if timeout is not None else 30)
+        return False
+
+    def request_flush(self) -> None:
+        self.drain_requests += 1
+
+    def close(self) -> None:
+        pass
+
+
+class _Cur:
+    rowcount = 1
+
+    def execute(self, sql, params=None):
+        return 1
+
+    def fetchone(self):
+        return (9,)
+
+    def close(self):
+        pass
+
+
+class _Conn:
+    server_status = 2
+
+    def cursor(self, *a, **k):
+        return _Cur()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+    def get_server_info(self):
+        return "8.0.0"
+
+
+class _FakeAdapter:
+    name = "fake-lifecycle"
+
+    def connect(self, *args, **kwargs):
+        return _Conn()
+
+    def database_name(self, conn, connect_kwargs):
+        return connect_kwargs.get("database")
+
+
+class _StuckProducer:
+    def __init__(self) -> None:
+        self.flush_timeouts: list = []
+
+    def produce(self, topic, key=None, value=None, on_delivery=None):
+        pass
+
+    def poll(self, timeout=0):
+        return 0
+
+    def flush(self, timeout=None):
+        self.flush_timeouts.append(timeout)
+        return 3  # still queued
+
+
+class _DownProducer:
+    def produce(self, topic, key=None, value=None, on_delivery=None):
+        raise BufferError("Local: Queue full")
+
+    def poll(self, timeout=0):
+        return 0
+
+    def flush(self, timeout=None):
+        return 0
+
+
+def _in_child(fn) -> dict:
+    """Run fn() in a forked child and return the JSON-able dict it produced."""
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - runs in the child
+        code = 0
+        try:
+            os.write(w, json.dumps(fn()).encode())
+        except BaseException:
+            code = 1
+        finally:
+            os._exit(code)
+    os.close(w)
+    with os.fdopen(r, "rb") as f:
+        out = f.read()
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    return json.loads(out)
+
+
+def test_registry_builds_once_per_publisher_stack_and_keeps_it_open() -> None:
+    registry = PublisherRegistry()
+    built = []
+
+    def factory(settings):
+        built.append(_MemPublisher())
+        return built[-1]
+
+    a = registry.get(Settings(kafka_topic="a"), factory)
+    # Capture policy, redaction and payload toggles do not shape the stack.
+    same = Settings(kafka_topic="a", redact_keys=["pw"], include_sql=False, capture_all=False)
+    assert registry.get(same, factory) is a
+    b = registry.get(Settings(kafka_topic="b"), factory)
+    c = registry.get(Settings(kafka_topic="a", deferred_capture=True), factory)
+    assert b is not a and c is not a and len(built) == 3 and not a.closed
+
+
+def test_publisher_fields_name_settings_fields() -> None:
+    assert set(PUBLISHER_FIELDS) <= {f.name for f in dataclasses.fields(Settings)}
+
+
+@pytest.fixture
+def shared_publishers(monkeypatch) -> Iterator[PublisherRegistry]:
+    """A fresh registry in place of SHARED_PUBLISHERS, so no stack outlives the test."""
+    registry = PublisherRegistry()
+    monkeypatch.setattr(importlib.import_module("mysql_interceptor.connect"), "SHARED_PUBLISHERS", registry)
+    yield registry
+    for publisher in registry._by_key.values():
+        publisher.close()
+
+
+def test_direct_connections_share_one_publisher_stack(shared_publishers) -> None:
+    get_adapter_with_defaults("pymysql")  # keep the built-in adapters registered alongside ours
+    register_adapter(_FakeAdapter())
+    s = Settings(enable_queueing_publisher=True, kafka_bootstrap_servers=None, kafka_topic="shared-test")
+
+    c1 = connect(driver="fake-lifecycle", settings=s, database="test")
+    c2 = connect(driver="fake-lifecycle", settings=s, database="test")
+    pub = c1._publisher
+    assert isinstance(pub, QueueingPublisher) and c2._publisher is pub
+    assert list(shared_publishers._by_key.values()) == [pub]
+
+    c1.close()
+    c2.close()
+
+    # A sequential connect()/close() loop reuses the one stack instead of rebuilding it.
+    for _ in range(3):
+        c = connect(driver="fake-lifecycle", settings=s, database="test")
+        assert c._publisher is pub
+        c.close()
+
+
+def test_connection_close_requests_a_drain_instead_of_flushing() -> None:
+    inner = _SlowPublisher()
+    s = Settings(buffer_until_commit=False, publish_flush_interval_s=60, publish_batch_size=100)
+    pub = QueueingPublisher(inner=inner, settings=s)
+    conn = ConnectionWrapper(conn=_Conn(), publisher=pub, settings=s, driver_name="pymysql", database="test")
+    conn.cursor().execute("UPDATE t SET a=1")
+
+    start = time.monotonic()
+    conn.close()
+    assert time.monotonic() - start < 0.5
+    # The worker publishes the partial batch right away instead of after the 60s interval.
+    assert inner.received.wait(5)
+    assert [e.executionCount for e in inner.events] == [1]
+    assert inner.flush_calls == []
+    deadline = time.monotonic() + 5
+    while inner.drain_requests == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert inner.drain_requests == 1
+
+
+def test_closing_connections_on_a_shared_publisher_never_waits(monkeypatch, shared_publishers) -> None:
+    get_adapter_with_defaults("pymysql")  # keep the built-in adapters registered alongside ours
+    register_adapter(_FakeAdapter())
+    inner = _SlowPublisher()
+    connect_module = importlib.import_module("mysql_interceptor.connect")  # the package re-exports connect()
+    monkeypatch.setattr(connect_module, "_build_publisher_stack", lambda s: QueueingPublisher(inner=inner, settings=s))
+    s = Settings(
+        kafka_topic="nonblocking-shared", buffer_until_commit=False, enable_queueing_publisher=True,
+        publish_flush_interval_s=60, shutdown_flush_timeout_s=0.1,
+    )
+    for n in range(3):
+        conn = connect(driver="fake-lifecycle", settings=s, database="test")
+        conn.cursor().execute(f"UPDATE t SET a={n}")
+        start = time.monotonic()
+        conn.close()
+        assert time.monotonic() - start < 0.5
+    assert inner.flush_calls == []
+    deadline = time.monotonic() + 5
+    while len(inner.events) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(inner.events) == 3
+
+
+def test_flush_timeouts_are_bounded_end_to_end() -> None:
+    producer = _StuckProducer()
+    kafka = ConfluentKafkaPublisher(bootstrap_servers="unused:9092", topic="t", producer=producer)
+    kafka.publish(make_event(1))
+    assert kafka.flush(timeout=0.25) is False
+    assert producer.flush_timeouts == [0.25]
+
+    pub = QueueingPublisher(inner=kafka, settings=Settings(publish_flush_interval_s=60))
+    pub.publish(make_event(2))
+    assert pub.flush(timeout=1.0) is False  # handed over, but not delivered
+    assert 0 < producer.flush_timeouts[-1] <= 1.0
+
+
+def test_close_and_stop_bound_the_inner_flush() -> None:
+    inner = _SlowPublisher()
+    pub = QueueingPublisher(inner=inner, settings=Settings(shutdown_flush_timeout_s=0.2))
+    pub.publish(make_event(1))
+    start = time.monotonic()
+    assert pub.flush() is False  # no timeout given: shutdown_flush_timeout_s bounds it
+    pub.close(timeout=0.1)
+    assert time.monotonic() - start < 1.0
+    assert inner.flush_calls[0] <= 0.2 and inner.flush_calls[1] <= 0.1
+
+    producer = _StuckProducer()
+    kafka = ConfluentKafkaPublisher(bootstrap_servers="unused:9092", topic="t", producer=producer, close_timeout_s=0.3)
+    kafka.publish(make_event(2))
+    kafka.close()
+    assert producer.flush_timeouts and producer.flush_timeouts[-1] <= 0.3
+
+    sink = _SlowPublisher()
+    agg = Aggregator("/nonexistent/agg.sock", sink)
+    start = time.monotonic()
+    agg.stop(timeout=0.2)
+    assert time.monotonic() - start < 1.0 and sink.flush_calls[0] <= 0.2
+
+
+def test_registry_flush_all_respects_the_shutdown_timeout() -> None:
+    registry = PublisherRegistry()
+    slow = registry.get(Settings(shutdown_flush_timeout_s=0.2), lambda s: _SlowPublisher())
+    start = time.monotonic()
+    assert registry.flush_all() is False
+    assert time.monotonic() - start < 1.0
+    assert slow.flush_calls and slow.flush_calls[0] <= 0.2
+
+
+@needs_fork
+def test_worker_threads_start_lazily_and_children_drop_inherited_events() -> None:
+    inner = _MemPublisher()
+    inner.gate.clear()
+    pub = QueueingPublisher(inner=inner, settings=Settings(publish_batch_size=1, publish_flush_interval_s=60))
+    assert all(shard._thread is None for shard in pub._shards)
+
+    pub.publish(make_event(0))
+    assert inner.entered.wait(5)  # the worker holds event 0
+    pub.publish(make_event(1))  # queued at fork time
+
+    def child() -> dict:
+        inherited = pub.stats()[0]
+        inner.gate.set()
+        pub.publish(make_event(100))
+        pub.close()
+        return {"inherited": inherited["queue_depth"], "events": [e.executionCount for e in inner.events]}
+
+    out = _in_child(child)
+    assert out == {"inherited": 0, "events": [100]}
+
+    inner.gate.set()
+    pub.close()
+    assert [e.executionCount for e in inner.events] == [0, 1]
+
+
+class _ForkAware:
+    def __init__(self, name: str, log: list) -> None:
+        self.name = name
+        self.log = log
+        forksafe.reinit_after_fork(self)
+
+    def _after_fork_in_child(self) -> None:
+        self.log.append(self.name)
+
+
+@needs_fork
+def test_one_fork_hook_walks_live_objects_in_order() -> None:
+    log: list = []
+    first, gone, last = _ForkAware("first", log), _ForkAware("gone", log), _ForkAware("last", log)
+    ours = [ref for ref, _ in forksafe._HOOKS.values() if isinstance(ref(), _ForkAware)]
+    assert len(ours) == 3
+    del gone
+    gc.collect()
+    assert sum(1 for ref, _ in forksafe._HOOKS.values() if ref in ours) == 2  # collected objects leave
+
+    assert _in_child(lambda: log) == ["first", "last"]
+    assert log == [] and first and last
+
+
+@needs_fork
+def test_forked_child_spills_into_its_own_slot(tmp_path) -> None:
+    pub = ConfluentKafkaPublisher(
+        bootstrap_servers="unused:9092", topic="t", producer=_DownProducer(), spill_dir=str(tmp_path)
+    )
+    assert pub._replayer is None  # nothing to replay: no thread until the first publish
+
+    def child() -> dict:
+        pub.publish(make_event(1))
+        pub.close()
+        return {"spill": pub._spill.directory, "spilled": pub.spilled}
+
+    out = _in_child(child)
+    assert out == {"spill": str(tmp_path / "worker-0"), "spilled": 1}
+    assert pub.spilled == 0 and pub._spill is None  # the parent never published: no slot, no thread
+    assert any(n.startswith("spill-") for n in os.listdir(tmp_path / "worker-0"))
+    # The child exited, so its slot (and what it spilled) is free for the next one.
+    assert claim_worker_dir(str(tmp_path)) == str(tmp_path / "worker-0")
+    pub.close()
@@ -0,0 +1,625 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+
+from mysql_interceptor.config.settings import Settings
+from mysql_interceptor.dbapi.classify import sql_fingerprint
+from mysql_interceptor.dbapi.constants import PY_DEGRADED_PARAMS, PY_DEGRADED_SQL
+from mysql_interceptor.dbapi.txn_buffer import TransactionBuffer
+from mysql_interceptor.events.degrade import FINGERPRINT_SQL, SHED_WRITES, degrade_message
+from mysql_interceptor.events.models import SqlLogMessage, TxnSummaryMessage
+from mysql_interceptor.events.sizing import EVENT_OVERHEAD_BYTES, estimate_size
+from mysql_interceptor.kafka.batching import HIGH, READ, QueueingPublisher, lane_of
+from mysql_interceptor.kafka.confluent import _json_serializer
+from mysql_interceptor.kafka.process_pool import ProcessPoolSerializingPublisher
+from mysql_interceptor.pool_counter import PoolCounter
+from tests.conftest import make_event
+
+
+@dataclass
+class _Ev:
+    sql: str
+    queryParams: Optional[list] = None
+    errorMessage: Optional[str] = None
+
+
+class _MemPublisher:
+    def __init__(self) -> None:
+        self.batches: list[list] = []
+        self.flushed = 0
+        self.closed = False
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+
+    def publish(self, event) -> None:
+        self.batches.append([event])
+
+    def publish_batch(self, events: list) -> None:
+        self.entered.set()
+        self.gate.wait(5)
+        self.batches.append(list(events))
+
+    def flush(self, timeout=None) -> None:
+        self.flushed += 1
+
+    def close(self) -> None:
+        self.closed = True
+
+    @property
+    def events(self) -> list:
+        return [e for b in self.batches for e in b]
+
+
+class _BytesSink:
+    def __init__(self) -> None:
+        self.records: list[tuple[Optional[int], bytes]] = []
+        self.objects: list = []
+
+    def serialize(self, event) -> bytes:
+        return _json_serializer(event)
+
+    def publish(self, event) -> None:
+        self.objects.append(event)
+
+    def publish_batch(self, events: list) -> None:
+        self.objects.extend(events)
+
+    def publish_serialized(self, values, *, key: Optional[int] = None) -> None:
+        self.records.extend((key, bytes(v)) for v in values)
+
+    def flush(self, timeout=None) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _parked(settings: Settings) -> tuple[_MemPublisher, QueueingPublisher]:
+    inner = _MemPublisher()
+    inner.gate.clear()
+    pub = QueueingPublisher(inner=inner, settings=settings)
+    pub.publish(_Ev("USE app"))
+    assert inner.entered.wait(5)
+    return inner, pub
+
+
+def _degradable(n: int, sql: str = "UPDATE t SET a=%s WHERE id=%s") -> SqlLogMessage:
+    return make_event(n, sql=sql, queryParams=[str(n), "x" * 100])
+
+
+def _pooled(cid: int, n: int) -> SqlLogMessage:
+    return make_event(
+        n, serverHost="h:3306", serverVersion="8", user="u", client="c", dbName="d", stmtDbName="d",
+        connectionId=cid, totalPoolCount=1, serverFlags=2, clientFlags=0, iFlags=3, defaultTZ="UTC",
+        serverTZ="SYSTEM", isolationLvl=4, durationNs=10, sql="INSERT INTO t VALUES (%s)",
+        queryParams=["ünïcode", "\n"],
+    )
+
+
+def test_bulk_enqueue_preserves_order_and_chunks_by_batch_size() -> None:
+    inner = _MemPublisher()
+    pub = QueueingPublisher(inner=inner, settings=Settings(publish_batch_size=4, publish_flush_interval_s=0.01))
+
+    pub.publish_batch(list(range(10)))
+    pub.publish(10)
+    pub.close()
+
+    assert inner.events == list(range(11))
+    assert all(len(b) <= 4 for b in inner.batches)
+    assert inner.closed
+
+
+def test_drop_backpressure_keeps_what_fits() -> None:
+    inner = _MemPublisher()
+    inner.gate.clear()
+    s = Settings(publish_queue_maxsize=3, publish_batch_size=3, publish_flush_interval_s=60, backpressure="drop")
+    pub = QueueingPublisher(inner=inner, settings=s)
+
+    # Park the worker inside the inner publisher so the queue cannot drain.
+    pub.publish_batch([0, 1, 2])
+    assert inner.entered.wait(5)
+
+    pub.publish_batch([3, 4, 5, 6, 7])
+    pub.publish(8)
+    inner.gate.set()
+    pub.close()
+
+    assert inner.events == [0, 1, 2, 3, 4, 5]
+
+
+def test_block_backpressure_waits_for_room() -> None:
+    inner = _MemPublisher()
+    s = Settings(publish_queue_maxsize=2, publish_batch_size=2, publish_flush_interval_s=0.01)
+    pub = QueueingPublisher(inner=inner, settings=s)
+
+    pub.publish_batch(list(range(25)))
+    pub.close()
+
+    assert inner.events == list(range(25))
+
+
+def test_flush_is_immediate_when_idle_and_waits_for_in_flight_batch() -> None:
+    inner = _MemPublisher()
+    s = Settings(publish_batch_size=100, publish_flush_interval_s=60)
+    pub = QueueingPublisher(inner=inner, settings=s)
+
+    t0 = time.monotonic()
+    assert pub.flush() is True
+    assert time.monotonic() - t0 < 0.04
+
+    # A partial batch would normally wait for the 60s interval; flush pushes it out.
+    pub.publish_batch([1, 2])
+    assert pub.flush(timeout=5) is True
+    assert inner.events == [1, 2]
+
+    # The worker holds the batch (queue is empty) but has not handed it over yet.
+    inner.gate.clear()
+    inner.entered.clear()
+    pub.publish(3)
+    flusher = threading.Thread(target=pub.flush)
+    flusher.start()
+    assert inner.entered.wait(5)
+    assert pub.flush(timeout=0.05) is False
+    inner.gate.set()
+    flusher.join(5)
+    assert not flusher.is_alive()
+    assert inner.events == [1, 2, 3]
+    pub.close()
+
+
+def test_close_is_bounded_when_inner_is_stuck() -> None:
+    inner = _MemPublisher()
+    inner.gate.clear()
+    pub = QueueingPublisher(inner=inner, settings=Settings(publish_batch_size=1))
+    pub.publish(1)
+    assert inner.entered.wait(5)
+
+    t0 = time.monotonic()
+    pub.close(timeout=0.1)
+    assert time.monotonic() - t0 < 1.0
+    assert inner.closed
+    inner.gate.set()
+
+
+def test_workers_shard_by_connection_and_keep_per_connection_order() -> None:
+    from dataclasses import dataclass
+
+    @dataclass(frozen=True)
+    class _Evt:
+        connectionId: int
+        seq: int
+
+    inner = _MemPublisher()
+    s = Settings(publish_workers=4, publish_batch_size=7, publish_flush_interval_s=0.01)
+    pub = QueueingPublisher(inner=inner, settings=s)
+
+    def app_thread(cid: int) -> None:
+        for seq in range(0, 200, 5):
+            pub.publish_batch([_Evt(cid, seq + k) for k in range(5)])
+
+    threads = [threading.Thread(target=app_thread, args=(cid,)) for cid in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    pub.flush(timeout=5)
+
+    for cid in range(10):
+        assert [e.seq for e in inner.events if e.connectionId == cid] == list(range(200))
+    for batch in inner.batches:
+        assert len({e.connectionId % 4 for e in batch}) == 1
+
+    stats = pub.stats()
+    assert [st["shard"] for st in stats] == [0, 1, 2, 3]
+    assert sum(st["published"] for st in stats) == 2000
+    assert all(st["queue_depth"] == 0 and st["batches"] > 0 for st in stats)
+    pub.close()
+
+
+def test_estimate_size_counts_sql_and_params() -> None:
+    assert estimate_size(_Ev("SELECT 1")) == EVENT_OVERHEAD_BYTES + 8
+    assert estimate_size(_Ev("x", ["a" * 2000])) > estimate_size(_Ev("x", ["a"])) + 1990
+
+
+def test_queue_enforces_byte_budget_and_reports_usage() -> None:
+    inner = _MemPublisher()
+    inner.gate.clear()
+    size = estimate_size(_Ev("x" * 80))  # 500 bytes
+    s = Settings(
+        publish_queue_maxsize=0,
+        publish_queue_max_bytes=3 * size,
+        publish_batch_size=1,
+        publish_flush_interval_s=60,
+        backpressure="drop",
+    )
+    pub = QueueingPublisher(inner=inner, settings=s)
+
+    # The worker takes the first event and parks in the inner publisher; it still counts.
+    pub.publish(_Ev("x" * 80))
+    assert inner.entered.wait(5)
+    pub.publish_batch([_Ev("x" * 80) for _ in range(5)])
+
+    assert pub.queued_bytes() == 3 * size
+    stats = pub.stats()[0]
+    assert stats["dropped"] == 3
+    assert stats["max_queued_bytes"] == 3 * size
+
+    inner.gate.set()
+    assert pub.flush(timeout=5)
+    assert pub.queued_bytes() == 0
+    pub.close()
+    assert len(inner.events) == 3
+
+
+def test_oversized_event_passes_alone_and_block_mode_waits_for_bytes() -> None:
+    inner = _MemPublisher()
+    s = Settings(
+        publish_queue_maxsize=0, publish_queue_max_bytes=1000, publish_batch_size=2, publish_flush_interval_s=0.01
+    )
+    pub = QueueingPublisher(inner=inner, settings=s)
+
+    pub.publish_batch([_Ev("big" * 1000)] + [_Ev(str(i)) for i in range(20)])
+    pub.close()
+
+    assert [e.sql for e in inner.events[1:]] == [str(i) for i in range(20)]
+    assert pub.stats()[0]["max_queued_bytes"] <= estimate_size(_Ev("big" * 1000))
+
+
+def test_txn_buffer_tracks_bytes_and_drops_past_budget() -> None:
+    size = estimate_size(_Ev("UPDATE t"))
+    buf = TransactionBuffer(max_bytes=2 * size)
+    for _ in range(3):
+        buf.add(_Ev("UPDATE t"))
+
+    assert len(buf) == 2 and buf.nbytes == 2 * size and buf.dropped == 1
+    buf.drain()
+    assert buf.nbytes == 0
+
+    arena = TransactionBuffer(serializer=lambda e: e.sql.encode(), max_bytes=10)
+    arena.add(_Ev("abcdef"))
+    arena.add(_Ev("ghijkl"))
+    assert arena.nbytes == 6 and arena.dropped == 1
+    arena.clear()
+    assert arena.nbytes == 0
+
+
+def test_lane_classification() -> None:
+    assert lane_of(_Ev("/* x */ select 1")) == READ
+    assert lane_of(_Ev("SHOW TABLES")) == READ
+    assert lane_of(_Ev("SELECT broken", errorMessage="syntax")) == HIGH
+    assert lane_of(_Ev("DELETE FROM t")) == HIGH
+    assert lane_of(_Ev("CREATE TABLE t (a int)")) == HIGH
+    assert lane_of(object()) == HIGH
+
+
+def test_reads_are_dropped_while_writes_keep_their_own_capacity() -> None:
+    s = Settings(
+        priority_lanes=True,
+        publish_queue_maxsize=3,
+        publish_read_queue_maxsize=2,
+        publish_batch_size=1,
+        publish_flush_interval_s=60,
+        backpressure="drop",
+    )
+    inner, pub = _parked(s)
+
+    pub.publish_batch([_Ev(f"SELECT {i}") for i in range(5)])
+    pub.publish_batch([_Ev(f"DELETE FROM t WHERE id={i}") for i in range(4)])
+    stats = pub.stats()[0]
+    assert (stats["dropped_read"], stats["dropped_high"], stats["dropped"]) == (3, 1, 4)
+    assert stats["read_queue_depth"] == 2
+
+    inner.gate.set()
+    pub.close()
+    # High lane drains first.
+    assert [e.sql for e in inner.events] == [
+        "USE app",
+        "DELETE FROM t WHERE id=0",
+        "DELETE FROM t WHERE id=1",
+        "DELETE FROM t WHERE id=2",
+        "SELECT 0",
+        "SELECT 1",
+    ]
+
+
+def test_byte_pressure_sheds_queued_reads_for_writes() -> None:
+    size = estimate_size(_Ev("SELECT 1"))
+    s = Settings(
+        priority_lanes=True,
+        publish_queue_maxsize=0,
+        publish_read_queue_maxsize=0,
+        publish_queue_max_bytes=4 * size,
+        publish_batch_size=1,
+        publish_flush_interval_s=60,
+        backpressure="drop",
+    )
+    inner, pub = _parked(s)
+
+    pub.publish_batch([_Ev(f"SELECT {i}") for i in range(3)])
+    pub.publish_batch([_Ev("UPDATE 1"), _Ev("UPDATE 2")])
+    stats = pub.stats()[0]
+    assert stats["dropped_read"] == 2 and stats["dropped_high"] == 0
+
+    inner.gate.set()
+    assert pub.flush(timeout=5)
+    pub.close()
+    assert [e.sql for e in inner.events] == ["USE app", "UPDATE 1", "UPDATE 2", "SELECT 2"]
+
+
+def test_fingerprint_ignores_literals_whitespace_and_case() -> None:
+    assert sql_fingerprint("SELECT * FROM t WHERE id = 5 AND s = 'it\\'s'") == sql_fingerprint(
+        "select *\n  from t where id = 70 and s = \"zz\""
+    )
+    assert sql_fingerprint("SELECT a FROM t WHERE id IN (1, 2, 3)") == sql_fingerprint(
+        "/* app */ select a from t where id in (%s,%s)"
+    )
+    assert sql_fingerprint("SELECT a FROM t") != sql_fingerprint("SELECT b FROM t")
+
+
+def test_message_levels_drop_params_then_sql() -> None:
+    e = _degradable(1)
+    assert degrade_message(e, 0) is e
+
+    one = degrade_message(e, 1)
+    assert one.queryParams is None and one.sql == e.sql
+    assert one.iFlags == e.iFlags | PY_DEGRADED_PARAMS
+
+    two = degrade_message(e, 2)
+    assert two.queryParams is None and two.sql == "fp:" + sql_fingerprint(e.sql)
+    assert two.iFlags == e.iFlags | PY_DEGRADED_PARAMS | PY_DEGRADED_SQL
+    assert degrade_message(two, 2) is two
+
+
+def test_ladder_thresholds_must_ascend_and_keep_their_steps() -> None:
+    with pytest.raises(ValueError, match="degrade_params_at <= degrade_sql_at"):
+        Settings(degrade_under_load=True, degrade_params_at=0.9, degrade_writes_at=0.6)
+    Settings(degrade_params_at=0.9, degrade_writes_at=0.6)  # not checked while degradation is off
+
+    s = Settings(
+        degrade_under_load=True, publish_queue_maxsize=10,
+        degrade_params_at=0.2, degrade_sql_at=0.2, degrade_reads_at=0.9, degrade_writes_at=0.9,
+    )
+    shard = QueueingPublisher(inner=_MemPublisher(), settings=s)._shards[0]
+    assert [shard.level(n) for n in (1, 2, 8, 9)] == [0, FINGERPRINT_SQL, FINGERPRINT_SQL, SHED_WRITES]
+
+
+def test_queue_fill_walks_the_ladder() -> None:
+    inner = _MemPublisher()
+    inner.gate.clear()
+    s = Settings(
+        degrade_under_load=True,
+        publish_queue_maxsize=10,
+        publish_batch_size=1,
+        publish_flush_interval_s=60,
+        backpressure="drop",
+    )
+    pub = QueueingPublisher(inner=inner, settings=s)
+    pub.publish(_degradable(0))
+    assert inner.entered.wait(5)
+
+    for i in range(1, 9):
+        pub.publish(_degradable(i))
+    pub.publish(_degradable(9, "SELECT a FROM t WHERE id=%s"))  # fill 0.8: still accepted
+    pub.publish(_degradable(10, "SELECT a FROM t WHERE id=%s"))  # fill 0.9: reads shed
+    pub.publish(_degradable(11))  # writes still accepted
+    pub.publish(_degradable(12))  # fill 1.0: writes shed too
+
+    stats = pub.stats()[0]
+    assert (stats["shed"], stats["dropped_read"], stats["dropped_high"]) == (2, 1, 1)
+    assert stats["degrade_level"] == 4
+
+    inner.gate.set()
+    pub.close()
+    published = inner.events[1:]
+    assert [e.executionCount for e in published] == [1, 2, 3, 4, 5, 6, 7, 8, 9, 11]
+    # The worker's backlog shrinks from 10 to 1 while it publishes one event per batch.
+    sql_degraded = [bool(e.iFlags & PY_DEGRADED_SQL) for e in published]
+    params_degraded = [bool(e.iFlags & PY_DEGRADED_PARAMS) for e in published]
+    assert sql_degraded == [True] * 4 + [False] * 6
+    assert params_degraded == [True] * 6 + [False] * 4
+    assert all(e.sql.startswith("fp:") for e in published[:4])
+    assert published[-1].queryParams == ["11", "x" * 100]
+    assert stats["degraded"] == 0 and pub.stats()[0]["degraded"] == 6
+
+
+def test_staged_events_are_merged_in_per_thread_order() -> None:
+    inner = _MemPublisher()
+    s = Settings(thread_staging=True, publish_batch_size=16, publish_flush_interval_s=0.05)
+    pub = QueueingPublisher(inner=inner, settings=s)
+
+    def worker(cid: int) -> None:
+        for i in range(0, 200, 4):
+            pub.publish_batch([make_event(n, connectionId=cid) for n in range(i, i + 4)])
+
+    threads = [threading.Thread(target=worker, args=(cid,)) for cid in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert pub.flush(timeout=5)
+
+    assert len(inner.events) == 8 * 200
+    for cid in range(8):
+        assert [e.executionCount for e in inner.events if e.connectionId == cid] == list(range(200))
+    stats = pub.stats()[0]
+    assert (stats["enqueued"], stats["published"], stats["queue_depth"]) == (1600, 1600, 0)
+    # The threads are gone: a later worker pass drops their drained stages and keeps the counts.
+    shard = pub._shards[0]
+    deadline = time.monotonic() + 5
+    while shard._stages and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert shard._stages == [] and pub.stats()[0]["enqueued"] == 1600
+    pub.close()
+
+
+def test_a_connection_handed_between_threads_keeps_its_order() -> None:
+    inner = _MemPublisher()
+    s = Settings(thread_staging=True, publish_batch_size=100, publish_flush_interval_s=60)
+    pub = QueueingPublisher(inner=inner, settings=s)
+    handed_back = threading.Event()
+
+    def thread_b() -> None:
+        pub.publish(make_event(0, connectionId=1))  # B's stage is registered first
+        handed_back.wait(5)
+        pub.publish(make_event(2, connectionId=7))  # connection 7's second statement, now on B
+
+    b = threading.Thread(target=thread_b)
+    b.start()
+    while pub.stats()[0]["enqueued"] == 0:
+        time.sleep(0.001)
+    a = threading.Thread(target=pub.publish, args=(make_event(1, connectionId=7),))  # its first, on A
+    a.start()
+    a.join()
+    handed_back.set()
+    b.join()
+    assert pub.flush(timeout=5)
+    pub.close()
+    assert [(e.connectionId, e.executionCount) for e in inner.events] == [(1, 0), (7, 1), (7, 2)]
+
+
+def test_each_thread_stage_is_bounded() -> None:
+    inner = _MemPublisher()
+    inner.gate.clear()
+    s = Settings(
+        thread_staging=True,
+        publish_queue_maxsize=3,
+        publish_batch_size=1,
+        publish_flush_interval_s=60,
+        backpressure="drop",
+    )
+    pub = QueueingPublisher(inner=inner, settings=s)
+    pub.publish(make_event(0, connectionId=1))  # taken by the worker, which then blocks on the gate
+    while pub.stats()[0]["queue_depth"]:
+        pass
+    for n in range(1, 6):
+        pub.publish(make_event(n, connectionId=1))
+
+    stats = pub.stats()[0]
+    assert (stats["queue_depth"], stats["dropped"]) == (3, 2)
+    inner.gate.set()
+    pub.close()
+    assert [e.executionCount for e in inner.events] == [0, 1, 2, 3]
+
+
+def test_a_full_stage_blocks_until_the_worker_drains_it() -> None:
+    inner = _MemPublisher()
+    inner.gate.clear()
+    s = Settings(thread_staging=True, publish_queue_maxsize=2, publish_batch_size=1, publish_flush_interval_s=60)
+    pub = QueueingPublisher(inner=inner, settings=s)
+
+    def app() -> None:  # the bound is per thread, so one thread does all the publishing
+        pub.publish(make_event(0, connectionId=1))  # taken by the worker, which then blocks on the gate
+        while pub.stats()[0]["queue_depth"]:
+            pass
+        pub.publish_batch([make_event(1, connectionId=1), make_event(2, connectionId=1)])
+        pub.publish(make_event(3, connectionId=1))
+
+    t = threading.Thread(target=app)
+    t.start()
+    t.join(0.2)
+    assert t.is_alive()  # waiting on the shard's condition for room
+    inner.gate.set()
+    t.join(5)
+    assert not t.is_alive()
+    pub.close()
+    assert [e.executionCount for e in inner.events] == [0, 1, 2, 3]
+
+
+def test_pool_counter_reads_without_the_lock() -> None:
+    counter = PoolCounter()
+    counter.inc()
+    with counter._lock:  # a writer holding the lock does not block readers
+        assert counter.get() == 1
+
+
+def test_pool_output_matches_in_thread_serializer_and_keeps_key_runs() -> None:
+    sink = _BytesSink()
+    pub = ProcessPoolSerializingPublisher(inner=sink, processes=1)
+    events = [_pooled(1, 1), _pooled(1, 2), _pooled(2, 3), _pooled(1, 4)]
+    summary = TxnSummaryMessage(
+        recordType="txnSummary", timestamp=1, serverHost=None, user=None, client=None, dbName=None,
+        stmtDbName=None, debug=None, connectionId=1, outcome="commit", firstWriteTs=None, endTs=2,
+        durationMs=1, statementCount=1, writeCount=0, errorCount=0, dbTimeNs=5, rowsAffected=0, iFlags=3,
+    )
+    try:
+        pub.publish_batch(events)
+        pub.publish(summary)
+    finally:
+        pub.close()
+
+    assert sink.records == [(e.connectionId, _json_serializer(e)) for e in events + [summary]]
+
+
+class _ManualPool:
+    """Stands in for the executor: every submit returns a future the test completes."""
+
+    def __init__(self) -> None:
+        self.futures: list[Future] = []
+
+    def submit(self, fn, *args) -> Future:
+        future: Future = Future()
+        self.futures.append(future)
+        return future
+
+    def shutdown(self, wait: bool = True, **kwargs) -> None:
+        pass
+
+
+def test_pool_keeps_up_to_processes_batches_in_flight_and_publishes_in_order() -> None:
+    sink = _BytesSink()
+    pub = ProcessPoolSerializingPublisher(inner=sink, processes=2)
+    pool = _ManualPool()
+    pub._pool = pool
+    batches = [[_pooled(1, n)] for n in range(3)]
+
+    pub.publish_batch(batches[0])
+    pub.publish_batch(batches[1])  # returns without waiting: two in flight
+    assert len(pool.futures) == 2 and sink.records == []
+
+    pool.futures[1].set_result([b"1"])  # the newer one finishing first is held back
+    t = threading.Thread(target=pub.publish_batch, args=(batches[2],))
+    t.start()
+    t.join(0.2)
+    assert t.is_alive() and sink.records == []  # third batch waits for the oldest
+
+    pool.futures[0].set_result([b"0"])
+    t.join(5)
+    assert not t.is_alive()
+    assert sink.records == [(1, b"0"), (1, b"1")]
+
+    assert pub.flush(timeout=0.05) is False  # third batch still serializing
+    pool.futures[2].set_result([b"2"])
+    pub.flush(timeout=1)
+    assert sink.records == [(1, b"0"), (1, b"1"), (1, b"2")]
+
+
+def test_a_failed_pool_batch_is_serialized_in_thread_in_its_slot() -> None:
+    sink = _BytesSink()
+    pub = ProcessPoolSerializingPublisher(inner=sink, processes=2)
+    pool = _ManualPool()
+    pub._pool = pool
+    first, second = _pooled(1, 1), _pooled(1, 2)
+
+    pub.publish_batch([first])
+    pub.publish_batch([second])
+    pool.futures[1].set_result([b"later"])
+    pool.futures[0].set_exception(RuntimeError("worker died"))
+    pub.close()
+
+    assert sink.records == [(1, _json_serializer(first)), (1, b"later")]
+
+
+def test_non_dataclass_records_fall_back_to_inner_publish_batch() -> None:
+    sink = _BytesSink()
+    pub = ProcessPoolSerializingPublisher(inner=sink, processes=1)
+    pub.publish_batch([object()])
+    pub.close()
+
+    assert len(sink.objects) == 1 and sink.records == []
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Optional
+
+from mysql_interceptor.config.settings import Settings
+import mysql_interceptor.dbapi.txn_buffer as txn_buffer
+from mysql_interceptor.dbapi.txn_buffer import TransactionBuffer
+from mysql_interceptor.dbapi.wrappers import ConnectionWrapper
+from mysql_interceptor.events.models import SqlLogMessage, TxnSummaryMessage
+from mysql_interceptor.kafka.confluent import _json_serializer
+from tests.conftest import make_event
+
+
+class _MemPublisher:
+    def __init__(self) -> None:
+        self.events: list[SqlLogMessage] = []
+        self.serialized: list[tuple[Optional[int], bytes]] = []
+
+    def serialize(self, event: SqlLogMessage) -> bytes:
+        return _json_serializer(event)
+
+    def publish(self, event: SqlLogMessage) -> None:
+        self.events.append(event)
+
+    def publish_batch(self, events: list[SqlLogMessage]) -> None:
+        self.events.extend(events)
+
+    def publish_serialized(self, values: list[memoryview], *, key: Optional[int] = None) -> None:
+        self.serialized.extend((key, bytes(v)) for v in values)
+
+    def flush(self, timeout=None) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _Cur:
+    def __init__(self) -> None:
+        self.rowcount = 0
+
+    def execute(self, sql, params=None):
+        if sql.startswith("BAD"):
+            raise RuntimeError("syntax error")
+        self.rowcount = 2 if sql.startswith("UPDATE") else 5
+        return self.rowcount
+
+    def executemany(self, sql, seq):
+        self.rowcount = sum(1 for _ in seq)
+        return self.rowcount
+
+    def fetchone(self):
+        return (7,)
+
+    def close(self):
+        pass
+
+
+class _Conn:
+    def cursor(self, *a, **k):
+        return _Cur()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+    def get_server_info(self):
+        return "8.0.0"
+
+
+def _summaries(pub: _MemPublisher) -> list[TxnSummaryMessage]:
+    return [e for e in pub.events if isinstance(e, TxnSummaryMessage)]
+
+
+def test_arena_slices_match_per_event_serialization() -> None:
+    buf = TransactionBuffer(serializer=_json_serializer)
+    events = [make_event(i, queryParams=["é"]) for i in range(3)]
+    for e in events:
+        buf.add(e)
+
+    assert len(buf) == 3
+    values = buf.drain_serialized()
+    assert [bytes(v) for v in values] == [_json_serializer(e) for e in events]
+    assert all(v.readonly for v in values)
+    assert len(buf) == 0
+
+    # Views stay valid after the buffer is reused.
+    buf.add(make_event(9, queryParams=["é"]))
+    buf.clear()
+    assert json.loads(bytes(values[2]))["executionCount"] == 2
+    assert buf.drain_serialized() == []
+
+
+def test_plain_buffer_keeps_event_objects() -> None:
+    buf = TransactionBuffer()
+    buf.add(make_event(1, queryParams=["é"]))
+    assert not buf.preserialized
+    assert buf.drain_serialized() == []
+    assert buf.drain() == [make_event(1, queryParams=["é"])]
+
+
+def test_unbounded_buffer_does_not_estimate_sizes(monkeypatch) -> None:
+    monkeypatch.setattr(txn_buffer, "estimate_size", lambda e: 1 / 0)
+    buf = TransactionBuffer()
+    buf.add(make_event(1))
+    assert len(buf) == 1 and buf.nbytes == 0
+
+
+def test_a_truncated_transaction_warns_once(caplog) -> None:
+    buf = TransactionBuffer(serializer=_json_serializer, max_bytes=1)
+    with caplog.at_level(logging.WARNING, logger=txn_buffer.__name__):
+        for n in range(3):
+            buf.add(make_event(n))
+        buf.drain_serialized()
+        buf.add(make_event(3))
+
+    assert buf.dropped == 4
+    warnings = [r.getMessage() for r in caplog.records]
+    assert len(warnings) == 2 and "connection 7" in warnings[0]
+
+
+def test_wrapper_commit_publishes_arena_and_rollback_drops() -> None:
+    pub = _MemPublisher()
+    s = Settings(buffer_until_commit=True, preserialize_txn_buffer=True)
+    conn = ConnectionWrapper(conn=_Conn(), publisher=pub, settings=s, driver_name="pymysql", database="test")
+    cur = conn.cursor()
+
+    cur.execute("INSERT INTO t VALUES (%s)", (1,))
+    conn.rollback()
+    cur.execute("INSERT INTO t VALUES (%s)", (2,))
+    cur.execute("INSERT INTO t VALUES (%s)", (3,))
+    conn.commit()
+
+    assert pub.events == []
+    assert [k for k, _ in pub.serialized] == [7, 7]
+    assert [json.loads(v)["queryParams"] for _, v in pub.serialized] == [["2"], ["3"]]
+
+
+def test_wrapper_falls_back_to_objects_without_serialized_support() -> None:
+    class _Plain(_MemPublisher):
+        publish_serialized = None  # type: ignore[assignment]
+
+    pub = _Plain()
+    s = Settings(buffer_until_commit=True, preserialize_txn_buffer=True)
+    conn = ConnectionWrapper(conn=_Conn(), publisher=pub, settings=s, driver_name="pymysql", database="test")
+    conn.cursor().execute("INSERT INTO t VALUES (1)")
+    conn.commit()
+
+    assert len(pub.events) == 1
+
+
+def test_commit_emits_one_summary_after_statement_events() -> None:
+    pub = _MemPublisher()
+    s = Settings(emit_txn_summary=True)
+    conn = ConnectionWrapper(conn=_Conn(), publisher=pub, settings=s, driver_name="pymysql", database="test")
+    cur = conn.cursor()
+
+    cur.execute("SELECT * FROM t")
+    cur.execute("UPDATE t SET a=1")
+    cur.executemany("INSERT INTO t VALUES (%s)", [(1,), (2,), (3,)])
+    try:
+        cur.execute("BAD SQL")
+    except RuntimeError:
+        pass
+    conn.commit()
+
+    assert len(pub.events) == 7
+    summary = pub.events[-1]
+    assert isinstance(summary, TxnSummaryMessage)
+    assert summary.outcome == "commit"
+    assert summary.connectionId == 7
+    assert summary.statementCount == 6
+    assert summary.writeCount == 4
+    assert summary.errorCount == 1
+    assert summary.rowsAffected == 5
+    assert summary.firstWriteTs is not None and summary.firstWriteTs >= summary.timestamp
+    assert summary.endTs >= summary.timestamp
+    assert summary.dbTimeNs > 0
+    assert summary.to_dict()["recordType"] == "txnSummary"
+
+
+def test_summary_only_replaces_statement_events_and_empty_txn_is_silent() -> None:
+    pub = _MemPublisher()
+    s = Settings(txn_summary_only=True, buffer_until_commit=False)
+    conn = ConnectionWrapper(conn=_Conn(), publisher=pub, settings=s, driver_name="pymysql", database="test")
+
+    conn.rollback()
+    assert pub.events == []
+
+    cur = conn.cursor()
+    cur.execute("UPDATE t SET a=1")
+    cur.execute("UPDATE t SET a=2")
+    conn.rollback()
+
+    assert len(pub.events) == 1
+    summary = _summaries(pub)[0]
+    assert summary.outcome == "rollback"
+    assert summary.statementCount == 2
+    assert summary.rowsAffected == 4
+
+    cur.execute("UPDATE t SET a=3")
+    conn.commit()
+    assert [e.statementCount for e in _summaries(pub)] == [2, 1]
+
+
+def test_summary_only_reports_each_autocommitted_statement() -> None:
+    class _AutocommitConn(_Conn):
+        server_status = 2  # SERVER_STATUS_AUTOCOMMIT, no transaction open
+
+    pub = _MemPublisher()
+    s = Settings(txn_summary_only=True)
+    dbapi_conn = _AutocommitConn()
+    conn = ConnectionWrapper(conn=dbapi_conn, publisher=pub, settings=s, driver_name="pymysql", database="test")
+    cur = conn.cursor()
+    cur.execute("UPDATE t SET a=1")
+    cur.executemany("INSERT INTO t VALUES (%s)", [(1,), (2,)])
+    assert [(e.outcome, e.statementCount) for e in _summaries(pub)] == [("commit", 1), ("commit", 2)]
+
+    dbapi_conn.server_status = 3  # inside an explicit transaction: wait for its end
+    cur.execute("UPDATE t SET a=2")
+    assert len(_summaries(pub)) == 2
+    conn.commit()
+    assert [e.statementCount for e in _summaries(pub)] == [1, 2, 1]
+
+
+def test_sqlalchemy_state_emits_summary() -> None:
+    from mysql_interceptor.sqlalchemy_interceptor import _build_state, _emit_txn_summary
+
+    class MockUrl:
+        database = "test"
+        username = "user"
+        host = "localhost"
+        port = 3306
+
+    pub = _MemPublisher()
+    st = _build_state(dbapi_conn=_Conn(), engine_url=MockUrl(), publisher=pub, settings=Settings(emit_txn_summary=True))
+    assert st.span is not None
+    st.span.begin(1_000)
+    st.span.record(timestamp_ms=1_005, duration_ns=10, write=True, update_count=3, error=False)
+    _emit_txn_summary(st, "commit")
+
+    summary = _summaries(pub)[0]
+    assert summary.timestamp == 1_000
+    assert summary.firstWriteTs == 1_005
+    assert summary.rowsAffected == 3
+    assert st.span.statements == 0
@@ -0,0 +1,433 @@
+from __future__ import annotations
+
+import datetime
+import decimal
+import json
+import os
+from dataclasses import dataclass, replace
+from typing import List, Optional
+
+import pytest
+
+from mysql_interceptor.config.settings import Settings
+from mysql_interceptor.connect import _build_serializer, _build_sink_stage
+from mysql_interceptor.errors import PublisherError
+from mysql_interceptor.events.models import (
+    OutageSummaryMessage,
+    SessionMessage,
+    SlimSqlLogMessage,
+    SqlLogMessage,
+    SuppressedEventsMessage,
+    TxnSummaryMessage,
+)
+from mysql_interceptor.events.sessions import SessionJoiner
+from mysql_interceptor.kafka.confluent import ConfluentKafkaPublisher, _json_serializer
+from mysql_interceptor.kafka.envelope import (
+    LENGTH_PREFIXED,
+    MAGIC,
+    NDJSON,
+    EnvelopePublisher,
+    iter_events,
+    pack,
+    unpack,
+)
+from mysql_interceptor.kafka.process_pool import _serialize_rows, _to_row
+from mysql_interceptor.kafka.publisher import StdoutPublisher
+from mysql_interceptor.kafka.schema_registry import FileSchemaRegistry
+from mysql_interceptor.kafka.serializers import (
+    JSON_BACKENDS,
+    _BUILDERS,
+    BinaryDecoder,
+    BinarySerializer,
+    JsonSerializer,
+    json_encoder,
+    record_schema,
+    stdlib_json,
+)
+from mysql_interceptor.kafka.sessions import SessionRecordPublisher
+from tests.conftest import make_event
+
+GOLDEN = os.path.join(os.path.dirname(__file__), "golden", "json_records.ndjson")
+TRICKY = 'q"b\\s/\n\r\t\b\f\x00\x01\x1f\x7f \u2028\u2029 é ü 中文 😀 \U0010ffff'
+
+
+def _rich(n: int, **changes) -> SqlLogMessage:
+    """A statement with every connection field set, as in the golden file."""
+    fields = dict(
+        timestamp=1_700_000_000_000 + n, serverHost="db-1:3306", serverVersion="8.0.36", user="app",
+        client="web-1", dbName="shop", stmtDbName="shop", totalPoolCount=4, serverFlags=2, clientFlags=0x200,
+        iFlags=1 | (1 << 33), defaultTZ="UTC", isolationLvl=4, durationNs=123_456, updateCount=-1,
+        sql="UPDATE t SET a=%s -- é", queryParams=["1", "ünï"],
+    )
+    fields.update(changes)
+    return make_event(n, **fields)
+
+
+def _session_event(n: int, cid: int = 7, db: str = "shop") -> SqlLogMessage:
+    return make_event(
+        n, timestamp=1000 + n, serverHost="db-1:3306", serverVersion="8.0.36", user="app", client="web-1",
+        dbName=db, stmtDbName=db, debug="svc", connectionId=cid, totalPoolCount=4, serverFlags=2,
+        clientFlags=0x200, defaultTZ="UTC", serverTZ="SYSTEM", isolationLvl=4, durationNs=n * 10,
+        queryParams=[str(n)],
+    )
+
+
+def _summary(cid: int) -> TxnSummaryMessage:
+    return TxnSummaryMessage(
+        recordType="txnSummary", timestamp=0, serverHost=None, user=None, client=None, dbName=None,
+        stmtDbName=None, debug=None, connectionId=cid, outcome="commit", firstWriteTs=None, endTs=1,
+        durationMs=1, statementCount=2, writeCount=2, errorCount=0, dbTimeNs=0, rowsAffected=2, iFlags=0,
+    )
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _Producer:
+    def __init__(self) -> None:
+        self.values: list = []
+
+    def produce(self, topic, key=None, value=None, on_delivery=None):
+        self.values.append(bytes(value))
+
+    def poll(self, timeout=0):
+        return 0
+
+    def flush(self, timeout=None):
+        return 0
+
+
+class _SerializedSink:
+    def __init__(self) -> None:
+        self.records: list = []
+
+    def serialize(self, event) -> bytes:
+        return _json_serializer(event)
+
+    def publish(self, event) -> None:
+        self.records.append((event.connectionId, _json_serializer(event)))
+
+    def publish_batch(self, events: list) -> None:
+        for e in events:
+            self.publish(e)
+
+    def publish_serialized(self, values, *, key=None) -> None:
+        self.records.extend((key, bytes(v)) for v in values)
+
+    def flush(self, timeout=None) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _MemPublisher:
+    def __init__(self) -> None:
+        self.events: list = []
+
+    def publish(self, event) -> None:
+        self.events.append(event)
+
+    def publish_batch(self, events: list) -> None:
+        self.events.extend(events)
+
+    def flush(self, timeout=None) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _records() -> list:
+    """One record per line of the golden file, in order."""
+    return [
+        _rich(0),
+        _rich(1, sql=TRICKY, queryParams=[TRICKY, "", "NULL", "'x'"], errorMessage=TRICKY, serverInfo=TRICKY),
+        SqlLogMessage(0, *([None] * 12), 0, *([None] * 6), [], None, None),
+        _rich(3, timestamp=-(2**63), connectionId=2**63 - 1, durationNs=2**64 - 1, updateCount=0),
+        _rich(4, sql="", user="", queryParams=None, debug="#dbg", stmtDbName="ĺ" * 300),
+        TxnSummaryMessage("txnSummary", 1, "h", "u", "c", "db", "db", None, 7, "commit", 2, 3, 2, 4, 2, 0, 99, 5, 1),
+        SuppressedEventsMessage("suppressed", 1, 2, "svc", None, "shop", "SELECT", 10, 0),
+        OutageSummaryMessage("outage", 1, 2, "svc", "c", 3, 40, 0),
+        SessionMessage("session", "1f-ab-1", 1, 7, "h", "8.0", "u", TRICKY, "db", None, 0x200, "UTC", None, 4),
+        SlimSqlLogMessage("stmt", "1f-ab-1", 1, "db", 7, 4, 1, 2, 1, 10, -1, "SELECT 1", ["1"], None, None),
+    ]
+
+
+def _golden() -> list:
+    with open(GOLDEN, "rb") as f:
+        return f.read().splitlines()
+
+
+def _installed() -> list:
+    out = []
+    for name in JSON_BACKENDS:
+        try:
+            out.append((name, _BUILDERS[name]()))
+        except ImportError:
+            pass
+    return out
+
+
+def test_golden_file_is_the_stdlib_encoding():
+    assert [stdlib_json(r) for r in _records()] == _golden()
+
+
+@pytest.mark.parametrize("name,encode", _installed(), ids=lambda v: v if isinstance(v, str) else "")
+def test_every_installed_backend_matches_the_golden_file(name, encode):
+    assert [encode(r) for r in _records()] == _golden()
+
+
+@pytest.mark.parametrize("name,encode", _installed(), ids=lambda v: v if isinstance(v, str) else "")
+def test_values_a_backend_cannot_match_fall_back_to_stdlib(name, encode):
+    odd = [
+        _rich(0, connectionId=2**64),  # beyond 64 bits
+        _rich(0, durationNs=-(2**63) - 1),
+        _rich(0, queryParams=[decimal.Decimal("1.50"), datetime.datetime(2024, 5, 1, 12, 0), b"raw", 3]),
+        _rich(0, debug=datetime.date(2024, 5, 1), user=decimal.Decimal("2")),
+        _rich(0, updateCount=True, executionCount=1.5, queryParams=("a", None)),
+    ]
+    for record in odd:
+        assert encode(record) == stdlib_json(record)
+
+
+def test_default_serializer_and_publishers_share_the_registry():
+    name, encode = json_encoder()
+    assert name in JSON_BACKENDS and _json_serializer is encode
+    assert JsonSerializer().backend == name
+    assert StdoutPublisher().serialize(_records()[1]) == _golden()[1]
+    assert StdoutPublisher(serializer=json_encoder("stdlib")[1]).serialize(_rich(0)) == _golden()[0]
+
+
+def test_process_pool_rows_match_the_golden_file():
+    rows = [_to_row(r) for r in _records()]
+    assert _serialize_rows(rows) == _golden()
+    assert _serialize_rows(rows, "python") == _golden()
+
+
+def test_backend_selection():
+    assert JsonSerializer("stdlib").backend == "stdlib"
+    assert JsonSerializer(" Python ").backend == "python"
+    assert json_encoder("auto") == json_encoder(None)
+    with pytest.raises(PublisherError):
+        json_encoder("ujson")
+
+
+def test_missing_backend_falls_back_to_auto(monkeypatch):
+    def missing():
+        raise ImportError("not here")
+
+    monkeypatch.setitem(_BUILDERS, "msgspec", missing)
+    monkeypatch.setattr("mysql_interceptor.kafka.serializers._ENCODERS", {})
+    assert json_encoder("msgspec") == json_encoder("auto")
+
+
+def test_backend_that_changes_bytes_is_rejected(monkeypatch):
+    monkeypatch.setitem(_BUILDERS, "orjson", lambda: (lambda r: stdlib_json(r).replace(b"\\u0000", b"\\0")))
+    monkeypatch.setattr("mysql_interceptor.kafka.serializers._ENCODERS", {})
+    assert json_encoder("orjson")[0] != "orjson"
+    assert json_encoder("auto")[0] != "orjson"
+
+
+def test_binary_round_trip_matches_json(tmp_path) -> None:
+    registry = FileSchemaRegistry(str(tmp_path))
+    encode = BinarySerializer(registry)
+    decoder = BinaryDecoder(FileSchemaRegistry(str(tmp_path)))  # a consumer with its own cache
+
+    events = [_rich(1), _rich(2, queryParams=[], sql=None, durationNs=0), _rich(3, connectionId=None)]
+    for e in events:
+        data = encode(e)
+        assert data[0] == 0 and len(data) < len(_json_serializer(e)) * 0.6
+        assert json.dumps(decoder.decode(data)) == json.dumps(json.loads(_json_serializer(e)))
+
+    assert unpack(b"\x00\x00\x00\x00\x01\n\n") == [b"\x00\x00\x00\x00\x01\n\n"]
+
+    session = SessionMessage("session", "s-1", 1, 7, "h", "v", "u", "c", "db", None, 0, "UTC", "UTC", 2)
+    assert decoder.decode(encode(session))["sessionId"] == "s-1"
+    with pytest.raises(KeyError):
+        decoder.decode(b"\x00\x00\x00\x00\x63\x00")
+
+
+def test_registry_ids_are_stable_and_versioned(tmp_path) -> None:
+    a = FileSchemaRegistry(str(tmp_path))
+    b = FileSchemaRegistry(str(tmp_path))
+    v1 = {"type": "record", "fields": [{"name": "x", "type": "long"}]}
+    v2 = {"type": "record", "fields": [{"name": "x", "type": "long"}, {"name": "y", "type": "string"}]}
+
+    first = a.register("subj", v1)
+    assert b.register("subj", dict(v1)) == first
+    second = b.register("subj", v2)
+    assert second == first + 1
+    assert a.register("other", v1) == second + 1
+    assert a.latest("subj") == (second, v2)
+    assert a.get(second) == v2
+    assert len(os.listdir(tmp_path)) == 3
+
+
+def test_settings_select_the_wire_format(tmp_path) -> None:
+    assert isinstance(_build_serializer(Settings()), JsonSerializer)
+    assert isinstance(_build_serializer(Settings(wire_format="binary")), JsonSerializer)  # no registry: fallback
+    serializer = _build_serializer(Settings(wire_format="binary", schema_registry_dir=str(tmp_path)))
+    assert isinstance(serializer, BinarySerializer)
+
+    producer = _Producer()
+    pub = ConfluentKafkaPublisher(bootstrap_servers="unused:9092", topic="t", producer=producer, serializer=serializer)
+    pub.publish_batch([_rich(1), _rich(2)])
+    decoder = BinaryDecoder(FileSchemaRegistry(str(tmp_path)))
+    assert [decoder.decode(v)["executionCount"] for v in producer.values] == [1, 2]
+    assert pub.serialize(_rich(3)) == serializer(_rich(3))
+
+
+class Point:
+    pass
+
+
+@dataclass(frozen=True)
+class _Odd:
+    name: Optional[str]
+    sizes: List[str]
+    where: Point  # "int" appears in the name only
+
+
+def test_field_types_are_resolved_not_matched_by_name() -> None:
+    assert [f["type"] for f in record_schema(SqlLogMessage)["fields"]][:2] == ["long", "string"]
+    with pytest.raises(TypeError):
+        record_schema(_Odd)
+
+
+def test_envelopes_of_binary_records(tmp_path) -> None:
+    encode = BinarySerializer(FileSchemaRegistry(str(tmp_path)))
+    decoder = BinaryDecoder(FileSchemaRegistry(str(tmp_path)))
+    sink = _SerializedSink()
+    pub = EnvelopePublisher(inner=sink, fmt=LENGTH_PREFIXED, txn_boundaries=True, serializer=encode, max_delay_s=60)
+    summary = TxnSummaryMessage(
+        "txnSummary", 1, None, None, None, None, None, None, 7, "commit", None, 2, 1, 2, 1, 0, 5, 1, 0
+    )
+    # Pre-serialized binary values (a transaction arena): the summary's schema id closes the envelope.
+    pub.publish_serialized([encode(_rich(1)), encode(_rich(2)), encode(summary)], key=7)
+    assert len(sink.records) == 1
+    ((key, payload),) = sink.records
+    assert key == 7
+    events = list(iter_events(payload, decoder))
+    assert [e.get("executionCount") for e in events] == [1, 2, None] and events[2]["recordType"] == "txnSummary"
+    with pytest.raises(ValueError):
+        list(iter_events(payload))
+    pub.close()
+
+
+@pytest.mark.parametrize("fmt", [NDJSON, LENGTH_PREFIXED])
+def test_pack_unpack_round_trip(fmt: str) -> None:
+    values = [_json_serializer(make_event(i, sql="SELECT 'a\nb'")) for i in range(3)]
+    payload = pack(values, fmt)
+    assert payload.startswith(MAGIC) == (fmt == LENGTH_PREFIXED)
+    assert unpack(payload) == values
+    assert [e["executionCount"] for e in iter_events(payload)] == [0, 1, 2]
+    assert unpack(values[0]) == [values[0]]  # a plain one-event record
+
+    with pytest.raises(ValueError):
+        unpack(pack(values, LENGTH_PREFIXED)[:-1])
+
+
+def test_envelopes_close_on_size_time_and_flush_per_connection() -> None:
+    sink = _SerializedSink()
+    clock = _Clock()
+    size = len(_json_serializer(make_event(0))) + 1
+    pub = EnvelopePublisher(inner=sink, max_bytes=3 * size, max_delay_s=1.0, clock=clock)
+
+    pub.publish_batch([make_event(n, connectionId=cid) for n, cid in enumerate([1, 2, 1, 1])])
+    assert sink.records == []
+    pub.publish(make_event(4, connectionId=1))  # would exceed max_bytes: connection 1's envelope goes out
+    assert [(k, [e["executionCount"] for e in iter_events(v)]) for k, v in sink.records] == [(1, [0, 2, 3])]
+
+    clock.now += 1.0
+    pub.publish(make_event(5, connectionId=3))  # connections 1 and 2 have been open max_delay_s
+    assert [k for k, _ in sink.records] == [1, 2, 1]
+
+    pub.flush()
+    assert [k for k, _ in sink.records] == [1, 2, 1, 3]
+    assert (pub.envelopes, pub.events) == (4, 6)
+    pub.close()
+
+
+def test_txn_boundaries_close_after_the_summary() -> None:
+    sink = _SerializedSink()
+    pub = EnvelopePublisher(inner=sink, fmt=LENGTH_PREFIXED, max_delay_s=60, txn_boundaries=True)
+    pub.publish_batch([make_event(0), make_event(1), make_event(2, connectionId=8)])
+    pub.publish(_summary(7))
+    # The process-pool path hands over bytes; the summary is recognized by its prefix.
+    pub.publish_serialized([_json_serializer(make_event(3)), _json_serializer(_summary(7))], key=7)
+
+    records = [[e.get("recordType", e.get("executionCount")) for e in iter_events(v)] for _, v in sink.records]
+    assert records == [[0, 1, "txnSummary"], [3, "txnSummary"]]
+    pub.close()
+    assert [(k, [e["executionCount"] for e in iter_events(v)]) for k, v in sink.records[2:]] == [(8, [2])]
+
+
+def test_sink_stage_wraps_envelopes_when_configured() -> None:
+    stage = _build_sink_stage(Settings(envelope_format="NDJSON"), None, None)
+    assert isinstance(stage, EnvelopePublisher)
+    assert not isinstance(_build_sink_stage(Settings(envelope_format="bogus"), None, None), EnvelopePublisher)
+    assert not isinstance(_build_sink_stage(Settings(), None, None), EnvelopePublisher)
+
+
+def test_session_record_precedes_slim_statements() -> None:
+    inner = _MemPublisher()
+    clock = _Clock()
+    pub = SessionRecordPublisher(inner=inner, refresh_s=60, clock=clock)
+
+    pub.publish_batch([_session_event(1), _session_event(2, cid=8), _session_event(3)])
+    pub.publish(_session_event(4, db="billing"))  # session state changed: new session id
+    clock.now += 60
+    pub.publish(_session_event(5, db="billing"))  # refresh: same id again
+    summary = SuppressedEventsMessage("suppressed", 0, 1, "svc", None, "shop", "update", 3, 0)
+    pub.publish(summary)
+
+    kinds = [(type(e).__name__, getattr(e, "connectionId", None)) for e in inner.events]
+    assert kinds == [
+        ("SessionMessage", 7), ("SlimSqlLogMessage", 7),
+        ("SessionMessage", 8), ("SlimSqlLogMessage", 8),
+        ("SlimSqlLogMessage", 7),
+        ("SessionMessage", 7), ("SlimSqlLogMessage", 7),
+        ("SessionMessage", 7), ("SlimSqlLogMessage", 7),
+        ("SuppressedEventsMessage", None),
+    ]
+    sessions = [e for e in inner.events if isinstance(e, SessionMessage)]
+    assert sessions[0].sessionId != sessions[2].sessionId == sessions[3].sessionId
+    assert pub.sessions == 3
+    slim = [e for e in inner.events if isinstance(e, SlimSqlLogMessage)]
+    assert all(e.sessionId == s.sessionId for e, s in zip(slim[-2:], sessions[-2:]))
+
+
+def test_joiner_rebuilds_the_full_message() -> None:
+    inner = _MemPublisher()
+    pub = SessionRecordPublisher(inner=inner)
+    events = [_session_event(1), _session_event(2, cid=8), _session_event(3, db="billing")]
+    pub.publish_batch(events)
+
+    wire = [_json_serializer(e) for e in inner.events]
+    full = sum(len(_json_serializer(e)) for e in events)
+    slim = sum(len(v) for v in wire if b'"recordType":"stmt"' in v)
+    assert slim < full * 0.75
+
+    joiner = SessionJoiner()
+    rebuilt = list(joiner.feed_all(json.loads(v) for v in wire))
+    assert [json.dumps(r, separators=(",", ":")).encode() for r in rebuilt] == [
+        json.dumps(e.to_dict(), separators=(",", ":")).encode() for e in events
+    ]
+
+    late = SessionJoiner()
+    (orphan,) = late.feed_all([json.loads(wire[1])])
+    assert orphan["serverHost"] is None and orphan["executionCount"] == 1 and late.unresolved == 1
+
+
+def test_sink_stage_and_non_statement_events() -> None:
+    assert isinstance(_build_sink_stage(Settings(session_records=True), None, None), SessionRecordPublisher)
+    inner = _MemPublisher()
+    pub = SessionRecordPublisher(inner=inner)
+    pub.publish(replace(_session_event(1), connectionId=None))
+    assert [type(e) for e in inner.events] == [SqlLogMessage]